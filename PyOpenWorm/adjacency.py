@@ -0,0 +1,172 @@
+'''
+Adjacency matrices of the connections in a network.
+
+NumPy and SciPy are needed for these, but they aren't otherwise required by
+PyOpenWorm, so they're imported when a matrix is built. They're installed with
+the ``adjacency`` extra.
+'''
+from __future__ import absolute_import
+
+__all__ = ['Adjacency']
+
+
+class Adjacency(object):
+    '''
+    A sparse adjacency matrix of connections between cells
+
+    Row ``i`` and column ``i`` both stand for the cell ``cells[i]``. The entry
+    at row ``i`` and column ``j`` is the total weight of the connections with
+    ``cells[i]`` as the pre-synaptic cell and ``cells[j]`` as the post-synaptic
+    cell.
+
+    Attributes
+    ----------
+    matrix : scipy.sparse.csr_matrix
+        The adjacency matrix
+    cells : list of str
+        The cell for each row and column, sorted. Cells are named by their
+        ``name`` or, if they have none, by their identifier
+    index : dict
+        Maps each cell in `cells` to its row and column
+    '''
+
+    def __init__(self, matrix, cells):
+        self.matrix = matrix
+        self.cells = cells
+        self.index = dict((c, i) for i, c in enumerate(cells))
+        self._shortest_paths = dict()
+
+    @classmethod
+    def from_edges(cls, edges, cells=()):
+        '''
+        Build an adjacency matrix from weighted edges
+
+        Parameters
+        ----------
+        edges : iterable of tuple
+            Triples of the pre-synaptic cell, the post-synaptic cell and the
+            weight. Weights of edges between the same cells are summed
+        cells : iterable of str
+            Cells to include even if they have no edges
+
+        Returns
+        -------
+        Adjacency
+        '''
+        import numpy as np
+        from scipy.sparse import coo_matrix
+
+        edges = list(edges)
+        names = set(cells)
+        for pre, post, _ in edges:
+            names.add(pre)
+            names.add(post)
+        names = sorted(names)
+        index = dict((c, i) for i, c in enumerate(names))
+        n = len(names)
+        rows = np.fromiter((index[e[0]] for e in edges), dtype=np.intp, count=len(edges))
+        cols = np.fromiter((index[e[1]] for e in edges), dtype=np.intp, count=len(edges))
+        data = np.fromiter((e[2] for e in edges), dtype=np.float64, count=len(edges))
+        # Duplicate entries are summed in the conversion
+        matrix = coo_matrix((data, (rows, cols)), shape=(n, n)).tocsr()
+        return cls(matrix, names)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def weight(self, pre, post):
+        ''' The total weight of connections from `pre` to `post` '''
+        return self.matrix[self.index[pre], self.index[post]]
+
+    def degree(self, cell, direction='either'):
+        '''
+        The total weight of connections to or from a cell
+
+        With unit weights, this is the number of connections, like
+        `~PyOpenWorm.neuron.Neuron.Syn_degree`
+
+        Parameters
+        ----------
+        cell : str
+            The cell
+        direction : str
+            'pre' for connections from the cell, 'post' for connections to the
+            cell, or 'either' for both
+
+        Returns
+        -------
+        float
+        '''
+        i = self.index[cell]
+        if direction == 'pre':
+            return self.matrix[i].sum()
+        elif direction == 'post':
+            return self.matrix[:, i].sum()
+        elif direction == 'either':
+            return self.matrix[i].sum() + self.matrix[:, i].sum()
+        raise ValueError('Unknown direction ' + repr(direction))
+
+    def degrees(self, direction='either'):
+        '''
+        The degree of every cell, as by `degree`
+
+        Returns
+        -------
+        dict
+            Maps each cell to its degree
+        '''
+        import numpy as np
+        out = np.asarray(self.matrix.sum(axis=1)).ravel()
+        inn = np.asarray(self.matrix.sum(axis=0)).ravel()
+        if direction == 'pre':
+            res = out
+        elif direction == 'post':
+            res = inn
+        elif direction == 'either':
+            res = out + inn
+        else:
+            raise ValueError('Unknown direction ' + repr(direction))
+        return dict(zip(self.cells, res.tolist()))
+
+    def neighbors(self, cell):
+        '''
+        The post-synaptic partners of a cell, like
+        `~PyOpenWorm.neuron.Neighbor.get`
+
+        Returns
+        -------
+        list of str
+        '''
+        row = self.matrix[self.index[cell]]
+        return [self.cells[j] for j in row.indices[row.data != 0]]
+
+    def shortest_paths(self, directed=True, unweighted=False):
+        '''
+        The lengths of the shortest paths between all pairs of cells
+
+        The result is computed once for each combination of arguments
+
+        Parameters
+        ----------
+        directed : bool
+            If False, connections are followed in either direction
+        unweighted : bool
+            If True, each connection has length 1 instead of its weight
+
+        Returns
+        -------
+        numpy.ndarray
+            Path lengths indexed like `matrix`. There's ``inf`` where there's
+            no path
+        '''
+        key = (directed, unweighted)
+        res = self._shortest_paths.get(key)
+        if res is None:
+            from scipy.sparse.csgraph import shortest_path
+            res = shortest_path(self.matrix, directed=directed, unweighted=unweighted)
+            self._shortest_paths[key] = res
+        return res
+
+    def shortest_path_length(self, pre, post, **kwargs):
+        ''' The length of the shortest path from `pre` to `post`, as by `shortest_paths` '''
+        return self.shortest_paths(**kwargs)[self.index[pre], self.index[post]]
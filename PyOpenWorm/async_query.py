@@ -0,0 +1,218 @@
+'''
+Reading the graph from asyncio code.
+
+Reads from the graph are synchronous, so methods like
+`~PyOpenWorm.dataObject.BaseDataObject.load_async` and
+`~PyOpenWorm.simpleProperty.RealSimpleProperty.get_async` make them in worker
+threads and return an `asyncio.Future` for the result. Independent reads can be
+awaited together with `asyncio.gather`::
+
+    >>> names, receptors = await asyncio.gather(n.name.get_async(),
+    ...                                         n.receptor.get_async())
+
+Reads with the same key which are in flight at the same time are made once and
+their result is given to every caller, so concurrent requests for the same
+object share one trip to the store. Results are shared between callers, so they
+are returned as tuples. The objects describing a read shouldn't be changed until
+its future is done.
+'''
+from __future__ import absolute_import
+from functools import partial
+import threading
+
+import rdflib as R
+
+try:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    asyncio = None
+
+__all__ = ['QueryRunner', 'query_runner', 'graph_key', 'pattern_key']
+
+
+class QueryRunner(object):
+    '''
+    Makes reads of a graph in worker threads, making each distinct read once
+    however many callers are waiting on it
+
+    Parameters
+    ----------
+    max_workers : int
+        The number of reads made at once
+    '''
+
+    def __init__(self, max_workers=1):
+        if asyncio is None:
+            raise Exception('Asynchronous reads need asyncio, which is not available')
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._in_flight = dict()
+        self._lock = threading.RLock()
+
+        self.reads = 0
+        ''' The number of reads made '''
+
+        self.shared = 0
+        ''' The number of times a caller was given a read already in flight '''
+
+    def run(self, fn, key=None, loop=None):
+        '''
+        Start a read, or join the one in flight with the same key
+
+        Parameters
+        ----------
+        fn : callable
+            Makes the read and returns its result. Called with no arguments
+        key : object
+            Identifies the read. Reads without a key are never shared
+        loop : asyncio.AbstractEventLoop
+            The event loop for the returned future. Defaults to the current
+            event loop
+
+        Returns
+        -------
+        asyncio.Future
+            The result of `fn`
+        '''
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        with self._lock:
+            future = None if key is None else self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(fn)
+                self.reads += 1
+                if key is not None:
+                    self._in_flight[key] = future
+                    future.add_done_callback(partial(self._finished, key))
+            else:
+                self.shared += 1
+        return _loop_future(future, loop)
+
+    def close(self):
+        ''' Wait for the reads in flight and stop the worker threads '''
+        self._executor.shutdown(wait=True)
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+
+def _loop_future(future, loop):
+    # Cancelling the returned future only affects its own caller: `future` may
+    # have others waiting on it
+    res = asyncio.Future(loop=loop)
+
+    def copy(f):
+        if res.cancelled():
+            return
+        exc = f.exception()
+        if exc is not None:
+            res.set_exception(exc)
+        else:
+            res.set_result(f.result())
+
+    def done(f):
+        try:
+            loop.call_soon_threadsafe(copy, f)
+        except RuntimeError:
+            # The loop was closed while the read was made
+            pass
+
+    future.add_done_callback(done)
+    return res
+
+
+_runners_lock = threading.Lock()
+
+
+def query_runner(conf):
+    '''
+    Get the `QueryRunner` for a configuration, making one if needed
+
+    The number of worker threads is set by ``rdf.async_max_workers``. It
+    defaults to 1, since not every store can be read from several threads at
+    once
+
+    Parameters
+    ----------
+    conf : PyOpenWorm.data.Data
+        The configuration
+
+    Returns
+    -------
+    QueryRunner
+    '''
+    with _runners_lock:
+        runner = conf.get('rdf.query_runner', None)
+        if runner is None:
+            runner = QueryRunner(max_workers=int(conf.get('rdf.async_max_workers', 1)))
+            conf['rdf.query_runner'] = runner
+    return runner
+
+
+def graph_key(conf, context):
+    '''
+    Identifies the graph read by objects in a context, and its current version
+
+    Parameters
+    ----------
+    conf : PyOpenWorm.data.Data
+        The configuration
+    context : PyOpenWorm.context.Context
+        The context. May be `None`
+
+    Returns
+    -------
+    tuple
+        The key or `None` if the graph has no version
+    '''
+    version = conf.get('rdf.graph.change_counter', None)
+    if version is None:
+        return None
+    if context is None:
+        return ('rdf.graph', version)
+    key = getattr(context, 'cache_key', None)
+    if key is not None:
+        return (key, version)
+    # Contexts without a cache_key read their own staged statements. The
+    # context is held by the read, so its id isn't reused while the key is
+    return (id(context), version, getattr(context, '_change_counter', None))
+
+
+def pattern_key(triples, start):
+    '''
+    Identifies a graph pattern independently of the names of its variables
+
+    Patterns which differ only in the names of their variables get the same key
+    as long as ordering their triples doesn't depend on the names. Otherwise,
+    they may get different keys, but different patterns never get the same key
+
+    Parameters
+    ----------
+    triples : iterable of tuple
+        The triples of the pattern. Variables are `rdflib.term.Variable`
+    start : rdflib.term.Identifier
+        The identifier or variable for the object the pattern is about
+
+    Returns
+    -------
+    frozenset
+    '''
+    def masked(triple):
+        return tuple('?' if isinstance(x, R.Variable) else x.n3() for x in triple)
+
+    names = {start: R.Variable('x')}
+    res = set()
+    for triple in sorted(triples, key=masked):
+        renamed = []
+        for term in triple:
+            if isinstance(term, R.Variable):
+                name = names.get(term)
+                if name is None:
+                    name = R.Variable('v' + str(len(names)))
+                    names[term] = name
+                term = name
+            renamed.append(term)
+        res.add(tuple(renamed))
+    return frozenset(res)
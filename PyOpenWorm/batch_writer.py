@@ -0,0 +1,124 @@
+'''
+Writing quads to a graph in batches.
+'''
+from __future__ import absolute_import
+import threading
+
+from six.moves import queue
+
+__all__ = ['BatchWriter']
+
+
+class BatchWriter(object):
+    '''
+    Buffers quads and writes them to a graph with ``addN`` in batches
+
+    Parameters
+    ----------
+    graph : rdflib.graph.Graph
+        The graph to write to
+    batch_size : int
+        The number of quads in each batch
+    savepoints : bool
+        If True, a ZODB ``transaction.savepoint()`` is made after each batch so
+        that the changes in the current transaction don't have to be held in
+        memory until it's committed
+    background : bool
+        If True, batches are written by a separate thread. The store must allow
+        writes from other threads, and `savepoints` can't be used since
+        transactions are per-thread
+    max_pending : int
+        The number of batches which may be waiting for the background thread.
+        Adding quads blocks while there are this many
+    '''
+
+    def __init__(self, graph, batch_size=10000, savepoints=False, background=False,
+                 max_pending=2):
+        if background and savepoints:
+            raise ValueError('Savepoints cannot be made by a background writer')
+        if batch_size < 1:
+            raise ValueError('The batch size must be at least 1')
+        self.graph = graph
+        self.batch_size = batch_size
+        self.savepoints = savepoints
+        self.batches_written = 0
+        self.quads_written = 0
+        self._buffer = []
+        self._error = None
+        self._queue = None
+        self._thread = None
+        if background:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._run, name='BatchWriter')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def add(self, quad):
+        self._buffer.append(quad)
+        if len(self._buffer) >= self.batch_size:
+            self._submit()
+
+    def addN(self, quads):
+        for q in quads:
+            self.add(q)
+
+    def flush(self):
+        ''' Write everything added so far '''
+        if self._buffer:
+            self._submit()
+        if self._queue is not None:
+            self._queue.join()
+        self._check_error()
+
+    def close(self):
+        ''' Write everything added so far and stop the background thread, if any '''
+        try:
+            self.flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def _submit(self):
+        self._check_error()
+        batch = self._buffer
+        self._buffer = []
+        if self._queue is None:
+            self._write(batch)
+        else:
+            # Blocks when the background thread is behind
+            self._queue.put(batch)
+
+    def _write(self, batch):
+        self.graph.addN(batch)
+        self.batches_written += 1
+        self.quads_written += len(batch)
+        if self.savepoints:
+            import transaction
+            transaction.savepoint(optimistic=True)
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                if self._error is None:
+                    self._write(batch)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _check_error(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,316 @@
+'''
+A compact binary serialization for the triples of a single graph.
+
+The file starts with a fixed-size header, followed by the triples as packed,
+little-endian, unsigned 32-bit integers (three per triple) which index into a
+table of terms at the end of the file::
+
+    header    magic, version, triple count, term count, term table offset,
+              content hash
+    triples   subject, predicate, object ids for each triple
+    terms     each term's kind, lexical value, and, for literals, language or
+              datatype
+
+Since each term is written once no matter how many triples it's in, reading a
+file is a matter of decoding the (comparatively small) term table and then
+looking up ids. The triples section can be read directly from a memory map.
+'''
+from __future__ import absolute_import
+from array import array
+import mmap
+import struct
+import sys
+
+from rdflib.term import URIRef, BNode, Literal
+from rdflib.plugins.serializers.nt import _nt_row
+
+from .data import triple_hash, TRIPLE_HASH_MODULUS
+
+__all__ = ['FORMAT_NAME', 'FILE_EXTENSION', 'MAGIC', 'write', 'BinaryGraphReader',
+           'is_binary_graph', 'ntriples_lines']
+
+FORMAT_NAME = 'binary'
+''' Name of the format as recorded in the graphs index '''
+
+FILE_EXTENSION = '.ntb'
+
+MAGIC = b'POWGRAPH'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sIIQQQQ')
+_TRIPLE_BYTES = 12
+_BLOCK_TRIPLES = 65536
+
+_URIREF = 0
+_BNODE = 1
+_LITERAL = 2
+_LANG_LITERAL = 3
+_TYPED_LITERAL = 4
+
+_U32 = struct.Struct('<I')
+_U8 = struct.Struct('<B')
+
+_ID_TYPE = 'I' if array('I').itemsize == 4 else 'L'
+
+
+class FormatError(Exception):
+    ''' Raised when reading a file which isn't in this format '''
+
+
+def write(triples, f):
+    '''
+    Write triples to a file
+
+    Parameters
+    ----------
+    triples : iterable of tuple
+        The triples to write. They're written in the order given, so sort them
+        for a deterministic file
+    f : file object
+        A seekable file opened for writing in binary mode
+
+    Returns
+    -------
+    int
+        The `~PyOpenWorm.data.ContextHashes` hash of the triples written
+    '''
+    start = f.tell()
+    f.write(b'\0' * _HEADER.size)
+    ids = dict()
+    terms = []
+    count = 0
+    content_hash = 0
+    block = array(_ID_TYPE)
+    for triple in triples:
+        for term in triple:
+            i = ids.get(term)
+            if i is None:
+                i = len(terms)
+                ids[term] = i
+                terms.append(term)
+            block.append(i)
+        count += 1
+        content_hash = (content_hash + triple_hash(triple)) % TRIPLE_HASH_MODULUS
+        if len(block) >= _BLOCK_TRIPLES * 3:
+            _write_ids(block, f)
+            block = array(_ID_TYPE)
+    _write_ids(block, f)
+
+    terms_offset = f.tell() - start
+    for term in terms:
+        f.write(encode_term(term))
+    end = f.tell()
+
+    f.seek(start)
+    f.write(_HEADER.pack(MAGIC, VERSION, 0, count, len(terms), terms_offset, content_hash))
+    f.seek(end)
+    return content_hash
+
+
+def _write_ids(block, f):
+    if sys.byteorder != 'little':
+        block.byteswap()
+    f.write(block.tostring() if sys.version_info < (3,) else block.tobytes())
+
+
+def encode_term(term):
+    '''
+    The bytes for a term in the term table
+    '''
+    value = _utf8(term)
+    if isinstance(term, Literal):
+        if term.language:
+            lang = term.language.encode('ascii')
+            return (_U8.pack(_LANG_LITERAL) + _U32.pack(len(value)) + value +
+                    _U8.pack(len(lang)) + lang)
+        if term.datatype:
+            dt = _utf8(term.datatype)
+            return (_U8.pack(_TYPED_LITERAL) + _U32.pack(len(value)) + value +
+                    _U32.pack(len(dt)) + dt)
+        kind = _LITERAL
+    elif isinstance(term, BNode):
+        kind = _BNODE
+    elif isinstance(term, URIRef):
+        kind = _URIREF
+    else:
+        raise ValueError('Cannot write term of type {}'.format(type(term)))
+    return _U8.pack(kind) + _U32.pack(len(value)) + value
+
+
+def decode_term(buf, pos):
+    '''
+    Read a term written by `encode_term`
+
+    Parameters
+    ----------
+    buf : bytes or mmap.mmap
+        The buffer to read from
+    pos : int
+        The offset of the term in `buf`
+
+    Returns
+    -------
+    tuple
+        The term and the offset just after it
+    '''
+    kind = _U8.unpack_from(buf, pos)[0]
+    n = _U32.unpack_from(buf, pos + 1)[0]
+    pos += 5
+    value = buf[pos:pos + n].decode('utf-8')
+    pos += n
+    if kind == _URIREF:
+        return URIRef(value), pos
+    if kind == _BNODE:
+        return BNode(value), pos
+    if kind == _LITERAL:
+        return Literal(value), pos
+    if kind == _LANG_LITERAL:
+        n = _U8.unpack_from(buf, pos)[0]
+        lang = buf[pos + 1:pos + 1 + n].decode('ascii')
+        return Literal(value, lang=lang), pos + 1 + n
+    if kind == _TYPED_LITERAL:
+        n = _U32.unpack_from(buf, pos)[0]
+        dt = buf[pos + 4:pos + 4 + n].decode('utf-8')
+        return Literal(value, datatype=URIRef(dt)), pos + 4 + n
+    raise FormatError('Unknown term kind {}'.format(kind))
+
+
+def _utf8(s):
+    return u'{}'.format(s).encode('utf-8')
+
+
+def is_binary_graph(data):
+    '''
+    Returns True if `data`, the start of a file, is in this format
+
+    Parameters
+    ----------
+    data : bytes
+        At least the first eight bytes of the file
+    '''
+    return data[:len(MAGIC)] == MAGIC
+
+
+class BinaryGraphReader(object):
+    '''
+    Reads triples from a buffer in the binary graph format
+
+    Parameters
+    ----------
+    buf : bytes or mmap.mmap
+        The contents of the file
+    '''
+
+    def __init__(self, buf):
+        self._buf = buf
+        self._file = None
+        if len(buf) < _HEADER.size:
+            raise FormatError('Too short to be a binary graph')
+        (magic, version, _, self.triple_count, self.term_count,
+         self._terms_offset, self.content_hash) = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise FormatError('Not a binary graph')
+        if version != VERSION:
+            raise FormatError('Unsupported binary graph version {}'.format(version))
+        self._terms = None
+
+    @classmethod
+    def open(cls, fname):
+        ''' Memory-map a file for reading '''
+        f = open(fname, 'rb')
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            buf = b''
+        try:
+            res = cls(buf)
+        except Exception:
+            f.close()
+            raise
+        res._file = f
+        return res
+
+    @property
+    def terms(self):
+        ''' The term table, indexed by the ids in the triples '''
+        if self._terms is None:
+            self._terms = self._read_terms()
+        return self._terms
+
+    @property
+    def has_bnodes(self):
+        return any(isinstance(t, BNode) for t in self.terms)
+
+    def _read_terms(self):
+        pos = self._terms_offset
+        res = []
+        for _ in range(self.term_count):
+            term, pos = decode_term(self._buf, pos)
+            res.append(term)
+        return res
+
+    def triples(self, bnode_factory=None):
+        '''
+        Iterate over the triples in the order they were written
+
+        Parameters
+        ----------
+        bnode_factory : callable
+            Called with the identifier of each blank node in the file to get
+            the blank node to return in its place
+        '''
+        terms = self.terms
+        if bnode_factory is not None:
+            terms = [bnode_factory(t) if isinstance(t, BNode) else t
+                     for t in terms]
+        pos = _HEADER.size
+        end = pos + self.triple_count * _TRIPLE_BYTES
+        while pos < end:
+            block_end = min(end, pos + _BLOCK_TRIPLES * _TRIPLE_BYTES)
+            ids = array(_ID_TYPE)
+            data = self._buf[pos:block_end]
+            if sys.version_info < (3,):
+                ids.fromstring(data)
+            else:
+                ids.frombytes(data)
+            if sys.byteorder != 'little':
+                ids.byteswap()
+            for i in range(0, len(ids), 3):
+                yield (terms[ids[i]], terms[ids[i + 1]], terms[ids[i + 2]])
+            pos = block_end
+
+    def __len__(self):
+        return self.triple_count
+
+    def close(self):
+        if self._file is not None:
+            if isinstance(self._buf, mmap.mmap):
+                self._buf.close()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def ntriples_lines(data):
+    '''
+    Render a binary graph as N-Triples, for instance, to show differences
+    between versions
+
+    Parameters
+    ----------
+    data : bytes
+        The contents of the file
+
+    Returns
+    -------
+    list of str
+        N-Triples lines, without line terminators, in the order the triples
+        were written
+    '''
+    return [_nt_row(t)[:-1] for t in BinaryGraphReader(data).triples()]
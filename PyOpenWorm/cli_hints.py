@@ -39,6 +39,11 @@ CLI_HINTS = {
                 'names': ['data_sources'],
             },
         },
+        'translate_all': {
+            (METHOD_NAMED_ARG, 'plan'): {
+                'names': ['plan']
+            },
+        },
         'serialize': {
             (METHOD_NAMED_ARG, 'destination'): {
                 'names': ['--destination', '-w']
@@ -47,6 +52,11 @@ CLI_HINTS = {
                 'names': ['--format', '-f']
             },
         },
+        'mmap_index': {
+            (METHOD_NAMED_ARG, 'destination'): {
+                'names': ['--destination', '-w']
+            },
+        },
         'IGNORE': ['message', 'progress_reporter']
     },
     'PyOpenWorm.command.POWContexts': {
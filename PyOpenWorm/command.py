@@ -24,6 +24,10 @@ import json
 import logging
 import errno
 from collections import namedtuple
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 from six import string_types
 
 try:
@@ -42,6 +46,12 @@ L = logging.getLogger(__name__)
 
 DEFAULT_SAVE_CALLABLE_NAME = 'pow_data'
 
+GRAPHS_FORMAT_CONF_KEY = 'graphs.format'
+''' Configuration key for the format graphs are serialized in by `POW.commit` '''
+
+GRAPHS_FORMATS = ('nt', 'binary')
+''' Accepted values for `GRAPHS_FORMAT_CONF_KEY` '''
+
 
 class POWSourceData(object):
     ''' Commands for saving and loading data for DataSources '''
@@ -497,7 +507,7 @@ class POW(object):
         self.message = lambda *args, **kwargs: print(*args, **kwargs)
         self._clock = time
         self._data_source_directories = None
-        self._changed_contexts = None
+        self._changed_contexts_db_root = None
 
     @IVar.property('.pow')
     def powdir(self):
@@ -728,25 +738,14 @@ class POW(object):
         from PyOpenWorm.data import Data
         dat = getattr(self, '_dat', None)
         if not dat or self._dat_file != self.config_file:
-            if not exists(self.config_file):
-                raise NoConfigFileError(self.config_file)
-
-            with open(self.config_file) as repo_config:
-                rc = json.load(repo_config)
-            if not exists(self.config.user_config_file):
-                uc = {}
-            else:
-                with open(self.config.user_config_file) as user_config:
-                    uc = json.load(user_config)
-
-            rc.update(uc)
-            store_conf = rc.get('rdf.store_conf', None)
-            if store_conf and isinstance(store_conf, string_types) and not isabs(store_conf):
-                rc['rdf.store_conf'] = abspath(pth_join(self.basedir, store_conf))
-            dat = Data.process_config(rc)
+            dat = Data.process_config(self._config_dict())
             dat.init_database()
 
             dat.on_context_changed(self._context_changed_handler())
+            # Keep the hashes of the contexts' contents with the store rather
+            # than recomputing them from the store in each process
+            dat['rdf.graph.context_hashes'].mapping = _LazyMapping(
+                    lambda: self._changed_contexts_root['content_hashes'])
 
             self._dat = dat
             self._dat_file = self.config_file
@@ -754,15 +753,57 @@ class POW(object):
 
     _init_store = _conf
 
+    def _config_dict(self):
+        ''' The project configuration merged with the user's '''
+        if not exists(self.config_file):
+            raise NoConfigFileError(self.config_file)
+
+        with open(self.config_file) as repo_config:
+            rc = json.load(repo_config)
+        if not exists(self.config.user_config_file):
+            uc = {}
+        else:
+            with open(self.config.user_config_file) as user_config:
+                uc = json.load(user_config)
+
+        rc.update(uc)
+        store_conf = rc.get('rdf.store_conf', None)
+        if store_conf and isinstance(store_conf, string_types) and not isabs(store_conf):
+            rc['rdf.store_conf'] = abspath(pth_join(self.basedir, store_conf))
+        return rc
+
     def _context_changed_handler(self):
         def handler(event):
             from rdflib.term import URIRef
-            self._context_changed_times[URIRef(event.context)] = self._clock()
+            ctx = URIRef(event.context)
+            self._context_changed_times[ctx] = self._clock()
+            # The context no longer matches the file it was loaded from
+            self._context_loaded_hashes.pop(ctx, None)
         return handler
 
     @property
     def _context_changed_times(self):
-        if self._changed_contexts is None:
+        return self._changed_contexts_root['ccmap']
+
+    @property
+    def _context_loaded_hashes(self):
+        '''
+        Hashes of the graph files as of when they were loaded into, or written
+        from, the database. A context has no entry if it has changed since
+        '''
+        return self._changed_contexts_root['loaded_hashes']
+
+    @property
+    def _context_file_hashes(self):
+        '''
+        `~PyOpenWorm.data.ContextHashes` hashes of the triples in each graph
+        file as of when it was loaded or written
+        '''
+        return self._changed_contexts_root['file_content_hashes']
+
+    @property
+    def _changed_contexts_root(self):
+        if self._changed_contexts_db_root is None:
             import ZODB
             from ZODB.FileStorage import FileStorage
             import BTrees
@@ -781,8 +822,14 @@ class POW(object):
             root = _cc_conn.root()
             if 'ccmap' not in root:
                 root['ccmap'] = BTrees.family32.OO.BTree()
-            self._changed_contexts = root['ccmap']
-        return self._changed_contexts
+            if 'loaded_hashes' not in root:
+                root['loaded_hashes'] = BTrees.family32.OO.BTree()
+            if 'content_hashes' not in root:
+                root['content_hashes'] = BTrees.family32.OO.BTree()
+            if 'file_content_hashes' not in root:
+                root['file_content_hashes'] = BTrees.family32.OO.BTree()
+            self._changed_contexts_db_root = root
+        return self._changed_contexts_db_root
 
     def clone(self, url=None, update_existing_config=False):
         """Clone a data store
@@ -810,55 +857,135 @@ class POW(object):
             self._ensure_no_powdir()
             raise e
 
-    def regendb(self):
+    def regendb(self, incremental=False):
+        '''
+        Regenerate the database from the serialized graphs
+
+        Parameters
+        ----------
+        incremental : bool
+            If True, only reload the contexts whose graph files have changed
+            since they were loaded into the database, and remove contexts which
+            are no longer in the graphs index. Otherwise, delete the database
+            and load all of the graphs. optional
+        '''
         from glob import glob
-        for g in glob(self.store_name + '*'):
+        store_files = glob(self.store_name + '*')
+        if incremental and store_files:
+            self._regenerate_database(only_changed=True)
+            return
+        for g in store_files:
             self.message('unlink', g)
             os.unlink(g)
         self._regenerate_database()
 
-    def _regenerate_database(self):
+    def _regenerate_database(self, only_changed=False):
         with self.progress_reporter(unit=' ctx', file=sys.stderr) as ctx_prog, \
                 self.progress_reporter(unit=' triples', file=sys.stderr, leave=False) as trip_prog:
-            self._load_all_graphs(ctx_prog, trip_prog)
+            self._load_all_graphs(ctx_prog, trip_prog, only_changed=only_changed)
 
-    def _load_all_graphs(self, progress, trip_prog):
+    def _load_all_graphs(self, progress, trip_prog, only_changed=False):
         import transaction
-        from rdflib import plugin
         from rdflib.term import URIRef
-        from rdflib.parser import Parser, create_input_source
+        from .graph_loader import GraphFileLoader
         idx_fname = pth_join(self.powdir, 'graphs', 'index')
         triples_read = 0
         if exists(idx_fname):
-            dest = self._conf()['rdf.graph']
-            with open(idx_fname) as index_file:
-                cnt = 0
-                for l in index_file:
-                    cnt += 1
-                index_file.seek(0)
-                progress.total = cnt
-                with transaction.manager:
-                    for l in index_file:
-                        fname, ctx = l.strip().split(' ')
-                        parser = plugin.get('nt', Parser)()
-                        graph_fname = pth_join(self.powdir, 'graphs', fname)
-                        with open(graph_fname, 'rb') as f, \
-                                _BatchAddGraph(dest.get_context(ctx), batchsize=4000) as g:
-                            parser.parse(create_input_source(f), g)
-
-                        progress.update(1)
-                        triples_read += g.count
-                        trip_prog.update(g.count)
-                        self._context_changed_times[URIRef(ctx)] = stat(graph_fname).st_mtime
-                    progress.write('Finalizing writes to database...')
-        progress.write('Loaded {:,} triples'.format(triples_read))
+            conf = self._conf()
+            dest = conf['rdf.graph']
+            files = [(pth_join(self.powdir, 'graphs', fname), ctx, fmt)
+                     for fname, ctx, fmt in self._graphs_index()]
+            loader = GraphFileLoader.for_store(conf.get('rdf.source', 'default'),
+                                               processes=conf.get('rdf.load.processes', None),
+                                               batch_size=conf.get('rdf.load.batch_size', None),
+                                               commit_interval=conf.get('rdf.load.commit_interval', None))
+            with transaction.manager:
+                context_hashes = conf['rdf.graph.context_hashes']
+                if only_changed:
+                    files = self._drop_changed_contexts(dest, files)
+                    progress.write('Reloading {:,} changed contexts'.format(len(files)))
+                else:
+                    self._context_loaded_hashes.clear()
+                    self._context_file_hashes.clear()
+                    context_hashes.invalidate()
+                progress.total = len(files)
+                for graph_fname, ctx, count, content_hash in loader.load(dest, files, trip_prog):
+                    progress.update(1)
+                    triples_read += count
+                    ctx = URIRef(ctx)
+                    self._context_changed_times[ctx] = stat(graph_fname).st_mtime
+                    self._context_loaded_hashes[ctx] = _file_hash(graph_fname)
+                    self._context_file_hashes[ctx] = content_hash
+                    context_hashes.set(ctx, content_hash)
+                progress.write('Finalizing writes to database...')
+            progress.write('Loaded {:,} triples ({:,.0f} triples/sec)'.format(triples_read,
+                                                                             loader.rate))
+        else:
+            progress.write('Loaded {:,} triples'.format(triples_read))
+
+    def _drop_changed_contexts(self, dest, files):
+        '''
+        Remove contexts from the database which no longer match their graph
+        files or which have no graph file
+
+        Parameters
+        ----------
+        dest : rdflib.graph.ConjunctiveGraph
+            The database graph
+        files : list of tuple
+            Graph file names, context identifiers, and file formats from the
+            index
+
+        Returns
+        -------
+        list of tuple
+            The entries from `files` which must be reloaded
+        '''
+        from rdflib.term import URIRef
+        changed_times = self._context_changed_times
+        loaded_hashes = self._context_loaded_hashes
+        changed = []
+        for fname, ctx, fmt in files:
+            ctx = URIRef(ctx)
+            loaded_hash = loaded_hashes.get(ctx)
+            if loaded_hash is not None:
+                mtime = stat(fname).st_mtime
+                if changed_times.get(ctx) == mtime:
+                    continue
+                # The file may have been touched without being changed (e.g.,
+                # by a checkout), so check its contents before reloading
+                if _file_hash(fname) == loaded_hash:
+                    changed_times[ctx] = mtime
+                    continue
+            changed.append((fname, ctx, fmt))
+
+        indexed = set(URIRef(f[1]) for f in files)
+        removed = (set(changed_times.keys()) | set(loaded_hashes.keys())) - indexed
+        context_hashes = self._conf()['rdf.graph.context_hashes']
+        for ctx in [f[1] for f in changed] + sorted(removed):
+            # Invalidated first so the hash isn't updated for each triple removed
+            context_hashes.invalidate(ctx)
+            dest.remove_context(dest.get_context(ctx))
+        for ctx in removed:
+            changed_times.pop(ctx, None)
+            loaded_hashes.pop(ctx, None)
+            self._context_file_hashes.pop(ctx, None)
+        return changed
 
     def _graphs_index(self):
+        '''
+        Yields the file name, context identifier, and format of each graph in
+        the index. Entries without a format are N-Triples
+        '''
+        from .graph_loader import NT_FORMAT
         idx_fname = pth_join(self.powdir, 'graphs', 'index')
         if exists(idx_fname):
             with open(idx_fname) as index_file:
                 for l in index_file:
-                    yield l.strip().split(' ')
+                    entry = l.strip().split(' ')
+                    if len(entry) < 3:
+                        entry.append(NT_FORMAT)
+                    yield entry
 
     @property
     def _context_fnames(self):
@@ -872,14 +999,23 @@ class POW(object):
             self._read_graphs_index()
         return self._fnc
 
+    @property
+    def _context_formats(self):
+        if not hasattr(self, '_cfmt'):
+            self._read_graphs_index()
+        return self._cfmt
+
     def _read_graphs_index(self):
         ctx_index = dict()
         fname_index = dict()
-        for fname, ctx in self._graphs_index():
+        fmt_index = dict()
+        for fname, ctx, fmt in self._graphs_index():
             ctx_index[ctx] = pth_join(self.powdir, 'graphs', fname)
             fname_index[fname] = ctx
+            fmt_index[ctx] = fmt
         self._cfn = ctx_index
         self._fnc = fname_index
+        self._cfmt = fmt_index
 
     def translate(self, translator, output_key=None, output_identifier=None,
                   data_sources=(), named_data_sources=None):
@@ -926,6 +1062,102 @@ class POW(object):
                 res.commit()
                 res.context.save_context()
 
+    def translate_all(self, plan, processes=None):
+        """
+        Do a batch of translations, running those which don't depend on each
+        other at the same time in separate processes
+
+        Each process reads the database through an index like the one written
+        by `mmap_index` and writes the results of its translation to N-Triples
+        files, which are loaded into the database together once every
+        translation is done.
+
+        Parameters
+        ----------
+        plan : str
+            A JSON file listing the translations. Each is an object with a
+            "translator" and, optionally, "data_sources",
+            "named_data_sources", "output_key", and "output_identifier", as
+            for `translate`. A data source may be the "output_identifier" of
+            another translation in the plan, in which case that translation is
+            done first
+        processes : int
+            The number of translations to run at once. Defaults to the number
+            of CPUs
+        """
+        import transaction
+        from .graph_loader import GraphFileLoader
+        from .mmap_store import write_index
+        from .translation_runner import (read_plan, job_dependencies, check_types,
+                                         run_jobs, PlanError)
+
+        with open(plan) as f:
+            try:
+                jobs = read_plan(f)
+            except PlanError as e:
+                raise GenericUserError(str(e))
+
+        translator_types = dict()
+        for job in jobs:
+            if job.translator not in translator_types:
+                translator_obj = self._lookup_translator(job.translator)
+                if translator_obj is None:
+                    raise GenericUserError('No translator for ' + job.translator)
+                translator_types[job.translator] = (translator_obj.input_type,
+                                                    translator_obj.output_type)
+        try:
+            deps = job_dependencies(jobs)
+            check_types(jobs, deps, translator_types)
+        except PlanError as e:
+            raise GenericUserError(str(e))
+        produced = set(job.output_identifier for job in jobs if job.output_identifier)
+        for job in jobs:
+            for src in tuple(job.data_sources) + tuple(job.named_data_sources.values()):
+                if src not in produced and self._lookup_source(src) is None:
+                    raise GenericUserError('No source for "' + src + '"')
+
+        conf = self._conf()
+        with self._tempdir(prefix='pow-translate-all.') as d:
+            index_fname = pth_join(d, 'worm.idx')
+            with open(index_fname, 'wb') as f:
+                write_index(conf['rdf.graph'], f)
+            args = [(abspath(self.basedir), abspath(self.powdir), abspath(self.config_file),
+                     index_fname, pth_join(d, str(i)), job)
+                    for i, job in enumerate(jobs)]
+            files = []
+            try:
+                for i, job_files in run_jobs(_translate_all_worker, args, deps, processes):
+                    self.message('Translated with {}'.format(jobs[i].translator))
+                    files += job_files
+            except PlanError as e:
+                raise GenericUserError(str(e))
+
+            loader = GraphFileLoader.for_store(conf.get('rdf.source', 'default'),
+                                               processes=conf.get('rdf.load.processes', None),
+                                               batch_size=conf.get('rdf.load.batch_size', None),
+                                               commit_interval=conf.get('rdf.load.commit_interval', None))
+            with transaction.manager:
+                for _ in loader.load(conf['rdf.graph'], files):
+                    pass
+            self.message('Loaded {:,} triples from {:,} translations'.format(
+                loader.triples_loaded, len(jobs)))
+
+    def _open_translation_overlay(self, index_fname):
+        '''
+        Use the index for reading, keeping changes in memory, rather than
+        opening the configured database
+        '''
+        from .data import Data
+        rc = self._config_dict()
+        rc['rdf.source'] = 'mmap'
+        rc['rdf.store_conf'] = index_fname
+        rc['rdf.mmap.overlay'] = True
+        dat = Data.process_config(rc)
+        dat.init_database()
+        self._dat = dat
+        self._dat_file = self.config_file
+        return dat
+
     @contextmanager
     def _tempdir(self, *args, **kwargs):
         td = pth_join(self.powdir, 'temp')
@@ -1039,6 +1271,27 @@ class POW(object):
         if retstr:
             self.message(destination.getvalue().decode(encoding='utf-8'))
 
+    def mmap_index(self, destination=None):
+        '''
+        Write an index of the whole graph for the read-only "mmap" ``rdf.source``
+
+        Parameters
+        ----------
+        destination : str
+            The file to write the index to. Defaults to "worm.idx" in the
+            project directory
+        '''
+        from .mmap_store import write_index
+        if destination is None:
+            destination = pth_join(self.powdir, 'worm.idx')
+        # Written to the side and moved into place so that readers which
+        # already have the old index mapped keep a consistent view of it
+        tmp_fname = destination + '.tmp'
+        with open(tmp_fname, 'wb') as f:
+            count = write_index(self._conf()['rdf.graph'], f)
+        rename(tmp_fname, destination)
+        self.message('Wrote {:,} quads to {}'.format(count, destination))
+
     def _package_path(self):
         """
         Get the package path
@@ -1074,22 +1327,34 @@ class POW(object):
         repo.commit(message)
 
     def _changed_contexts_set(self):
+        '''
+        Identifiers of contexts whose contents may differ from their graph files
+
+        The contents of a context are compared to its file by the hashes kept
+        in the ``rdf.graph.context_hashes`` configuration value, so no files
+        are read.
+        '''
         from rdflib.term import URIRef
+        context_hashes = self._conf()['rdf.graph.context_hashes']
+        file_hashes = self._context_file_hashes
+        indexed = set(URIRef(entry[1]) for entry in self._graphs_index())
         changed = set()
-        gf_index = {URIRef(y): x for x, y in self._graphs_index()}
-        for ctx, mtime in self._context_changed_times.items():
-            g_fname = gf_index.get(ctx)
-            g_fname = None if g_fname is None else pth_join(self.powdir, 'graphs', g_fname)
-            if not g_fname or stat(g_fname).st_mtime != mtime:
+        for ctx in indexed | set(self._context_changed_times.keys()):
+            content_hash = context_hashes.get(ctx)
+            if ctx not in indexed or content_hash is None or content_hash != file_hashes.get(ctx):
                 changed.add(ctx)
-        changed |= set(gf_index.keys()) - set(self._context_changed_times.keys())
         return changed
 
     def _serialize_graphs(self, ignore_change_cache=False):
         import transaction
-        from rdflib import plugin
-        from rdflib.serializer import Serializer
-        g = self._conf()['rdf.graph']
+        from .graph_loader import NT_FORMAT
+        conf = self._conf()
+        g = conf['rdf.graph']
+        context_hashes = conf['rdf.graph.context_hashes']
+        fmt = conf.get(GRAPHS_FORMAT_CONF_KEY, NT_FORMAT)
+        if fmt not in GRAPHS_FORMATS:
+            raise GenericUserError('Unknown graphs format "{}". Should be one of {}'.format(
+                fmt, ', '.join(sorted(GRAPHS_FORMATS))))
         repo = self.repository_provider
 
         repo.base = self.powdir
@@ -1104,46 +1369,102 @@ class POW(object):
             mkdir(graphs_base)
 
         files = []
+        removed = []
         ctx_data = []
 
         with transaction.manager:
             for context in g.contexts():
                 ident = context.identifier
 
-                if not ignore_change_cache:
-                    ctx_changed = ident in changed
-                else:
-                    ctx_changed = True
-
                 sfname = self._context_fnames.get(str(ident))
+                if sfname and self._context_formats.get(str(ident)) != fmt:
+                    # The format changed, so the file gets a new name with the
+                    # right extension
+                    unlink(sfname)
+                    removed.append(relpath(sfname, self.powdir))
+                    sfname = None
                 if not sfname:
-                    fname = self._gen_ctx_fname(ident, graphs_base)
+                    fname = self._gen_ctx_fname(ident, graphs_base, fmt)
                 else:
                     fname = sfname
 
-                if ctx_changed:
-                    serializer = plugin.get('nt', Serializer)(sorted(context))
-                    with open(fname, 'wb') as gfile:
-                        serializer.serialize(gfile)
-                self._context_changed_times[ident] = stat(fname).st_mtime
-                ctx_data.append((relpath(fname, graphs_base), ident))
+                if ignore_change_cache or not sfname or ident in changed:
+                    content_hash = self._write_graph_file(context, fname, fmt)
+                    context_hashes.set(ident, content_hash)
+                    self._context_file_hashes[ident] = content_hash
+                    self._context_loaded_hashes[ident] = _file_hash(fname)
+                    self._context_changed_times[ident] = stat(fname).st_mtime
+                if fmt == NT_FORMAT:
+                    ctx_data.append((relpath(fname, graphs_base), ident))
+                else:
+                    ctx_data.append((relpath(fname, graphs_base), ident, fmt))
                 files.append(fname)
 
         index_fname = pth_join(graphs_base, 'index')
         with open(index_fname, 'w') as index_file:
             for l in sorted(ctx_data):
                 print(*l, file=index_file)
+        # Later serializations in this process start from the new files
+        self._read_graphs_index()
 
         files.append(index_fname)
+        if removed:
+            repo.remove(removed)
         repo.add([relpath(f, self.powdir) for f in files] + [relpath(self.config_file, self.powdir),
                                                              'graphs'])
 
-    def _gen_ctx_fname(self, ident, graphs_base):
+    def _write_graph_file(self, context, fname, fmt=None):
+        '''
+        Write a context to a file as sorted N-Triples, or in the binary format of
+        `PyOpenWorm.binary_graph`
+
+        The triples are sorted with `~PyOpenWorm.utils.external_sort`, so large
+        contexts don't have to fit in memory.
+
+        Parameters
+        ----------
+        context : rdflib.graph.Graph
+            The context to write
+        fname : str
+            The file to write to
+        fmt : str
+            The format to write. One of `GRAPHS_FORMATS`. Defaults to N-Triples
+
+        Returns
+        -------
+        int
+            The `~PyOpenWorm.data.ContextHashes` hash of the triples written
+        '''
+        from rdflib import plugin
+        from rdflib.serializer import Serializer
+        from .data import triple_hash, TRIPLE_HASH_MODULUS
+        from .utils import external_sort
+        from . import binary_graph
+
+        if fmt == binary_graph.FORMAT_NAME:
+            with open(fname, 'wb') as gfile:
+                return binary_graph.write(external_sort(context), gfile)
+
+        content_hash = [0]
+
+        def hashed(triples):
+            for t in triples:
+                content_hash[0] = (content_hash[0] + triple_hash(t)) % TRIPLE_HASH_MODULUS
+                yield t
+
+        serializer = plugin.get('nt', Serializer)(hashed(external_sort(context)))
+        with open(fname, 'wb') as gfile:
+            serializer.serialize(gfile)
+        return content_hash[0]
+
+    def _gen_ctx_fname(self, ident, graphs_base, fmt=None):
+        from . import binary_graph
+        ext = binary_graph.FILE_EXTENSION if fmt == binary_graph.FORMAT_NAME else '.nt'
         hs = hashlib.sha256(ident.encode()).hexdigest()
-        fname = pth_join(graphs_base, hs + '.nt')
+        fname = pth_join(graphs_base, hs + ext)
         i = 1
         while exists(fname):
-            fname = pth_join(graphs_base, hs + '-' + str(i) + '.nt')
+            fname = pth_join(graphs_base, hs + '-' + str(i) + ext)
             i += 1
         return fname
 
@@ -1170,7 +1491,7 @@ class POW(object):
 
         for d in di:
             try:
-                adata = d.a_blob.data_stream.read().split(b'\n')
+                adata = _diff_lines(d.a_blob.data_stream.read())
             except Exception as e:
                 print(e, file=sys.stderr)
                 adata = []
@@ -1178,10 +1499,10 @@ class POW(object):
             try:
                 b_blob = d.b_blob
                 if b_blob:
-                    bdata = b_blob.data_stream.read().split(b'\n')
+                    bdata = _diff_lines(b_blob.data_stream.read())
                 else:
                     with open(join(r.repo().working_dir, d.b_path), 'rb') as f:
-                        bdata = f.read().split(b'\n')
+                        bdata = _diff_lines(f.read())
             except Exception as e:
                 print(e, file=sys.stderr)
                 bdata = []
@@ -1256,32 +1577,108 @@ class _POWSaveContext(Context):
         return self._backer.save_imports(*args, **kwargs)
 
 
-class _BatchAddGraph(object):
-    ''' Wrapper around graph that turns calls to 'add' into calls to 'addN' '''
-    def __init__(self, graph, batchsize=1000, *args, **kwargs):
-        self.graph = graph
-        self.g = (graph,)
-        self.batchsize = batchsize
-        self.reset()
-
-    def reset(self):
-        self.batch = []
-        self.count = 0
-
-    def add(self, triple):
-        if self.count > 0 and self.count % self.batchsize == 0:
-            self.graph.addN(self.batch)
-            self.batch = []
-        self.count += 1
-        self.batch.append(triple + self.g)
-
-    def __enter__(self):
-        self.reset()
-        return self
-
-    def __exit__(self, *exc):
-        if exc[0] is None:
-            self.graph.addN(self.batch)
+class _LazyMapping(MutableMapping):
+    ''' A mapping which gets the mapping it wraps when it's first used '''
+    def __init__(self, getter):
+        self._getter = getter
+        self._mapping = None
+
+    @property
+    def mapping(self):
+        if self._mapping is None:
+            self._mapping = self._getter()
+        return self._mapping
+
+    def __getitem__(self, key):
+        return self.mapping[key]
+
+    def __setitem__(self, key, value):
+        self.mapping[key] = value
+
+    def __delitem__(self, key):
+        del self.mapping[key]
+
+    def __iter__(self):
+        return iter(self.mapping)
+
+    def __len__(self):
+        return len(self.mapping)
+
+    def clear(self):
+        self.mapping.clear()
+
+
+def _diff_lines(data):
+    ''' Lines of a graph file to compare. Binary graphs are rendered as N-Triples '''
+    from .binary_graph import is_binary_graph, ntriples_lines
+    if is_binary_graph(data):
+        return [l.encode('utf-8') for l in ntriples_lines(data)]
+    return data.split(b'\n')
+
+
+def _file_hash(fname):
+    h = hashlib.sha256()
+    with open(fname, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _translate_all_worker(task, dependency_files):
+    '''
+    Do one translation for `POW.translate_all`, reading the database through
+    an index, and write the triples it adds to N-Triples files
+
+    Returns
+    -------
+    list of tuple
+        The file name and context identifier of each file written
+    '''
+    from rdflib.store import TripleAddedEvent
+    from .graph_loader import GraphFileLoader
+    basedir, powdir, config_file, index_fname, outdir, job = task
+    cmd = POW()
+    cmd.basedir = basedir
+    cmd.powdir = powdir
+    cmd.config_file = config_file
+    cmd.message = lambda *args, **kwargs: None
+    graph = cmd._open_translation_overlay(index_fname)['rdf.graph']
+
+    # The outputs of earlier translations are only loaded for reading, so
+    # they're added before recording what the translation adds
+    for files in dependency_files:
+        for _ in GraphFileLoader(processes=1).load(graph, files):
+            pass
+
+    added = dict()
+
+    def record(event):
+        # Events come before the triple is added, so triples which were
+        # already in the database can be left out
+        ctx = getattr(event.context, 'identifier', event.context)
+        for _ in graph.store.triples(event.triple, ctx):
+            return
+        added.setdefault(ctx, set()).add(tuple(event.triple))
+    graph.store.dispatcher.subscribe(TripleAddedEvent, record)
+
+    cmd.translate(job.translator,
+                  output_key=job.output_key,
+                  output_identifier=job.output_identifier,
+                  data_sources=job.data_sources,
+                  named_data_sources=sorted(job.named_data_sources.items()))
+
+    makedirs(outdir, exist_ok=True)
+    res = []
+    for n, ctx in enumerate(sorted(added)):
+        context = graph.get_context(ctx)
+        # Triples may have been removed again after they were added
+        triples = [t for t in added[ctx] if t in context]
+        if not triples:
+            continue
+        fname = pth_join(outdir, '{}.nt'.format(n))
+        cmd._write_graph_file(triples, fname)
+        res.append((fname, ctx))
+    return res
 
 
 def write_config(ob, f):
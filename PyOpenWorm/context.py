@@ -1,4 +1,5 @@
 from __future__ import print_function
+from contextlib import contextmanager
 from types import ModuleType
 import rdflib
 from rdflib.term import Variable, URIRef
@@ -7,7 +8,9 @@ import wrapt
 from .data import DataUser
 
 from .import_contextualizer import ImportContextualizer
-from .context_store import ContextStore, RDFContextStore
+from .context_store import ContextStore, RDFContextStore, StagedTriples
+from .statement import StatementList
+from .batch_writer import BatchWriter
 from .contextualize import (BaseContextualizable,
                             Contextualizable,
                             ContextualizableClass,
@@ -94,11 +97,13 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
         else:
             raise Exception(self)
 
-        self._statements = []
+        self._statements = StatementList()
+        self._triples = []
         self._set_buffer_size = 10000
         self._imported_contexts = list(imported)
         self._rdf_object = None
         self._graph = None
+        self._staged_triples = StagedTriples()
         # XXX: Is this a hack? Sure feels like one...
         if mapper is None:
             from PyOpenWorm import CONTEXT
@@ -108,12 +113,20 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
 
         self._change_counter = 0
         self._triples_saved = 0
+        self._triples_written_behind = 0
+        self._writer = None
+        # The number of statements kept by the last write behind because they
+        # weren't defined. They don't count toward the next one
+        self._kept_behind = 0
 
     def contents(self):
         return (x for x in self._statements)
 
     def clear(self):
-        del self._statements[:]
+        self._statements.clear()
+        self._triples = []
+        self._staged_triples = StagedTriples()
+        self._kept_behind = 0
 
     def add_import(self, context):
         self._imported_contexts.append(context)
@@ -121,13 +134,37 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
     def add_statement(self, stmt):
         if self.identifier != stmt.context.identifier:
             raise ValueError("Cannot add statements from a different context")
-        self._graph = None
         self._statements.append(stmt)
+        self._staged_triples.add_statement(stmt)
+        self._change_counter += 1
+        if self._writer is not None and len(self._statements) - self._kept_behind >= self._set_buffer_size:
+            self._write_behind_statements()
+
+    def add_triples(self, triples):
+        '''
+        Add triples to the context directly, rather than as statements about
+        objects
+
+        Nothing is checked about the triples, so this is only meant for adding
+        large numbers of triples of a known shape without the cost of making
+        an object and statements for each. The triples can't be removed with
+        `remove_statement`
+
+        Parameters
+        ----------
+        triples : iterable of tuple
+            The triples to add. None of the terms may be variables
+        '''
+        triples = list(triples)
+        self._triples.extend(triples)
+        self._staged_triples.add_triples(triples)
         self._change_counter += 1
+        if self._writer is not None and len(self) - self._kept_behind >= self._set_buffer_size:
+            self._write_behind_statements()
 
     def remove_statement(self, stmt):
-        self._graph = None
         self._statements.remove(stmt)
+        self._staged_triples.remove_statement(stmt)
         self._change_counter += 1
 
     def add_object(self, o):
@@ -172,8 +209,15 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
 
         saved_contexts.add((self._change_counter, id(self)))
 
+        upload = None
         if graph is None:
-            graph = self._retrieve_configured_graph()
+            graph_store = self.conf.get('rdf.graph_store', None)
+            if graph_store is not None:
+                # Each context goes to its own graph at the remote store, so
+                # they're collected and uploaded in parallel at the end
+                graph = upload = _GraphUploads(graph_store)
+            else:
+                graph = self._retrieve_configured_graph()
 
         if autocommit and hasattr(graph, 'commit'):
             graph.commit()
@@ -189,15 +233,23 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
 
         if isinstance(graph, set):
             graph.update(self._save_context_triples())
+        elif isinstance(graph, _GraphUploads):
+            graph.add(self.identifier, self._save_context_triples())
         else:
             ctx_graph = self.get_target_graph(graph)
-            ctx_graph.addN((s, p, o, ctx_graph)
-                           for s, p, o
-                           in self._save_context_triples())
+            with BatchWriter(ctx_graph,
+                             batch_size=self._set_buffer_size,
+                             savepoints=self._use_savepoints()) as writer:
+                writer.addN((s, p, o, ctx_graph)
+                            for s, p, o
+                            in self._save_context_triples())
 
         if autocommit and hasattr(graph, 'commit'):
             graph.commit()
 
+        if upload is not None:
+            upload.send(self.conf)
+
     @property
     def triples_saved(self):
         return self._triples_saved_helper()
@@ -214,7 +266,7 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
         return res
 
     def _save_context_triples(self):
-        self._triples_saved = 0
+        self._triples_saved = self._triples_written_behind
         for x in self._statements:
             t = x.to_triple()
             if not (isinstance(t[0], Variable) or
@@ -222,6 +274,70 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
                     isinstance(t[1], Variable)):
                 self._triples_saved += 1
                 yield t
+        for t in self._triples:
+            self._triples_saved += 1
+            yield t
+
+    @contextmanager
+    def write_behind(self, graph=None, background=False):
+        '''
+        Write statements to the store as they're added rather than holding
+        them until `save_context`
+
+        Within the ``with`` block, whenever the context holds
+        ``_set_buffer_size`` statements, they are written to `graph` and removed
+        from the context, so the memory used for a large number of statements
+        is bounded. Statements with undefined objects are kept until they're
+        defined, and the next write waits for another ``_set_buffer_size``
+        statements besides them. The remaining statements are written at the
+        end of the block.
+
+        Parameters
+        ----------
+        graph : rdflib.graph.ConjunctiveGraph
+            The graph to write to. Defaults to the configured graph
+        background : bool
+            If True, writes are done by a background thread. See
+            `~PyOpenWorm.batch_writer.BatchWriter`
+        '''
+        if self._writer is not None:
+            raise Exception('Already writing behind statements for {}'.format(self))
+        if graph is None:
+            graph = self._retrieve_configured_graph()
+        writer = BatchWriter(self.get_target_graph(graph),
+                             batch_size=self._set_buffer_size,
+                             savepoints=not background and self._use_savepoints(),
+                             background=background)
+        self._writer = writer
+        try:
+            yield writer
+            self._write_behind_statements()
+        finally:
+            self._writer = None
+            writer.close()
+
+    def _write_behind_statements(self):
+        target = self._writer.graph
+        for stmt in self._statements:
+            t = stmt.to_triple()
+            if not (isinstance(t[0], Variable) or
+                    isinstance(t[1], Variable) or
+                    isinstance(t[2], Variable)):
+                self._writer.add(t + (target,))
+                self._statements.remove(stmt)
+                self._staged_triples.remove_statement(stmt)
+                self._triples_written_behind += 1
+        if self._triples:
+            triples = self._triples
+            self._triples = []
+            self._writer.addN(t + (target,) for t in triples)
+            self._staged_triples.remove_triples(triples)
+            self._triples_written_behind += len(triples)
+        self._kept_behind = len(self._statements)
+
+    def _use_savepoints(self):
+        # Only ZODB's memory use benefits from savepoints
+        return self.conf.get('rdf.source', None) == 'ZODB'
 
     def get_target_graph(self, graph):
         res = graph
@@ -235,6 +351,8 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
     def contents_triples(self):
         for x in self._statements:
             yield x.to_triple()
+        for t in self._triples:
+            yield t
 
     def contextualize(self, context):
         return ContextualizingProxy(context, self)
@@ -252,7 +370,7 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
     __nonzero__ = __bool__
 
     def __len__(self):
-        return len(self._statements)
+        return len(self._statements) + len(self._triples)
 
     def __call__(self, o=None, *args, **kwargs):
         """
@@ -320,7 +438,8 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
     def stored(self):
         return QueryContext(graph=self.load_graph_from_configured_store(),
                             ident=self.identifier,
-                            conf=self.conf)
+                            conf=self.conf,
+                            cache_key=('stored', self.identifier))
 
     def _retrieve_configured_graph(self):
         try:
@@ -350,10 +469,31 @@ class Context(six.with_metaclass(ContextMeta, ImportContextualizer, Contextualiz
         return c
 
 
+class _GraphUploads(object):
+    """ Contexts to upload to a graph store, collected by `Context.save_context` """
+
+    def __init__(self, graph_store):
+        self.graph_store = graph_store
+        self.graphs = []
+
+    def add(self, ident, triples):
+        self.graphs.append((ident, triples))
+
+    def send(self, conf):
+        self.graph_store.post_graphs(self.graphs)
+        # The uploads didn't go through rdf.graph
+        conf.contexts_changed([ident for ident, _ in self.graphs])
+
+
 class QueryContext(Context):
     def __init__(self, graph, *args, **kwargs):
+        cache_key = kwargs.pop('cache_key', None)
         super(QueryContext, self).__init__(*args, **kwargs)
         self.__graph = graph
+        self.cache_key = cache_key
+        """ Identifies the graph for shared caches. Graphs of QueryContexts
+        with the same `cache_key` and configuration must have the same content.
+        If `None`, results from the graph are not shared """
 
     def rdf_graph(self):
         return self.__graph
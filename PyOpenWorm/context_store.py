@@ -1,7 +1,7 @@
 from itertools import chain
 from rdflib.store import Store, VALID_STORE, NO_STORE
 from rdflib.plugins.memory import IOMemory
-from rdflib.term import Variable
+from rdflib.term import Variable, URIRef
 from yarom.rdfUtils import transitive_lookup
 
 from .context_common import CONTEXT_IMPORTS
@@ -11,6 +11,130 @@ class ContextStoreException(Exception):
     pass
 
 
+_STAGED_CONTEXT = URIRef('urn:pyopenworm:staged')
+''' The context staged triples are stored under, whatever their context's identifier '''
+
+
+class StagedTriples(object):
+    """
+    The triples staged in a single context, kept up to date as statements are
+    added to and removed from the context
+    """
+
+    def __init__(self, triples=()):
+        """
+        Parameters
+        ----------
+            triples : iterable of tuple
+                the triples already in the context
+
+        """
+        self._store = None
+        # Several statements can make the same triple, so we count them to
+        # know when the last one is removed
+        self._counts = dict()
+        # Statements not yet added to the store, including those with undefined
+        # objects, which may become defined later
+        self._pending = []
+        # Triples added in bulk, also only added to the store when queried
+        self._pending_triples = []
+        for t in triples:
+            self.add(t)
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = IOMemory()
+        return self._store
+
+    def add(self, triple):
+        if _has_variable(triple):
+            return
+        n = self._counts.get(triple, 0)
+        self._counts[triple] = n + 1
+        if n == 0:
+            self.store.add(triple, _STAGED_CONTEXT)
+
+    def remove(self, triple):
+        n = self._counts.get(triple, 0)
+        if n > 1:
+            self._counts[triple] = n - 1
+        elif n == 1:
+            del self._counts[triple]
+            self.store.remove(triple, _STAGED_CONTEXT)
+
+    def add_statement(self, stmt):
+        # Triples are only made from statements when they're queried, so adding
+        # a statement is cheap
+        self._pending.append(stmt)
+
+    def add_triples(self, triples):
+        self._pending_triples.extend(triples)
+
+    def remove_triples(self, triples):
+        self._resolve()
+        for t in triples:
+            self.remove(t)
+
+    def remove_statement(self, stmt):
+        self._resolve()
+        triple = stmt.to_triple()
+        if _has_variable(triple):
+            try:
+                self._pending.remove(stmt)
+            except ValueError:
+                pass
+        else:
+            self.remove(triple)
+
+    def _resolve(self):
+        if self._pending_triples:
+            pending_triples = self._pending_triples
+            self._pending_triples = []
+            for t in pending_triples:
+                self.add(t)
+        if self._pending:
+            pending = []
+            for stmt in self._pending:
+                triple = stmt.to_triple()
+                if _has_variable(triple):
+                    pending.append(stmt)
+                else:
+                    self.add(triple)
+            self._pending = pending
+
+    def triples(self, triple_pattern):
+        self._resolve()
+        if self._store is None:
+            return iter(())
+        return (t for t, _ in self._store.triples(triple_pattern, _STAGED_CONTEXT))
+
+    def __contains__(self, triple):
+        self._resolve()
+        return triple in self._counts
+
+    def __len__(self):
+        self._resolve()
+        return len(self._counts)
+
+
+def staged_triples(ctx):
+    """
+    Returns the `StagedTriples` for a context. Contexts which don't keep their
+    own get a snapshot of their current contents
+    """
+    res = getattr(ctx, '_staged_triples', None)
+    if not isinstance(res, StagedTriples):
+        res = StagedTriples(ctx.contents_triples())
+    return res
+
+
+def _has_variable(triple):
+    return (isinstance(triple[0], Variable) or
+            isinstance(triple[1], Variable) or
+            isinstance(triple[2], Variable))
+
+
 class ContextStore(Store):
     context_aware = True
 
@@ -23,9 +147,8 @@ class ContextStore(Store):
 
         """
         super(ContextStore, self).__init__(**kwargs)
-        self._memory_store = None
+        self.ctx = None
         self._include_stored = include_stored
-        print("context =", context)
         if context is not None:
             self._init_store(context)
 
@@ -42,30 +165,31 @@ class ContextStore(Store):
             self._store_store = RDFContextStore(ctx)
         else:
             self._store_store = None
+        self._layers()
 
-        if self._memory_store is None:
-            self._memory_store = IOMemory()
-            self._init_store0(ctx)
-
-    def _init_store0(self, ctx, seen=None):
+    def _layers(self, ctx=None, seen=None):
+        """
+        The staged triples of the context and of the contexts it transitively
+        imports. These are looked up on each query rather than copied so that
+        changes to any of the contexts are seen right away
+        """
+        if ctx is None:
+            if self.ctx is None:
+                raise ContextStoreException("Database has not been opened")
+            ctx = self.ctx
         if seen is None:
             seen = set()
         ctxid = ctx.identifier
         if ctxid in seen:
-            return
+            return []
         seen.add(ctxid)
-        self._memory_store.addN((s, p, o, ctxid)
-                                for s, p, o
-                                in ctx.contents_triples()
-                                if not (isinstance(s, Variable) or
-                                        isinstance(p, Variable) or
-                                        isinstance(o, Variable)))
+        res = [(ctxid, staged_triples(ctx))]
         for cctx in ctx.imports:
-            self._init_store0(cctx, seen)
+            res += self._layers(cctx, seen)
+        return res
 
     def close(self, commit_pending_transaction=False):
         self.ctx = None
-        self._memory_store = None
 
     # RDF APIs
     def add(self, triple, context, quoted=False):
@@ -78,16 +202,26 @@ class ContextStore(Store):
         raise NotImplementedError("This is a query-only store")
 
     def triples(self, triple_pattern, context=None):
-        if self._memory_store is None:
-            raise ContextStoreException("Database has not been opened")
+        layers = self._layers()
         context = getattr(context, 'identifier', context)
         context_triples = []
         if self._store_store is not None:
             context_triples.append(self._store_store.triples(triple_pattern,
                                                              context))
-        return chain(self._memory_store.triples(triple_pattern, context),
+        if context is not None:
+            layers = [l for l in layers if l[0] == context]
+        return chain(self._staged_triples(layers, triple_pattern),
                      *context_triples)
 
+    def _staged_triples(self, layers, triple_pattern):
+        for i, (_, staged) in enumerate(layers):
+            for t in staged.triples(triple_pattern):
+                # A triple in more than one context is returned once, with all
+                # of its contexts, by the first layer it's in
+                if any(t in l for _, l in layers[:i]):
+                    continue
+                yield t, (ctxid for ctxid, l in layers[i:] if t in l)
+
     def __len__(self, context=None):
         """
         Number of statements in the store. This should only account for non-
@@ -98,10 +232,11 @@ class ContextStore(Store):
         :param context: a graph instance to query or None
 
         """
-        if self._memory_store is None:
-            raise ContextStoreException("Database has not been opened")
+        layers = self._layers()
         if self._store_store is None:
-            return len(self._memory_store)
+            if len(layers) == 1:
+                return len(layers[0][1])
+            return sum(1 for _ in self._staged_triples(layers, (None, None, None)))
         else:
             # We don't know which triples may overlap, so we can't return an accurate count without doing something
             # expensive, so we just give up
@@ -116,16 +251,18 @@ class ContextStore(Store):
 
         :returns: a generator over Nodes
         """
-        print('shoi')
-        if self._memory_store is None:
-            raise ContextStoreException("Database has not been opened")
+        layers = self._layers()
         seen = set()
         rest = ()
 
         if self._store_store is not None:
             rest = self._store_store.contexts(triple)
 
-        for ctx in chain(self._memory_store.contexts(triple), rest):
+        staged = (ctxid for ctxid, l in layers
+                  if (len(l) > 0 if triple is None else
+                      any(True for _ in l.triples(triple))))
+
+        for ctx in chain(staged, rest):
             if ctx in seen:
                 continue
             seen.add(ctx)
@@ -144,6 +281,11 @@ class RDFContextStore(Store):
         self.__context = context
         self.__context_transitive_imports = None
 
+    @property
+    def base_graph(self):
+        """ The graph which the imported triples are read from """
+        return self.__graph
+
     def __init_contexts(self):
         if self.__store is not None and self.__context_transitive_imports is None:
             imports = transitive_lookup(self.__store, self.__context.identifier, CONTEXT_IMPORTS, self.__imports_graph)
@@ -5,11 +5,11 @@ from weakref import WeakValueDictionary
 
 class BaseContextualizable(object):
 
-    def __init__(self, *args, **kwargs):
-        super(BaseContextualizable, self).__init__(*args, **kwargs)
-
-        if not hasattr(self, '_contexts'):
-            self._contexts = WeakValueDictionary()
+    _contexts = None
+    """
+    Maps contexts to contextualizations of this object. Made on the first
+    contextualization since most objects are never contextualized
+    """
 
     @property
     def context(self):
@@ -27,11 +27,13 @@ class BaseContextualizable(object):
         property and return a copy of themselves with that property set to the
         provided ``context`` argument.
         """
-        ctxd = self._contexts.get(context)
-        if ctxd is not None:
-            return ctxd
+        contexts = self._contexts
+        if contexts is not None:
+            ctxd = contexts.get(context)
+            if ctxd is not None:
+                return ctxd
         ctxd = self.contextualize_augment(context)
-        self._contexts[context] = ctxd
+        self.add_contextualization(context, ctxd)
         return ctxd
 
     def decontextualize(self):
@@ -41,11 +43,11 @@ class BaseContextualizable(object):
         return self
 
     def add_contextualization(self, context, contextualization):
-        try:
-            self._contexts[context] = contextualization
-        except AttributeError:
-            self._contexts = WeakValueDictionary()
-            self._contexts[context] = contextualization
+        contexts = self._contexts
+        if contexts is None:
+            contexts = WeakValueDictionary()
+            self._contexts = contexts
+        contexts[context] = contextualization
 
     def contextualize_augment(self, context):
         return self
@@ -81,8 +83,6 @@ class Contextualizable(BaseContextualizable):
         # XXX: This shouldn't really ever be the property...
         if not isinstance(cls.context, property):
             ores.context = cls.context
-            ores._contexts = WeakValueDictionary()
-            ores.add_contextualization(cls.context, ores)
             res = ores
         else:
             ores.context = None
@@ -249,6 +249,14 @@ class ContextualizableClass(type):
                 name = 'contextualize_class'
         return super(ContextualizableClass, self).__getattribute__(name)
 
+    def __setattr__(self, name, value):
+        super(ContextualizableClass, self).__setattr__(name, value)
+        _class_changed(self)
+
+    def __delattr__(self, name):
+        super(ContextualizableClass, self).__delattr__(name)
+        _class_changed(self)
+
     def contextualize_class(self, context):
         ctxd = self.__contexts.get(context)
         if ctxd is not None:
@@ -318,28 +326,79 @@ def contextualize_helper(context, obj, noneok=False):
     if ctx is not None and ctx is context:
         return obj
 
+    newtyp = contextualizing_proxy_type(obj.__class__)
+    res = newtyp(context, obj)
+    obj.add_contextualization(context, res)
+    return res
+
+
+_PROXY_TYPE_ATTR = '_contextualizing_proxy_type'
+
+_VERSION_ATTR = '_contextualizable_class_version'
+
+_NOT_COPIED = frozenset(['__wrapped__', '__name__', '__doc__', '__module__', '__weakref__',
+                         '__dict__', '__init__', _PROXY_TYPE_ATTR, _VERSION_ATTR])
+
+
+def _class_changed(cls):
+    # Counts changes to the class's own attributes. Set with type's __setattr__
+    # so that it isn't counted itself
+    type.__setattr__(cls, _VERSION_ATTR, vars(cls).get(_VERSION_ATTR, 0) + 1)
+
+
+def contextualizing_proxy_type(oclass):
+    """
+    Returns the ContextualizingProxy sub-class for proxies of `oclass` objects
+
+    The type is made once for each class and stored on the class. It's made
+    again if attributes of the class have been added, removed, or replaced
+    since. A `ContextualizableClass` counts changes to its attributes, so
+    that's an integer comparison. The attributes of other classes are compared
+    with a snapshot of them instead.
+    """
+    class_vars = vars(oclass)
+    cached = class_vars.get(_PROXY_TYPE_ATTR)
+    if isinstance(oclass, ContextualizableClass):
+        version = class_vars.get(_VERSION_ATTR, 0)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    else:
+        version = None
+        # Values are compared by identity first, so this is cheap when nothing
+        # has changed
+        if cached is not None and cached[0] == class_vars:
+            return cached[1]
+
     # Copy our special properties into the class so that they
     # always take precedence over attributes of the same name added
     # during construction of a derived class. This is to save
     # duplicating the implementation for them in all derived classes.
 
     pclass_dct = dict()
-    for k, v in vars(obj.__class__).items():
-        if k not in ('__wrapped__', '__name__', '__doc__',
-                     '__module__', '__weakref__', '__dict__',
-                     '__init__'):
+    for k, v in class_vars.items():
+        if k not in _NOT_COPIED:
             if hasattr(v, '__get__'):
                 pclass_dct[k] = v
             else:
-                pclass_dct[k] = proxy_to_X(obj.__class__, k)
+                pclass_dct[k] = proxy_to_X(oclass, k)
 
-    newtyp = _ContextualzingProxyMetaType('CtxProxyClass_' + obj.__class__.__name__,
+    newtyp = _ContextualzingProxyMetaType('CtxProxyClass_' + oclass.__name__,
                                           (ContextualizingProxy,),
                                           pclass_dct,
-                                          type(obj.__class__))
-    res = newtyp(context, obj)
-    obj._contexts[context] = res
-    return res
+                                          type(oclass))
+    try:
+        # Set with type's __setattr__ since metaclasses may do more on setting
+        # class attributes, including counting the change. A snapshot of the
+        # class's attributes is taken after, so it includes the entry itself
+        entry = [version, newtyp]
+        type.__setattr__(oclass, _PROXY_TYPE_ATTR, entry)
+        if version is None:
+            entry[0] = dict(class_vars)
+    except TypeError:
+        # Built-in and extension types can't be changed, so their proxy types
+        # aren't kept
+        pass
+    return newtyp
 
 
 class proxy_to_X(object):
@@ -1,8 +1,9 @@
 from __future__ import print_function
 import sqlite3
 import hashlib
+import itertools
 from rdflib import URIRef, Literal, Graph, Namespace, ConjunctiveGraph
-from rdflib.store import TripleAddedEvent, TripleRemovedEvent
+from rdflib.store import TripleAddedEvent, TripleRemovedEvent, VALID_STORE
 from rdflib.events import Event
 from rdflib.namespace import RDFS, RDF, NamespaceManager
 from datetime import datetime as DT
@@ -10,7 +11,9 @@ import datetime
 import transaction
 import os
 import logging
-from .utils import grouper
+from contextlib import contextmanager
+import six
+from .utils import grouper, chunks
 from .configure import Configureable, Configure, ConfigValue
 
 __all__ = [
@@ -105,46 +108,79 @@ class DataUser(Configureable):
         return self.conf.get('rdf.namespace_manager', None)
 
     def _remove_from_store(self, g):
-        # Note the assymetry with _add_to_store. You must add actual elements, but deletes
-        # can be performed as a query
-        for group in grouper(g, 1000):
-            temp_graph = Graph()
-            for x in group:
-                if x is not None:
-                    temp_graph.add(x)
-                else:
-                    break
-            s = " DELETE DATA {" + temp_graph.serialize(format="nt") + " } "
-            L.debug("deleting. s = " + s)
-            self.conf['rdf.graph'].update(s)
+        if self.conf['rdf.store'] == 'SPARQLUpdateStore':
+            for group in grouper(g, 1000):
+                temp_graph = Graph()
+                for x in group:
+                    if x is not None:
+                        temp_graph.add(x)
+                    else:
+                        break
+                s = " DELETE DATA {" + temp_graph.serialize(format="nt") + " } "
+                L.debug("deleting. s = " + s)
+                self.conf['rdf.graph'].update(s)
+        else:
+            # Removed straight from the store, which finds each triple in
+            # its indexes
+            gr = self.conf['rdf.graph']
+            with self._store_transaction():
+                for x in g:
+                    gr.remove(x)
+
+    @contextmanager
+    def _store_transaction(self):
+        # Changes to a ZODB store are made in a transaction of their own
+        zodb = self.conf['rdf.source'] == 'ZODB'
+        if zodb:
+            transaction.commit()
+            transaction.begin()
+        yield
+        if zodb:
+            transaction.commit()
+            transaction.begin()
 
     def _add_to_store(self, g, graph_name=False):
         if self.conf['rdf.store'] == 'SPARQLUpdateStore':
-            # XXX With Sesame, for instance, it is probably faster to do a PUT over
-            # the endpoint's rest interface. Just need to do it for some common
-            # endpoints
-
-            try:
-                gs = g.serialize(format="nt")
-            except Exception:
-                gs = _triples_to_bgp(g)
-
-            if graph_name:
-                s = " INSERT DATA { GRAPH " + graph_name.n3() + " {" + gs + " } } "
-            else:
-                s = " INSERT DATA { " + gs + " } "
+            graph_store = self.conf.get('rdf.graph_store', None)
+            if graph_store is not None:
+                # Uploaded as N-Triples documents, which the store doesn't
+                # have to parse as SPARQL
+                graph_store.post(g, graph_name or None)
+                self.conf.contexts_changed([graph_name or None])
+                return
+
+            from .graph_store import upload_blocks
+            request_size = int(self.conf.get('rdf.remote_request_size', 10000))
+            # Blank nodes are scoped to an update, so those in different
+            # updates would be different nodes
+            for block in upload_blocks(g, request_size):
+                gs = _triples_to_bgp(block)
+                if graph_name:
+                    s = " INSERT DATA { GRAPH " + graph_name.n3() + " {" + gs + " } } "
+                else:
+                    s = " INSERT DATA { " + gs + " } "
                 L.debug("update query = " + s)
                 self.conf['rdf.graph'].update(s)
+            # Updates don't go through rdf.graph's add methods
+            self.conf.contexts_changed([graph_name or None])
         else:
+            # Triples are added with addN in blocks so that the store can add
+            # each block at once. On ZODB, each block goes into a savepoint, so
+            # it can be moved out of memory, and the transaction is committed
+            # once at the end
             gr = self.conf['rdf.graph']
-            if self.conf['rdf.source'] == 'ZODB':
-                transaction.commit()
-                transaction.begin()
-            for x in g:
-                gr.add(x)
-            if self.conf['rdf.source'] == 'ZODB':
+            if graph_name and getattr(gr, 'context_aware', False):
+                ctx = gr.get_context(graph_name)
+            else:
+                ctx = getattr(gr, 'default_context', gr)
+            block_size = int(self.conf.get('rdf.upload_block_statement_count', 50))
+            zodb = self.conf['rdf.source'] == 'ZODB'
+            for block in chunks(g, block_size):
+                gr.addN((s, p, o, ctx) for s, p, o in block)
+                if zodb:
+                    transaction.savepoint(optimistic=True)
+            if zodb:
                 transaction.commit()
-                transaction.begin()
 
         # infer from the added statements
         # self.infer()
@@ -190,9 +226,37 @@ class DataUser(Configureable):
         """
         Remove a set of statements from the database.
 
-        :param graph: An iterable of triples
+        Variables in the triples are matched against the database and the
+        triples they match are removed, like with a SPARQL ``DELETE WHERE``.
+        Each group of triples joined by shared variables is matched on its
+        own, so the triples for several objects can be retracted at once.
+
+        :param graph: An iterable of triples, or a basic graph pattern as a
+            string
         """
-        self._remove_from_store_by_query(graph)
+        if isinstance(graph, six.string_types):
+            self._remove_from_store_by_query(graph)
+        elif self.conf['rdf.store'] == 'SPARQLUpdateStore':
+            self._remove_from_store_by_query(_triples_to_bgp(graph))
+        else:
+            from .rdf_query_util import bgp_matches
+            self._remove_from_store(bgp_matches(self.conf['rdf.graph'], graph))
+
+    def retract_contexts(self, contexts):
+        """
+        Remove all of the statements in some contexts from the database.
+
+        :param contexts: An iterable of contexts or their identifiers
+        """
+        idents = [getattr(c, 'identifier', c) for c in contexts]
+        gr = self.conf['rdf.graph']
+        if self.conf['rdf.store'] == 'SPARQLUpdateStore':
+            for ident in idents:
+                gr.update(" CLEAR SILENT GRAPH " + ident.n3() + " ")
+        else:
+            with self._store_transaction():
+                for ident in idents:
+                    gr.remove((None, None, None, gr.get_context(ident)))
 
     def _remove_from_store_by_query(self, q):
         s = " DELETE WHERE {" + q + " } "
@@ -249,6 +313,7 @@ class Data(Configure):
 
         self._cch = None
         self._listeners = dict()
+        self._store_events = 0
 
     @classmethod
     def load(cls, file_name):
@@ -286,20 +351,49 @@ class Data(Configure):
         # to the graph
         self['rdf.graph.change_counter'] = 0
 
-        self['rdf.graph'].store.dispatcher.subscribe(TripleAddedEvent, self._context_changed_handler())
-        self['rdf.graph'].store.dispatcher.subscribe(TripleRemovedEvent, self._context_changed_handler())
+        # Finer-grained version numbers, by subject and by context, for caches
+        # which only depend on a part of the graph
+        self['rdf.graph.change_tracker'] = ChangeTracker()
+
+        # Subjects by type and literal property values for answering simple
+        # queries without walking the graph
+        self['rdf.graph.literal_index'] = LiteralIndex(self['rdf.graph'])
+
+        # Hashes of the contents of contexts for detecting which have changed
+        # since they were written out
+        self['rdf.graph.context_hashes'] = ContextHashes()
+
+        # Stores without a dispatcher, like SPARQLUpdateStore, are covered by
+        # the wrappers of add, addN, and remove below
+        dispatcher = getattr(self['rdf.graph'].store, 'dispatcher', None)
+        if dispatcher is not None:
+            dispatcher.subscribe(TripleAddedEvent, self._context_changed_handler())
+            dispatcher.subscribe(TripleRemovedEvent, self._context_changed_handler())
 
         self['rdf.graph']._add = self['rdf.graph'].add
+        self['rdf.graph']._addN = self['rdf.graph'].addN
         self['rdf.graph']._remove = self['rdf.graph'].remove
         self['rdf.graph'].add = self._my_graph_add
+        self['rdf.graph'].addN = self._my_graph_addN
         self['rdf.graph'].remove = self._my_graph_remove
         nm.bind("", self['rdf.namespace'])
 
     def _context_changed_handler(self):
         if not self._cch:
             def handler(event):
-                ctx = event.context
-                self._dispatch(ContextChangedEvent(context=getattr(ctx, 'identifier', ctx)))
+                ctx = getattr(event.context, 'identifier', event.context)
+                store = self['rdf.graph'].store
+                if isinstance(event, TripleAddedEvent):
+                    self['rdf.graph.context_hashes'].triple_added(store, event.triple,
+                                                                  event.context)
+                    self['rdf.graph.literal_index'].added(event.triple, ctx)
+                else:
+                    self['rdf.graph.context_hashes'].triple_removed(store, event.triple,
+                                                                    event.context)
+                    self['rdf.graph.literal_index'].removed(event.triple, ctx)
+                self._store_events += 1
+                self['rdf.graph.change_tracker'].changed(event.triple, ctx)
+                self._dispatch(ContextChangedEvent(context=ctx))
             self._cch = handler
         return self._cch
 
@@ -322,21 +416,84 @@ class Data(Configure):
         ccl.append(listener)
 
     def _my_graph_add(self, triple):
+        events = self._store_events
         self['rdf.graph']._add(triple)
 
         # It's important that this happens _after_ the update otherwise anyone
         # checking could think they have the lastest version when they don't
         self['rdf.graph.change_counter'] += 1
+        # Not all stores dispatch events, so we record the change here too
+        self['rdf.graph.change_tracker'].changed(triple, None)
+        if events == self._store_events:
+            self['rdf.graph.literal_index'].invalidate()
+            if len(triple) > 3:
+                self._invalidate_context_hash(triple)
+
+    def _my_graph_addN(self, quads):
+        events = self._store_events
+        contexts = set()
+
+        def recorded():
+            # The quads are passed through rather than collected so that
+            # batches of any size can be added
+            for quad in quads:
+                contexts.add(getattr(quad[3], 'identifier', quad[3]))
+                yield quad
+        self['rdf.graph']._addN(recorded())
+
+        if events == self._store_events and contexts:
+            # The store didn't say which triples were added
+            self.contexts_changed(contexts)
+        else:
+            # The whole batch is one change to the counter
+            self['rdf.graph.change_counter'] += 1
+
+    def contexts_changed(self, contexts):
+        """
+        Record changes to contexts which weren't made through ``rdf.graph``,
+        like uploads to a remote store
+
+        The changes count as one change to ``rdf.graph.change_counter``, and
+        caches of anything in the contexts are invalidated
+
+        Parameters
+        ----------
+        contexts : iterable of rdflib.term.URIRef
+            Identifiers of the changed contexts. `None` stands for the default
+            context
+        """
+        self['rdf.graph.change_counter'] += 1
+        tracker = self['rdf.graph.change_tracker']
+        for ctx in contexts:
+            tracker.changed((None, None, None), ctx)
+            self['rdf.graph.context_hashes'].invalidate(ctx)
+        self['rdf.graph.literal_index'].invalidate()
 
     def _my_graph_remove(self, triple_or_quad):
+        events = self._store_events
         self['rdf.graph']._remove(triple_or_quad)
 
         # It's important that this happens _after_ the update otherwise anyone
         # checking could think they have the lastest version when they don't
         self['rdf.graph.change_counter'] += 1
+        self['rdf.graph.change_tracker'].changed(triple_or_quad, None)
+        if events == self._store_events:
+            self['rdf.graph.literal_index'].invalidate()
+            self._invalidate_context_hash(triple_or_quad)
+
+    def _invalidate_context_hash(self, triple_or_quad):
+        # The store didn't tell us what changed, so we can't update the hash
+        ctx = None
+        if len(triple_or_quad) > 3:
+            ctx = getattr(triple_or_quad[3], 'identifier', triple_or_quad[3])
+        self['rdf.graph.context_hashes'].invalidate(ctx)
 
     def closeDatabase(self):
         """ Close a the configured database """
+        runner = self.get('rdf.query_runner', None)
+        if runner is not None:
+            runner.close()
+            self['rdf.query_runner'] = None
         self.source.close()
 
     def _init_rdf_graph(self):
@@ -352,7 +509,8 @@ class Data(Configure):
                         'default': DefaultSource,
                         'trix': TrixSource,
                         'serialization': SerializationSource,
-                        'zodb': ZODBSource}
+                        'zodb': ZODBSource,
+                        'mmap': MmapSource}
         source = self.sources[self['rdf.source'].lower()](conf=self)
         self.source = source
 
@@ -364,7 +522,7 @@ class Data(Configure):
         return URIRef(
             self.molecule_namespace[
                 hashlib.sha224(
-                    str(data)).hexdigest()])
+                    str(data).encode('utf-8')).hexdigest()])
 
     def __setitem__(self, k, v):
         return Configure.__setitem__(self, k, v)
@@ -377,6 +535,311 @@ class ContextChangedEvent(Event):
     pass
 
 
+class ChangeTracker(object):
+
+    """
+    Version numbers for parts of a graph.
+
+    Each subject and each context has a version which changes whenever a
+    triple about that subject or in that context is added or removed. A cache
+    built from the triples about a subject stays valid for as long as
+    `subject_version` returns the same value.
+
+    Subjects are hashed into a fixed number of buckets, so the memory used
+    doesn't grow with the graph. A change to one subject may therefore change
+    the version of another subject in the same bucket, but never the reverse.
+    Changes described by a pattern with no subject, like ``(None, None,
+    None)``, change the versions of all subjects.
+    """
+
+    _serials = itertools.count()
+
+    def __init__(self, buckets=4096):
+        self.serial = next(ChangeTracker._serials)
+        """ A number unique to this tracker within the process """
+
+        self._epoch = 0
+        self._subjects = [0] * buckets
+        self._contexts = dict()
+
+    def changed(self, triple, context=None):
+        """
+        Record a change
+
+        Parameters
+        ----------
+        triple : tuple
+            The triple, quad, or triple pattern which was added or removed
+        context : rdflib.term.URIRef
+            The identifier of the context where the change was made, if known
+        """
+        subject = triple[0]
+        if subject is None:
+            self._epoch += 1
+        else:
+            self._subjects[hash(subject) % len(self._subjects)] += 1
+
+        if context is None and len(triple) > 3:
+            context = getattr(triple[3], 'identifier', triple[3])
+        if context is not None:
+            self._contexts[context] = self._contexts.get(context, 0) + 1
+
+    def subject_version(self, subject):
+        """ Returns the current version for triples with the given subject """
+        return (self._epoch, self._subjects[hash(subject) % len(self._subjects)])
+
+    def context_version(self, context):
+        """ Returns the current version for triples in the given context """
+        return (self._epoch, self._contexts.get(context, 0))
+
+
+class LiteralIndex(object):
+
+    """
+    Subjects by their RDF types and the literal values of their properties.
+
+    Answers queries like "the neurons whose type is 'sensory'" with dictionary
+    lookups rather than by walking the graph. The types of every subject are
+    read from the store the first time the index is used, and the values for a
+    predicate the first time that predicate is looked up. From then on, the
+    index is kept up to date from the store's events. Changes the index can't
+    follow, like the removal of a triple pattern, empty the index so that it's
+    read again when it's next used.
+
+    Parameters
+    ----------
+    graph : rdflib.graph.ConjunctiveGraph
+        The graph whose store is indexed
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        # Maps subjects to their types, and types to the contexts they're
+        # stated in. None until read from the store
+        self._types = None
+        # Maps predicates to literals to subjects to contexts
+        self._values = dict()
+
+    def invalidate(self):
+        """ Empty the index """
+        self._types = None
+        self._values = dict()
+
+    def added(self, triple, context):
+        """
+        Record a triple added to the store
+
+        Parameters
+        ----------
+        triple : tuple
+            The triple
+        context : rdflib.term.URIRef
+            The identifier of the context the triple was added to
+        """
+        s, p, o = triple[:3]
+        if p == RDF.type:
+            if self._types is not None:
+                self._types.setdefault(s, dict()).setdefault(o, set()).add(context)
+        elif isinstance(o, Literal):
+            values = self._values.get(p)
+            if values is not None:
+                values.setdefault(o, dict()).setdefault(s, set()).add(context)
+
+    def removed(self, triple, context):
+        """
+        Record a triple removed from the store
+
+        Parameters
+        ----------
+        triple : tuple
+            The triple or triple pattern
+        context : rdflib.term.URIRef
+            The identifier of the context the triple was removed from, or None
+            if it was removed from all contexts
+        """
+        s, p, o = triple[:3]
+        if s is None or p is None or o is None:
+            if p is None or p == RDF.type or p in self._values:
+                self.invalidate()
+            return
+        if p == RDF.type:
+            if self._types is not None:
+                self._discard(self._types, s, o, context)
+        elif isinstance(o, Literal) and p in self._values:
+            self._discard(self._values[p], o, s, context)
+
+    def _discard(self, index, k1, k2, context):
+        inner = index.get(k1)
+        if inner is None or k2 not in inner:
+            return
+        if context is None:
+            inner[k2].clear()
+        else:
+            inner[k2].discard(context)
+        if not inner[k2]:
+            del inner[k2]
+            if not inner:
+                del index[k1]
+
+    def subjects(self, types, values, contexts=None):
+        """
+        Find subjects with one of the given types and all of the given values
+
+        Parameters
+        ----------
+        types : set of rdflib.term.URIRef
+            The RDF types a subject may have
+        values : list of tuple
+            Predicate and literal pairs which a subject must all have
+        contexts : set of rdflib.term.URIRef
+            The contexts which the type and value triples must be in. If None,
+            triples in any context count
+
+        Returns
+        -------
+        set of rdflib.term.Identifier
+        """
+        def matches(ctxs):
+            return contexts is None or not ctxs.isdisjoint(contexts)
+
+        res = None
+        for p, o in values:
+            subjects = set(s for s, ctxs in self._predicate_values(p).get(o, dict()).items()
+                           if matches(ctxs))
+            res = subjects if res is None else (res & subjects)
+            if not res:
+                return set()
+
+        all_types = self._subject_types()
+        return set(s for s in res
+                   if any(t in types and matches(ctxs)
+                          for t, ctxs in all_types.get(s, dict()).items()))
+
+    def _subject_types(self):
+        if self._types is None:
+            types = dict()
+            for (s, _, o), ctxs in self.graph.store.triples((None, RDF.type, None)):
+                tctxs = types.setdefault(s, dict()).setdefault(o, set())
+                tctxs.update(getattr(c, 'identifier', c) for c in ctxs)
+            self._types = types
+        return self._types
+
+    def _predicate_values(self, p):
+        values = self._values.get(p)
+        if values is None:
+            values = dict()
+            for (s, _, o), ctxs in self.graph.store.triples((None, p, None)):
+                if isinstance(o, Literal):
+                    sctxs = values.setdefault(o, dict()).setdefault(s, set())
+                    sctxs.update(getattr(c, 'identifier', c) for c in ctxs)
+            self._values[p] = values
+        return values
+
+
+TRIPLE_HASH_MODULUS = 2 ** 64
+
+
+def triple_hash(triple):
+    """
+    A hash of a triple which is stable between processes
+
+    Parameters
+    ----------
+    triple : tuple
+        The subject, predicate, and object
+
+    Returns
+    -------
+    int
+        The hash, between 0 and `TRIPLE_HASH_MODULUS`
+    """
+    data = u' '.join(x.n3() for x in triple[:3]).encode('utf-8')
+    return int(hashlib.sha1(data).hexdigest()[:16], 16)
+
+
+class ContextHashes(object):
+
+    """
+    Order-independent hashes of the triples in contexts.
+
+    The hash of a context is the sum, modulo `TRIPLE_HASH_MODULUS`, of the
+    `triple_hash` of each triple in it, so it can be updated for each triple
+    added or removed without looking at the rest of the context. Two contexts
+    with the same triples have the same hash no matter the order the triples
+    were added in.
+
+    A hash is only kept up to date once it has been `set` from the full
+    contents of the context, for instance when the context is written to or read
+    from a file. Otherwise, `get` returns `None`. Updates rely on the store
+    dispatching `~rdflib.store.TripleAddedEvent` and
+    `~rdflib.store.TripleRemovedEvent` before it changes the graph, which
+    `rdflib.store.Store` subclasses do by calling the `~rdflib.store.Store`
+    methods first. Changes which might not have been seen should be reported
+    with `invalidate`.
+
+    Parameters
+    ----------
+    mapping : dict
+        Where the hashes are kept, keyed by context identifier. May be a
+        persistent mapping so that hashes survive between processes
+    """
+
+    def __init__(self, mapping=None):
+        self.mapping = dict() if mapping is None else mapping
+
+    def get(self, context):
+        """ Returns the hash for the context or `None` if it isn't known """
+        return self.mapping.get(context)
+
+    def set(self, context, value):
+        """ Set the hash for a context computed from all of its triples """
+        self.mapping[context] = value
+
+    def invalidate(self, context=None):
+        """
+        Forget the hash for a context, or for all contexts if `context` is
+        `None`
+        """
+        if context is None:
+            self.mapping.clear()
+        else:
+            self.mapping.pop(context, None)
+
+    def triple_added(self, store, triple, context):
+        """
+        Update the hash of `context` for a triple which is about to be added
+        """
+        ident = getattr(context, 'identifier', context)
+        if ident is None or self.mapping.get(ident) is None:
+            return
+        for _ in store.triples(triple[:3], context):
+            # Already there, so the contents don't change
+            return
+        self.mapping[ident] = (self.mapping[ident] + triple_hash(triple)) % TRIPLE_HASH_MODULUS
+
+    def triple_removed(self, store, pattern, context):
+        """
+        Update the hashes of contexts for triples matching `pattern` which are
+        about to be removed from `context` or, if `context` is `None`, from all
+        contexts
+        """
+        ident = getattr(context, 'identifier', context)
+        if ident is not None and self.mapping.get(ident) is None:
+            return
+        if ident is None and not self.mapping:
+            return
+        for triple, contexts in store.triples(pattern[:3], context):
+            if ident is None:
+                idents = set(getattr(c, 'identifier', c) for c in contexts)
+            else:
+                idents = (ident,)
+            h = triple_hash(triple)
+            for i in idents:
+                current = self.mapping.get(i)
+                if current is not None:
+                    self.mapping[i] = (current - h) % TRIPLE_HASH_MODULUS
+
+
 def modification_date(filename):
     t = os.path.getmtime(filename)
     return datetime.datetime.fromtimestamp(t)
@@ -505,6 +968,21 @@ class SPARQLSource(RDFSource):
         ::
 
             "rdf.source" = "sparql_endpoint"
+            "rdf.store" = "SPARQLUpdateStore"
+            "rdf.store_conf" = [<query endpoint>, <update endpoint>]
+
+        Statements are added with ``INSERT DATA`` updates of at most
+        ``rdf.remote_request_size`` triples (10000 by default). If the store
+        also serves the SPARQL 1.1 Graph Store HTTP Protocol, statements are
+        uploaded to it as N-Triples instead, which most stores take much
+        faster::
+
+            "rdf.graph_store_endpoint" = <graph store endpoint>
+
+        Uploads go over the keep-alive connections of the client from
+        `~PyOpenWorm.http_client.shared_client`, and
+        `~PyOpenWorm.context.Context.save_context` uploads up to
+        ``rdf.remote_max_workers`` contexts (4 by default) at once.
     """
 
     def open(self):
@@ -513,6 +991,16 @@ class SPARQLSource(RDFSource):
         g0 = ConjunctiveGraph('SPARQLUpdateStore')
         g0.open(tuple(self.conf['rdf.store_conf']))
         self.graph = g0
+
+        endpoint = self.conf.get('rdf.graph_store_endpoint', None)
+        if endpoint:
+            from .graph_store import GraphStoreClient
+            from .http_client import shared_client
+            self.conf['rdf.graph_store'] = GraphStoreClient(
+                endpoint,
+                client=shared_client(self.conf),
+                request_size=int(self.conf.get('rdf.remote_request_size', 10000)),
+                max_workers=int(self.conf.get('rdf.remote_max_workers', 4)))
         return self.graph
 
 
@@ -541,51 +1029,66 @@ class SQLiteSource(RDFSource):
 
     """ Reads from and queries against a SQLite database
 
-    See see the SQLite database :file:`db/celegans.db` for the format
+    The triples are stored in the database itself (see
+    `~PyOpenWorm.sqlite_store.SQLiteStore`), so opening the database doesn't
+    depend on how much is in it. The database store is configured with::
+
+        "rdf.source" = "sqlite"
+        "rdf.store_conf" = <location of your SQLite database>
 
-    The database store is configured with::
+    Leaving ``rdf.store_conf`` unconfigured simply gives an in-memory data
+    store.
 
-        "rdf.source" = "Sleepycat"
-        "sqldb" = "/home/USER/openworm/PyOpenWorm/db/celegans.db",
-        "rdf.store" = <your rdflib store name here>
-        "rdf.store_conf" = <your rdflib store configuration here>
+    A database in the older format of :file:`db/celegans.db`, with
+    ``tblentity`` and ``tblrelationship`` tables, can be imported by also
+    configuring::
 
-    Leaving ``rdf.store`` unconfigured simply gives an in-memory data store.
+        "sqldb" = "/home/USER/openworm/PyOpenWorm/db/celegans.db"
+
+    The import is only done when the store is first created.
     """
 
     def open(self):
-        conn = sqlite3.connect(self.conf['sqldb'])
+        from .sqlite_store import SQLiteStore
+        path = self.conf['rdf.store_conf']
+        if path == 'default':
+            path = ':memory:'
+        store = SQLiteStore()
+        created = False
+        if store.open(path) != VALID_STORE:
+            store.open(path, create=True)
+            created = True
+        g0 = ConjunctiveGraph(store)
+        if created and self.conf.get('sqldb', None):
+            self._import_tables(g0, self.conf['sqldb'])
+            g0.commit()
+        self.graph = g0
+
+    def _import_tables(self, g0, sqldb):
+        conn = sqlite3.connect(sqldb)
         cur = conn.cursor()
 
         # first step, grab all entities and add them to the graph
         n = self.conf['rdf.namespace']
+        default = g0.default_context
 
         cur.execute("SELECT DISTINCT ID, Entity FROM tblentity")
-        g0 = ConjunctiveGraph(self.conf['rdf.store'])
-        g0.open(self.conf['rdf.store_conf'], create=True)
 
-        for r in cur.fetchall():
-            # first item is a number -- needs to be converted to a string
-            first = str(r[0])
-            # second item is text
-            second = str(r[1])
-
-            # This is the backbone of any RDF graph.  The unique
-            # ID for each entity is encoded as a URI and every other piece of
-            # knowledge about that entity is connected via triples to that URI
-            # In this case, we connect the common name of that entity to the
-            # root URI via the RDFS label property.
-            g0.add((n[first], RDFS.label, Literal(second)))
+        # This is the backbone of any RDF graph.  The unique
+        # ID for each entity is encoded as a URI and every other piece of
+        # knowledge about that entity is connected via triples to that URI
+        # In this case, we connect the common name of that entity to the
+        # root URI via the RDFS label property.
+        g0.addN((n[str(r[0])], RDFS.label, Literal(str(r[1])), default)
+                for r in cur)
 
         # second step, get the relationships between them and add them to the
         # graph
         cur.execute(
             "SELECT DISTINCT EnID1, Relation, EnID2, Citations FROM tblrelationship")
 
-        gi = ''
-
-        i = 0
-        for r in cur.fetchall():
+        quads = []
+        for i, r in enumerate(cur):
             # all items are numbers -- need to be converted to a string
             first = str(r[0])
             second = str(r[1])
@@ -595,17 +1098,14 @@ class SQLiteSource(RDFSource):
             ui = self.conf['molecule_name'](prov)
             gi = Graph(g0.store, ui)
 
-            gi.add((n[first], n[second], n[third]))
-
-            g0.add([ui, RDFS.label, Literal(str(i))])
+            quads.append((n[first], n[second], n[third], gi))
+            quads.append((ui, RDFS.label, Literal(str(i)), default))
             if (prov != ''):
-                g0.add([ui, n[u'text_reference'], Literal(prov)])
-
-            i = i + 1
+                quads.append((ui, n[u'text_reference'], Literal(prov), default))
+        g0.addN(quads)
 
         cur.close()
         conn.close()
-        self.graph = g0
 
 
 class DefaultSource(RDFSource):
@@ -628,6 +1128,36 @@ class DefaultSource(RDFSource):
         self.graph.open(self.conf['rdf.store_conf'], create=True)
 
 
+class MmapSource(RDFSource):
+
+    """ Reads from and queries against a read-only, memory-mapped index file
+
+        The index is written from another database with ``pow mmap_index``.
+        Since it is only read through a shared memory map, any number of
+        processes can open it at little cost. The database is configured
+        with::
+
+            "rdf.source" = "mmap"
+            "rdf.store_conf" = <location of the index file>
+
+        Changes can be kept in memory over the index, and discarded when the
+        database is closed, by also configuring::
+
+            "rdf.mmap.overlay" = true
+    """
+
+    def open(self):
+        from .mmap_store import MmapStore
+        path = self.conf['rdf.store_conf']
+        store = MmapStore()
+        if store.open(path) != VALID_STORE:
+            raise OpenFailError('Could not open the index file "{}"'.format(path))
+        if self.conf.get('rdf.mmap.overlay', False):
+            from .overlay_store import OverlayStore
+            store = OverlayStore(store)
+        self.graph = ConjunctiveGraph(store)
+
+
 class ZODBSourceOpenFailError(OpenFailError):
     def __init__(self, openstr, *args):
         super(ZODBSourceOpenFailError, self).__init__('Could not open the database file "{}"'.format(openstr),
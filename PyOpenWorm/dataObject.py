@@ -5,6 +5,7 @@ from rdflib.term import URIRef
 import logging
 import six
 import hashlib
+import itertools
 
 import PyOpenWorm  # noqa
 from . import BASE_SCHEMA_URL
@@ -22,9 +23,11 @@ from yarom.rdfTypeResolver import RDFTypeResolver
 from yarom.mappedClass import MappedClass
 from yarom.utils import FCN
 from .data import DataUser
+from .async_query import query_runner, graph_key, pattern_key
 from .identifier_mixin import IdMixin
 from .inverse_property import InverseProperty
-from .rdf_query_util import goq_hop_scorer, get_most_specific_rdf_type, oid, load
+from .rdf_query_util import (goq_hop_scorer, get_most_specific_rdf_type, oid, load,
+                             QUERY_ENGINE_CONF_KEY)
 
 import PyOpenWorm.simpleProperty as SP
 
@@ -34,7 +37,8 @@ __all__ = [
     "DataObject",
     "DataObjectTypes",
     "RDFTypeTable",
-    "DataObjectsParents"]
+    "DataObjectsParents",
+    "save_objects"]
 
 L = logging.getLogger(__name__)
 
@@ -237,6 +241,29 @@ class ContextMappedClass(MappedClass, ContextualizableClass):
         return self.__context
 
 
+def save_objects(objects):
+    """
+    Write the in-memory data of several objects to the database
+
+    Like calling `BaseDataObject.save` on each object, except that the triples
+    of all of the objects are written together, in blocks of
+    ``rdf.upload_block_statement_count``, as they're generated. The
+    configuration of the first object is used
+
+    Parameters
+    ----------
+    objects : iterable of BaseDataObject
+        The objects to save
+    """
+    objects = iter(objects)
+    first = next(objects, None)
+    if first is None:
+        return
+    first.add_statements(t
+                         for o in itertools.chain((first,), objects)
+                         for t in o.triples())
+
+
 def _make_property(cls, property_type, *args, **kwargs):
     try:
         return cls._create_property(property_type=property_type, *args, **kwargs)
@@ -404,7 +431,6 @@ class BaseDataObject(six.with_metaclass(ContextMappedClass,
         ores = super(BaseDataObject, cls).__new__(cls)
         if cls.context is not None:
             ores.context = cls.context
-            ores.add_contextualization(cls.context, ores)
             res = ores
         else:
             ores.context = None
@@ -517,14 +543,78 @@ class BaseDataObject(six.with_metaclass(ContextMappedClass,
         return len(GraphObjectQuerier(self, self.rdf, parallel=False,
                                       hop_scorer=goq_hop_scorer)())
 
-    def load(self, graph=None):
+    def load(self, graph=None, prefetch=None):
+        """ Load objects matching this one from the graph
+
+        Parameters
+        ----------
+        graph : rdflib.graph.Graph
+            The graph to load from. Defaults to the graph for this object's
+            context
+        prefetch : list of str
+            Names of properties whose values should be retrieved for all of the
+            loaded objects at once. Reading these properties on the loaded
+            objects will not query the graph again unless the graph changes.
+            For example::
+
+                >>> for n in Neuron().load(prefetch=('name', 'type')):
+                ...     print(n.name(), n.type())
+        """
         # XXX: May need to rethink this refactor at some point...
+        links = None
+        if prefetch:
+            links = frozenset(self._property_link(name) for name in prefetch)
         for x in load(self.rdf if graph is None else graph,
                       start=self,
                       target_type=type(self).rdf_type,
-                      context=self.context):
+                      context=self.context,
+                      prefetch=links,
+                      engine=self.conf.get(QUERY_ENGINE_CONF_KEY, None),
+                      index=self.conf.get('rdf.graph.literal_index', None)):
             yield x
 
+    def load_async(self, graph=None, prefetch=None):
+        """ Load objects matching this one from the graph in a worker thread
+
+        Takes the same arguments as `load`. Loads of identical objects from the
+        same graph which are in flight at the same time are made once. See
+        `PyOpenWorm.async_query`
+
+        Returns
+        -------
+        asyncio.Future
+            A tuple of the loaded objects
+        """
+        key = None
+        if graph is None:
+            key = self._async_key('load', frozenset(prefetch or ()))
+        return query_runner(self.conf).run(lambda: tuple(self.load(graph, prefetch)), key)
+
+    def count_async(self):
+        """ Count the objects matching this one in a worker thread
+
+        Returns
+        -------
+        asyncio.Future
+            The number of objects
+        """
+        return query_runner(self.conf).run(self.count, self._async_key('count'))
+
+    def _async_key(self, *args):
+        gk = graph_key(self.conf, self.context)
+        if gk is None:
+            return None
+        pattern = pattern_key(self.triples(traverse_undefined=True), self.idl)
+        return args + (self.rdf_type, gk, pattern)
+
+    def _property_link(self, name):
+        pc = self._property_classes.get(name)
+        link = getattr(pc, 'link', None)
+        if link is None:
+            raise ValueError('{} has no property named "{}" which can be'
+                             ' prefetched'.format(FCN(type(self)), name))
+        return link
+
     def fill(self):
         pass
 
@@ -712,11 +802,13 @@ class BaseDataObject(six.with_metaclass(ContextMappedClass,
 
     def retract(self):
         """ Remove this object from the data store. """
-        self.retract_statements(self.graph_pattern(query=True))
+        self.retract_statements(self.triples(traverse_undefined=True))
 
     def save(self):
         """ Write in-memory data to the database.
         Derived classes should call this to update the store.
+
+        See `save_objects` for saving many objects at once
         """
         self.add_statements(self.triples())
 
@@ -2,8 +2,11 @@ import re
 import traceback
 import csv
 
+import rdflib as R
+from rdflib.term import Literal
+
 from ..utils import normalize_cell_name
-from ..connection import Connection
+from ..connection import Connection, SynapseType, Termination
 from ..cell import Cell
 from ..context import Context
 from ..document import Document
@@ -14,7 +17,7 @@ from ..worm import Worm
 from ..network import Network
 from ..datasource import GenericTranslation
 
-from .csv_ds import CSVDataTranslator, CSVDataSource
+from .csv_ds import CSVDataTranslator, CSVDataSource, column_chunks, map_column
 from .common_data import TRANS_NS
 from .data_with_evidence_ds import DataWithEvidenceDataSource
 
@@ -54,13 +57,6 @@ class NeuronConnectomeCSVTranslator(CSVDataTranslator):
         return tr
 
     def translate(self, data_source, neurons_source, muscles_source):
-        # muscle cells that are generically defined in source and need to be broken
-        # into pair of L and R before being added to PyOpenWorm
-
-        # muscle cells that have different names in connectome source and cell list.
-        # Their wormbase cell list names will be used in PyOpenWorm
-        changed_muscles = ['ANAL', 'INTR', 'INTL', 'SPH']
-
         # counters for terminal printing
         neuron_connections = 0
         muscle_connections = 0
@@ -107,50 +103,15 @@ class NeuronConnectomeCSVTranslator(CSVDataTranslator):
             e.supports(docctx.rdf_object)
             with docctx(Neuron, Muscle, Cell, Connection) as ctx:
                 res.data_context.add_import(ctx.context)
+                adder = ConnectionAdder(ctx, o_n, muscles, neurons)
                 with open(data_source.csv_file_name.onedef()) as csvfile:
                     edge_reader = csv.reader(csvfile)
                     next(edge_reader)  # skip header row
-                    for row in edge_reader:
-                        source, target, weight, syn_type = map(str.strip, row)
-
-                        # set synapse type to something the Connection object
-                        # expects, and normalize the source and target names
-                        if syn_type == 'electrical':
-                            syn_type = 'gapJunction'
-                        elif syn_type == 'chemical':
-                            syn_type = 'send'
-
-                        source = normalize_cell_name(source).upper()
-                        target = normalize_cell_name(target).upper()
-
-                        weight = int(weight)
-
-                        # remove BMW from Body Wall Muscle cells
-                        if 'BWM' in source:
-                            source = normalize_muscle(source)
-                        if 'BWM' in target:
-                            target = normalize_muscle(target)
-
-                        # change certain muscle names to names in wormbase
-                        if source in changed_muscles:
-                            source = changed_muscle(source)
-                        if target in changed_muscles:
-                            target = changed_muscle(target)
-
-                        sources = convert_to_cell(ctx, source, muscles, neurons)
-                        targets = convert_to_cell(ctx, target, muscles, neurons)
-
-                        for s in sources:
-                            for t in targets:
-                                conn = add_synapse(ctx, s, t, weight, syn_type)
-                                o_n.synapse(conn)
-                                kind = conn.termination.onedef()
-                                if kind == 'muscle':
-                                    muscle_connections += 1
-                                elif kind == 'neuron':
-                                    neuron_connections += 1
-                                else:
-                                    other_connections += 1
+                    for columns in column_chunks(edge_reader):
+                        adder.add(*columns)
+                neuron_connections = adder.counts[Termination.Neuron]
+                muscle_connections = adder.counts[Termination.Muscle]
+                other_connections = adder.counts[None]
 
             print('Total neuron to neuron connections added = %i' % neuron_connections)
             print('Total neuron to muscle connections added = %i' % muscle_connections)
@@ -162,6 +123,142 @@ class NeuronConnectomeCSVTranslator(CSVDataTranslator):
         return res
 
 
+class ConnectionAdder(object):
+    '''
+    Adds connections from the columns of a connectome CSV
+
+    The triples for each `~PyOpenWorm.connection.Connection` are written
+    straight to the context rather than by making a `Connection` object for
+    each row, and the cells named in the CSV are looked up once for each
+    distinct name. The triples are the same as for making the objects with
+    `add_synapse`
+
+    Parameters
+    ----------
+    ctx : PyOpenWorm.context.ContextContextManager
+        The context to add connections and cells to, with `Neuron`, `Muscle`,
+        `Cell`, and `Connection` classes
+    network : PyOpenWorm.network.Network
+        The network to add the connections to as synapses
+    muscles : list of str
+        Names of known muscles
+    neurons : list of str
+        Names of known neurons
+    '''
+
+    def __init__(self, ctx, network, muscles, neurons):
+        self.ctx = ctx
+        self.network = network
+        self.muscles = set(muscles)
+        self.neurons = set(neurons)
+        self.counts = {Termination.Neuron: 0, Termination.Muscle: 0, None: 0}
+        self._cells = dict()
+        self._syntypes = dict()
+        self._weights = dict()
+
+    def add(self, sources, targets, weights, syn_types):
+        '''
+        Add the connections for a chunk of rows
+
+        Parameters
+        ----------
+        sources : sequence of str
+            The "source" column
+        targets : sequence of str
+            The "target" column
+        weights : sequence of str
+            The "weight" column
+        syn_types : sequence of str
+            The "synapse type" column
+        '''
+        pre_cells = map_column(sources, self._cell, self._cells)
+        post_cells = map_column(targets, self._cell, self._cells)
+        weights = map_column(weights, lambda w: Literal(int(w.strip())), self._weights)
+        syn_types = map_column(syn_types, _syntype_literals, self._syntypes)
+
+        rdf_type = Connection.rdf_type
+        pre_cell = Connection.pre_cell.link
+        post_cell = Connection.post_cell.link
+        number = Connection.number.link
+        syntype = Connection.syntype.link
+        termination = Connection.termination.link
+        synapse = Network.synapse.link
+        net = self.network.identifier
+
+        triples = []
+        synapses = []
+        for sources, targets, weight, (syntype_n3, syntypes) in zip(pre_cells, post_cells,
+                                                                    weights, syn_types):
+            for s, s_kind in sources:
+                for t, t_kind in targets:
+                    conn = Connection.make_identifier(s.n3() + t.n3() + syntype_n3)
+                    triples.append((conn, R.RDF.type, rdf_type))
+                    triples.append((conn, pre_cell, s))
+                    triples.append((conn, post_cell, t))
+                    triples.append((conn, number, weight))
+                    for st in syntypes:
+                        triples.append((conn, syntype, st))
+                    kind = _termination(s_kind, t_kind)
+                    if kind is not None:
+                        triples.append((conn, termination, Literal(kind)))
+                    self.counts[kind] += 1
+                    synapses.append((net, synapse, conn))
+        self.ctx.context.add_triples(triples)
+        self.network.context.add_triples(synapses)
+
+    def _cell(self, name):
+        ''' The identifiers and kinds of the cells for a name in the CSV '''
+        name = normalize_cell_name(name.strip()).upper()
+        # remove BMW from Body Wall Muscle cells
+        if 'BWM' in name:
+            name = normalize_muscle(name)
+        # change certain muscle names to names in wormbase
+        if name in MUSCLES:
+            name = changed_muscle(name)
+        return [(c.identifier, _cell_kind(self.ctx, c))
+                for c in convert_to_cell(self.ctx, name, self.muscles, self.neurons)]
+
+
+def _syntype_literals(syn_type):
+    '''
+    The N3 of the synapse type used in a connection's identifier and the
+    synapse type literals for the connection
+
+    As with `~PyOpenWorm.connection.Connection`, a synapse type differing only
+    in case from a known one is given as both, and the known one is used for
+    the identifier
+    '''
+    # set synapse type to something the Connection object expects
+    syn_type = syn_type.strip()
+    if syn_type == 'electrical':
+        syn_type = SynapseType.GapJunction
+    elif syn_type == 'chemical':
+        syn_type = SynapseType.Chemical
+    res = [Literal(syn_type)]
+    lowered = syn_type.lower()
+    if lowered == SynapseType.Chemical.lower():
+        res.append(Literal(SynapseType.Chemical))
+    elif lowered == SynapseType.GapJunction.lower():
+        res.append(Literal(SynapseType.GapJunction))
+    return res[-1].n3(), sorted(set(res))
+
+
+def _cell_kind(ctx, cell):
+    if isinstance(cell, ctx.Neuron):
+        return Termination.Neuron
+    if isinstance(cell, ctx.Muscle):
+        return Termination.Muscle
+    return None
+
+
+def _termination(pre_kind, post_kind):
+    if pre_kind == Termination.Neuron and post_kind == Termination.Neuron:
+        return Termination.Neuron
+    if set((pre_kind, post_kind)) == set((Termination.Neuron, Termination.Muscle)):
+        return Termination.Muscle
+    return None
+
+
 def convert_to_cell(ctx, name, muscles, neurons):
     ret = []
     res = None
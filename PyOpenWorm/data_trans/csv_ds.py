@@ -1,6 +1,7 @@
 from rdflib.namespace import Namespace
 from os.path import join as pth_join
 from contextlib import contextmanager
+from itertools import islice
 from .common_data import DS_NS
 from .local_file_ds import LocalFileDataSource
 from .http_ds import HTTPFileDataSource
@@ -51,5 +52,80 @@ class CSVDataTranslator(DataTranslator):
 
     reader = make_reader
 
+    def make_column_reader(self, source, chunk_size=10000, skipheader=True, **kwargs):
+        '''
+        Like `make_reader`, but gives the rows in chunks of columns. See
+        `column_chunks`
+        '''
+        @contextmanager
+        def cm():
+            with self.make_reader(source, skipheader, **kwargs) as reader:
+                yield column_chunks(reader, chunk_size)
+        return cm()
+
+
+def column_chunks(reader, chunk_size=10000):
+    '''
+    Group the rows from a CSV reader into chunks of columns
+
+    Each column in a chunk holds a value from each row, so a translator can
+    work on whole columns at a time (e.g., with `map_column`) rather than on
+    one row at a time
+
+    Parameters
+    ----------
+    reader : iterable of list
+        The rows, as from a `csv.reader`
+    chunk_size : int
+        The largest number of rows in a chunk
+
+    Yields
+    ------
+    list of tuple
+        The values in each column for the rows in a chunk
+    '''
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        width = len(rows[0])
+        for row in rows:
+            if len(row) != width:
+                raise ValueError('Expected {} fields in row {}, but found {}'.format(width, row, len(row)))
+        yield list(zip(*rows))
+
+
+def map_column(column, fn, table=None):
+    '''
+    Apply a function to each value in a column, calling it only once for each
+    distinct value
+
+    Parameters
+    ----------
+    column : sequence
+        The values
+    fn : callable
+        The function to apply
+    table : dict
+        Results of `fn` for values seen before. Pass the same table for each
+        chunk of a column to share the results between chunks
+
+    Returns
+    -------
+    list
+        The result for each value in `column`
+    '''
+    if table is None:
+        table = dict()
+    res = []
+    for v in column:
+        try:
+            res.append(table[v])
+        except KeyError:
+            r = fn(v)
+            table[v] = r
+            res.append(r)
+    return res
+
 
 __yarom_mapped_classes__ = (CSVDataSource, CSVDataTranslator)
@@ -1,8 +1,67 @@
 from contextlib import contextmanager
+import hashlib
+import mmap
+import os
 from rdflib.namespace import Namespace
 from ..datasource import Informational, DataSource
 from .common_data import DS_NS
 
+HASH_ALGORITHMS = ('md5', 'sha256', 'sha512')
+''' The hashes recorded by a `FileDataSource` '''
+
+CHUNK_SIZE = 1 << 20
+''' The number of bytes read at a time when hashing a file '''
+
+
+def hash_stream(f, algorithms=HASH_ALGORITHMS, chunk_size=CHUNK_SIZE):
+    '''
+    Compute several hashes of a file object in one pass over it
+
+    Parameters
+    ----------
+    f : file object
+        The file, opened in binary mode
+    algorithms : tuple of str
+        Names of `hashlib` algorithms
+    chunk_size : int
+        The number of bytes to read at a time
+
+    Returns
+    -------
+    dict
+        Maps each algorithm to the hex digest
+    '''
+    hashes = [(a, hashlib.new(a)) for a in algorithms]
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        for _, h in hashes:
+            h.update(chunk)
+    return dict((a, h.hexdigest()) for a, h in hashes)
+
+
+def hash_file(path, algorithms=HASH_ALGORITHMS, chunk_size=CHUNK_SIZE):
+    '''
+    Compute several hashes of a local file in one pass over a memory map of it
+
+    Parameters are as for `hash_stream`, except that `path` is the path to the
+    file
+    '''
+    hashes = [(a, hashlib.new(a)) for a in algorithms]
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > 0:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for start in range(0, size, chunk_size):
+                    chunk = m[start:start + chunk_size]
+                    for _, h in hashes:
+                        h.update(chunk)
+            finally:
+                m.close()
+    return dict((a, h.hexdigest()) for a, h in hashes)
+
 
 class FileDataSource(DataSource):
     rdf_namespace = Namespace(DS_NS['FileDataSource#'])
@@ -15,11 +74,33 @@ class FileDataSource(DataSource):
         raise NotImplementedError()
 
     def update_hash(self, algorithm):
-        import hashlib
-        hsh = hashlib.new(algorithm)
+        self.update_hashes((algorithm,))
+
+    def update_hashes(self, algorithms=HASH_ALGORITHMS):
+        '''
+        Set hashes of the file, reading it once for all of them
+
+        Parameters
+        ----------
+        algorithms : tuple of str
+            The hashes to set. Any of 'md5', 'sha256', and 'sha512'
+
+        Returns
+        -------
+        dict
+            Maps each algorithm to the hex digest
+        '''
+        for a in algorithms:
+            if a not in HASH_ALGORITHMS:
+                raise ValueError('Unsupported hash algorithm ' + repr(a))
+        digests = self._compute_hashes(algorithms)
+        for a in algorithms:
+            getattr(self, a).set(digests[a])
+        return digests
+
+    def _compute_hashes(self, algorithms):
         with self.file_contents() as f:
-            hsh.update(f.read())
-        getattr(self, algorithm).set(hsh.hexdigest())
+            return hash_stream(f, algorithms)
 
 
 __yarom_mapped_classes__ = (FileDataSource,)
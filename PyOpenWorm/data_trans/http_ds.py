@@ -1,15 +1,188 @@
 from contextlib import contextmanager
+import errno
+import hashlib
+import os
+import tempfile
 from six.moves.urllib.request import urlopen
 from ..datasource import Informational
-from .file_ds import FileDataSource
+from .file_ds import FileDataSource, HASH_ALGORITHMS, CHUNK_SIZE, hash_file
+
+
+class DownloadHashMismatch(Exception):
+    ''' Raised when a downloaded file doesn't have the hash recorded for it '''
+
+
+class DownloadCache(object):
+    '''
+    Downloaded files stored by their content
+
+    Each file is stored once under its SHA-256 hash, and can be found by any
+    of the hashes in `~PyOpenWorm.data_trans.file_ds.HASH_ALGORITHMS`::
+
+        sha256/<hex digest>    the file
+        md5/<hex digest>       the SHA-256 hex digest of the file
+        sha512/<hex digest>    the SHA-256 hex digest of the file
+
+    Parameters
+    ----------
+    directory : str
+        The directory for the cache. Created if it doesn't exist
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        for a in HASH_ALGORITHMS:
+            try:
+                os.makedirs(os.path.join(directory, a))
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+    def _path(self, algorithm, digest):
+        return os.path.join(self.directory, algorithm, digest.lower())
+
+    def find(self, hashes):
+        '''
+        Find a file by any of its hashes
+
+        Parameters
+        ----------
+        hashes : dict
+            Maps algorithms to hex digests
+
+        Returns
+        -------
+        str
+            The path to the file, or `None` if none of the hashes are in the
+            cache
+        '''
+        sha256 = hashes.get('sha256')
+        if sha256 is None:
+            for a in HASH_ALGORITHMS:
+                if a != 'sha256' and hashes.get(a) and os.path.exists(self._path(a, hashes[a])):
+                    with open(self._path(a, hashes[a])) as f:
+                        sha256 = f.read().strip()
+                    break
+        if sha256 is not None and os.path.exists(self._path('sha256', sha256)):
+            return self._path('sha256', sha256)
+        return None
+
+    def add(self, f, expected=None, source=None, chunk_size=CHUNK_SIZE):
+        '''
+        Copy a file into the cache, hashing it on the way
+
+        Parameters
+        ----------
+        f : file object
+            The file, opened in binary mode
+        expected : dict
+            Maps algorithms to the hex digests the file should have. If any
+            differ, the file isn't added. Optional
+        source : str
+            Where the file came from, for error messages. Optional
+
+        Returns
+        -------
+        tuple
+            The path to the cached file and a dict mapping each algorithm to
+            the hex digest of the file
+
+        Raises
+        ------
+        DownloadHashMismatch
+            If the file doesn't have one of the `expected` hashes
+        '''
+        hashes = [(a, hashlib.new(a)) for a in HASH_ALGORITHMS]
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.download')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    for _, h in hashes:
+                        h.update(chunk)
+            digests = dict((a, h.hexdigest()) for a, h in hashes)
+            for a, digest in (expected or {}).items():
+                if digests[a] != digest.lower():
+                    raise DownloadHashMismatch('The {} hash of {} is {}, but {} was expected'.format(
+                        a, source or 'the file', digests[a], digest))
+            path = self._path('sha256', digests['sha256'])
+            os.rename(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        for a in HASH_ALGORITHMS:
+            if a != 'sha256':
+                with open(self._path(a, digests[a]), 'w') as idx:
+                    idx.write(digests['sha256'])
+        return path, digests
 
 
 class HTTPFileDataSource(FileDataSource):
+    '''
+    A file retrieved over HTTP
+
+    If the configuration has an ``http.download_cache_dir``, downloads are kept
+    in a `DownloadCache` there, and the file is only downloaded if none of
+    its hashes are in the cache. A download's hashes are recorded on the data
+    source if it has none, so later reads come from the cache.
+    '''
     url = Informational(display_name='URL')
 
     @contextmanager
     def file_contents(self):
-        return urlopen(self.url.one())
+        cache = self._download_cache()
+        if cache is None:
+            f = urlopen(self.url.one())
+            try:
+                yield f
+            finally:
+                f.close()
+        else:
+            with open(self._cached_download(cache)[0], 'rb') as f:
+                yield f
+
+    def _download_cache(self):
+        directory = self.conf.get('http.download_cache_dir', None)
+        if directory is None:
+            return None
+        return DownloadCache(directory)
+
+    def _known_hashes(self):
+        res = dict()
+        for a in HASH_ALGORITHMS:
+            values = getattr(self, a).defined_values
+            if values:
+                res[a] = str(values[0].identifier.toPython())
+        return res
+
+    def _cached_download(self, cache):
+        known = self._known_hashes()
+        path = cache.find(known)
+        if path is not None:
+            return path, None
+        url = self.url.one()
+        f = urlopen(url)
+        try:
+            path, digests = cache.add(f, expected=known, source=url)
+        finally:
+            f.close()
+        if not known:
+            for a in HASH_ALGORITHMS:
+                getattr(self, a).set(digests[a])
+        return path, digests
+
+    def _compute_hashes(self, algorithms):
+        cache = self._download_cache()
+        if cache is None:
+            return super(HTTPFileDataSource, self)._compute_hashes(algorithms)
+        path, digests = self._cached_download(cache)
+        if digests is None:
+            digests = hash_file(path, algorithms)
+        return digests
 
 
 __yarom_mapped_classes__ = (HTTPFileDataSource,)
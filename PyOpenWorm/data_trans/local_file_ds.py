@@ -1,7 +1,8 @@
 from contextlib import contextmanager
+from os.path import join as pth_join
 from rdflib.namespace import Namespace
 from ..datasource import Informational
-from .file_ds import FileDataSource
+from .file_ds import FileDataSource, hash_file
 from .common_data import DS_NS
 from ..capability import Capable
 from ..capabilities import FilePathCapability
@@ -18,7 +19,17 @@ class LocalFileDataSource(Capable, FileDataSource):
 
     @contextmanager
     def file_contents(self):
-        yield open(self.file_name.one(), 'b')
+        with open(self.full_path(), 'rb') as f:
+            yield f
+
+    def full_path(self):
+        provider = getattr(self, '_base_path_provider', None)
+        if provider is None:
+            return self.file_name.one()
+        return pth_join(provider.file_path(), self.file_name.one())
+
+    def _compute_hashes(self, algorithms):
+        return hash_file(self.full_path(), algorithms)
 
     def accept_capability_provider(self, cap, provider):
         self._base_path_provider = provider
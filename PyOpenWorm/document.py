@@ -1,11 +1,9 @@
 from six.moves.urllib.parse import urlparse, urlencode
-from six.moves.urllib.request import Request, urlopen
-from six.moves.urllib.error import HTTPError, URLError
-import re
 import logging
 from yarom.graphObject import IdentifierMissingException
 from .context import Context
 from .dataObject import DataObject, DatatypeProperty, Alias
+from .http_client import HTTPRequestError, shared_client
 
 from PyOpenWorm import bibtex as BIB
 
@@ -172,25 +170,8 @@ class Document(BaseDocument):
 
             # get the author
             try:
-                root = self.conf.get('wormbase_api_root_url', 'http://rest.wormbase.org')
-                url = root + '/rest/widget/paper/' + str(wbid) + '/overview?content-type=application%2Fjson'
-                j = _json_request(url)
-                if 'fields' in j:
-                    f = j['fields']
-                    if 'authors' in f:
-                        dat = f['authors']['data']
-                        if dat is not None:
-                            if replace_existing and self.author.has_defined_value:
-                                self.author.clear()
-                            for x in dat:
-                                self.author.set(x['label'])
-
-                    for fname in ('pmid', 'year', 'title', 'doi'):
-                        if fname in f and f[fname]['data'] is not None:
-                            attr = getattr(self, fname)
-                            if replace_existing and attr.has_defined_value:
-                                attr.clear()
-                            attr.set(f[fname]['data'])
+                j = _json_request(_wormbase_url(self.conf, wbid), self._http_client())
+                self._update_from_wormbase_json(j, replace_existing)
             except Exception:
                 logger.warning("Couldn't retrieve Wormbase data", exc_info=True)
         elif len(wbid) == 0:
@@ -200,23 +181,40 @@ class Document(BaseDocument):
             raise WormbaseRetrievalException("There is more than one Wormbase ID attached to this Document."
                                              " Please try with just one Wormbase ID")
 
+    def _update_from_wormbase_json(self, j, replace_existing=False):
+        if 'fields' in j:
+            f = j['fields']
+            if 'authors' in f:
+                dat = f['authors']['data']
+                if dat is not None:
+                    if replace_existing and self.author.has_defined_value:
+                        self.author.clear()
+                    for x in dat:
+                        self.author.set(x['label'])
+
+            for fname in ('pmid', 'year', 'title', 'doi'):
+                if fname in f and f[fname]['data'] is not None:
+                    attr = getattr(self, fname)
+                    if replace_existing and attr.has_defined_value:
+                        attr.clear()
+                    attr.set(f[fname]['data'])
+
+    def _http_client(self):
+        return shared_client(self.conf)
+
     def _crossref_doi_extract(self):
         # Extract data from crossref
-        def crRequest(doi):
-            data = {'q': doi}
-            data_encoded = urlencode(data)
-            return _json_request(
-                'http://search.labs.crossref.org/dois?%s' %
-                data_encoded)
-
         doi = self.doi()
         if doi[:4] == 'http':
             doi = _doi_uri_to_doi(doi)
         try:
-            r = crRequest(doi)
+            r = _json_request(_crossref_url(self.conf, doi), self._http_client())
         except Exception:
             logger.warning("Couldn't retrieve Crossref info", exc_info=True)
             return
+        self._update_from_crossref_json(r)
+
+    def _update_from_crossref_json(self, r):
         # XXX: I don't think coins is meant to be used, but it has structured
         # data...
         if len(r) > 0:
@@ -237,48 +235,158 @@ class Document(BaseDocument):
                     self.year(r['year'])
 
     def update_from_pubmed(self):
-        def pmRequest(pmid):
-            import xml.etree.ElementTree as ET  # Python 2.5 and up
-            url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi?db=pubmed&id=' + str(pmid)
-            key = self.get('pubmed.api_key', None)
-            if key:
-                url += '&api_key=' + key
-            else:
-                logger.warning("PubMed API key not defined. API calls will be limited.")
-            s = _url_request(url)
-            if hasattr(s, 'charset'):
-                parser = ET.XMLParser(encoding=s.charset)
-            else:
-                parser = None
-
-            return ET.parse(s, parser)
-
         pmid = self.pmid.defined_values
         if len(pmid) == 1:
             pmid = pmid[0].identifier.toPython()
             try:
-                tree = pmRequest(pmid)
+                tree = _pubmed_request(self.conf, [pmid], self._http_client())
             except Exception:
                 logger.warning("Couldn't retrieve Pubmed info", exc_info=True)
                 return
-            for x in tree.findall('./DocSum/Item[@Name="AuthorList"]/Item'):
-                self.author(x.text)
-
-            for x in tree.findall('./DocSum/Item[@Name="Title"]'):
-                self.title(x.text)
-
-            for x in tree.findall('./DocSum/Item[@Name="DOI"]'):
-                self.doi(x.text)
-
-            for x in tree.findall('./DocSum/Item[@Name="PubDate"]'):
-                self.year(x.text)
-
+            for docsum in tree.findall('./DocSum'):
+                self._update_from_docsum(docsum)
         elif len(pmid) == 0:
             raise PubmedRetrievalException('No Pubmed ID is attached to this document. Cannot retrieve Pubmed data')
         else:
             raise PubmedRetrievalException('More than one Pubmed ID is attached to this document.'
                                            ' Please try with just one Pubmed ID')
 
+    def _update_from_docsum(self, docsum):
+        for x in docsum.findall('./Item[@Name="AuthorList"]/Item'):
+            self.author(x.text)
+
+        for x in docsum.findall('./Item[@Name="Title"]'):
+            self.title(x.text)
+
+        for x in docsum.findall('./Item[@Name="DOI"]'):
+            self.doi(x.text)
+
+        for x in docsum.findall('./Item[@Name="PubDate"]'):
+            self.year(x.text)
+
+
+def update_documents(documents, sources=('pubmed', 'wormbase'), replace_existing=False,
+                     client=None, batch_size=200):
+    """
+    Look up metadata for many documents at once
+
+    Requests are made concurrently with a shared
+    `~PyOpenWorm.http_client.HTTPClient`, and PubMed summaries are requested
+    for up to `batch_size` PubMed IDs at a time. Documents are updated as by
+    `Document.update_from_pubmed`, `Document.update_from_wormbase`, and, for
+    'crossref', by their DOI. Documents without exactly one identifier for a
+    source are skipped for that source, and failed lookups are logged.
+
+    Parameters
+    ----------
+    documents : list of Document
+        The documents to update
+    sources : tuple of str
+        The services to query, in order. Any of 'pubmed', 'wormbase', and
+        'crossref'
+    replace_existing : bool
+        If True, values from WormBase replace existing values
+    client : PyOpenWorm.http_client.HTTPClient
+        The client for making requests. Defaults to the shared client for the
+        configuration of the first document
+    batch_size : int
+        The number of PubMed IDs in each request
+    """
+    documents = list(documents)
+    if not documents:
+        return
+    unknown = set(sources) - set(('pubmed', 'wormbase', 'crossref'))
+    if unknown:
+        raise ValueError('Unknown sources: ' + ', '.join(sorted(unknown)))
+    conf = documents[0].conf
+    if client is None:
+        client = shared_client(conf)
+
+    for source in sources:
+        if source == 'pubmed':
+            by_id = _documents_by_id(documents, 'pmid')
+            ids = sorted(by_id)
+            batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+            responses = client.get_many(_pubmed_url(conf, batch) for batch in batches)
+            for resp in responses:
+                if resp is None:
+                    continue
+                try:
+                    tree = _parse_xml(resp)
+                except Exception:
+                    logger.warning("Couldn't parse Pubmed info from %s", resp.url, exc_info=True)
+                    continue
+                for docsum in tree.findall('./DocSum'):
+                    for doc in by_id.get(docsum.findtext('./Id'), ()):
+                        doc._update_from_docsum(docsum)
+        else:
+            kind, url_fn = {'wormbase': ('wbid', _wormbase_url),
+                            'crossref': ('doi', _crossref_url)}[source]
+            by_id = _documents_by_id(documents, kind)
+            ids = sorted(by_id)
+            responses = client.get_many((url_fn(conf, i) for i in ids),
+                                        headers={'Accept': 'application/json'})
+            for i, resp in zip(ids, responses):
+                if resp is None:
+                    continue
+                try:
+                    j = resp.json()
+                except ValueError:
+                    logger.warning("Couldn't parse JSON data from %s", resp.url, exc_info=True)
+                    continue
+                for doc in by_id[i]:
+                    if source == 'wormbase':
+                        doc._update_from_wormbase_json(j, replace_existing)
+                    else:
+                        doc._update_from_crossref_json(j)
+
+
+def _documents_by_id(documents, kind):
+    res = dict()
+    for doc in documents:
+        values = getattr(doc, kind).defined_values
+        if len(values) != 1:
+            continue
+        ident = str(values[0].identifier.toPython())
+        if kind == 'doi' and ident[:4] == 'http':
+            ident = _doi_uri_to_doi(ident)
+        res.setdefault(ident, []).append(doc)
+    return res
+
+
+def _wormbase_url(conf, wbid):
+    root = conf.get('wormbase_api_root_url', 'http://rest.wormbase.org')
+    return root + '/rest/widget/paper/' + str(wbid) + '/overview?content-type=application%2Fjson'
+
+
+def _crossref_url(conf, doi):
+    root = conf.get('crossref_api_root_url', 'http://search.labs.crossref.org')
+    return root + '/dois?' + urlencode({'q': doi})
+
+
+def _pubmed_url(conf, pmids):
+    root = conf.get('pubmed_api_root_url', 'https://eutils.ncbi.nlm.nih.gov')
+    url = root + '/entrez/eutils/esummary.fcgi?db=pubmed&id=' + ','.join(str(x) for x in pmids)
+    key = conf.get('pubmed.api_key', None)
+    if key:
+        url += '&api_key=' + key
+    else:
+        logger.warning("PubMed API key not defined. API calls will be limited.")
+    return url
+
+
+def _pubmed_request(conf, pmids, client=None):
+    return _parse_xml(_url_request(_pubmed_url(conf, pmids), client=client))
+
+
+def _parse_xml(s):
+    import xml.etree.ElementTree as ET  # Python 2.5 and up
+    if getattr(s, 'charset', None):
+        parser = ET.XMLParser(encoding=s.charset)
+    else:
+        parser = None
+    return ET.parse(s, parser)
+
 
 def _wormbase_uri_to_wbid(uri):
     return str(urlparse(uri).path.split("/")[2])
@@ -300,38 +408,27 @@ def _doi_uri_to_doi(uri):
 
 
 class EmptyRes(object):
-    def read(self):
+    def read(self, size=-1):
         return bytes()
 
 
-def _url_request(url, headers={}):
+def _url_request(url, headers={}, client=None):
+    if client is None:
+        client = shared_client(dict())
     try:
-        r = Request(url, headers=headers)
-        s = urlopen(r, timeout=1)
-        info = dict(s.info())
-        content_type = {k.lower(): info[k] for k in info}['content-type']
-        md = re.search("charset *= *([^ ]+)", content_type)
-        if md:
-            s.charset = md.group(1)
-
-        return s
-    except HTTPError:
-        logger.error("Error in request for {}".format(url), exc_info=True)
-        return EmptyRes()
-    except URLError:
+        return client.get(url, headers)
+    except HTTPRequestError:
         logger.error("Error in request for {}".format(url), exc_info=True)
         return EmptyRes()
 
 
-def _json_request(url):
+def _json_request(url, client=None):
     import json
     headers = {'Accept': 'application/json'}
     try:
-        data = _url_request(url, headers).read().decode('UTF-8')
-        if hasattr(data, 'charset'):
-            return json.loads(data, encoding=data.charset)
-        else:
-            return json.loads(data)
+        s = _url_request(url, headers, client)
+        data = s.read().decode(getattr(s, 'charset', None) or 'UTF-8')
+        return json.loads(data)
     except BaseException:
         logger.warning("Couldn't retrieve JSON data from " + url,
                        exc_info=True)
@@ -0,0 +1,313 @@
+'''
+Bulk loading of serialized graphs into an RDF store.
+
+N-Triples files are split into line-aligned chunks which are parsed in a pool
+of worker processes. The parsed triples are sent back to the calling process
+which is the only one that writes to the store. Files in the binary format of
+`PyOpenWorm.binary_graph` need no parsing, so they're read directly from a
+memory map in the calling process.
+'''
+from __future__ import absolute_import
+from collections import deque
+from hashlib import md5
+from io import BytesIO
+from itertools import groupby, islice
+from os.path import getsize
+from time import time
+from uuid import uuid4
+import logging
+import multiprocessing
+
+from rdflib.plugins.parsers.ntriples import NTriplesParser, r_nodeid
+from rdflib.term import BNode, URIRef
+
+from . import binary_graph
+from .data import triple_hash, TRIPLE_HASH_MODULUS
+
+L = logging.getLogger(__name__)
+
+NT_FORMAT = 'nt'
+''' Name of the N-Triples format as recorded in the graphs index '''
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+''' Default number of bytes of N-Triples handed to a worker at a time '''
+
+STORE_TUNING = {
+    'zodb': dict(batch_size=10000, commit_interval=500000),
+    'sleepycat': dict(batch_size=10000, commit_interval=None),
+    'default': dict(batch_size=4000, commit_interval=None),
+}
+'''
+Default batch sizes and commit intervals for the values of the ``rdf.source``
+configuration setting
+'''
+
+
+class GraphFileLoader(object):
+    '''
+    Loads N-Triples and binary graph files into named graphs
+
+    Parameters
+    ----------
+    processes : int
+        The number of worker processes used for parsing. If 1 or less, files
+        are parsed in the calling process. Defaults to the number of CPUs
+    batch_size : int
+        The number of triples passed to each call to the destination graph's
+        ``addN``
+    commit_interval : int
+        The number of triples between calls to ``transaction.commit()``. If
+        `None`, the caller is responsible for committing
+    chunk_size : int
+        The approximate number of bytes parsed by a worker at a time
+    '''
+
+    def __init__(self, processes=None, batch_size=4000, commit_interval=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        self.processes = processes
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.chunk_size = chunk_size
+        self.triples_loaded = 0
+        self.elapsed = 0.0
+
+    @classmethod
+    def for_store(cls, source, **kwargs):
+        '''
+        Create a loader with the batch size and commit interval from
+        `STORE_TUNING` for the given ``rdf.source``
+
+        Parameters
+        ----------
+        source : str
+            The ``rdf.source`` of the destination store
+        **kwargs
+            Passed on to the constructor, overriding the store's defaults
+        '''
+        tuning = STORE_TUNING.get(str(source).lower(), STORE_TUNING['default'])
+        args = dict(tuning)
+        args.update((k, v) for k, v in kwargs.items() if v is not None)
+        return cls(**args)
+
+    @property
+    def rate(self):
+        ''' Triples per second for the files loaded so far '''
+        if not self.elapsed:
+            return 0.0
+        return self.triples_loaded / self.elapsed
+
+    def load(self, graph, files, triples_progress=None):
+        '''
+        Load files into the named graphs of `graph`
+
+        This is a generator: files are only loaded as it is iterated over.
+
+        Parameters
+        ----------
+        graph : rdflib.graph.ConjunctiveGraph
+            The destination graph
+        files : list of tuple
+            Pairs of file names and the identifiers of the contexts to load
+            them into. A third item may give the format of the file, either
+            ``'nt'`` (the default) or `~PyOpenWorm.binary_graph.FORMAT_NAME`
+        triples_progress : tqdm.tqdm
+            A progress reporter which will be updated with the number of triples
+            loaded as they are written
+
+        Yields
+        ------
+        tuple
+            The file name, context identifier, number of triples loaded, and
+            `~PyOpenWorm.data.ContextHashes` hash of the triples for each file,
+            in the order given by `files`
+        '''
+        bnode_prefix = uuid4().hex
+        self._start_time = time()
+        self._since_commit = 0
+        for fmt, run in groupby(files, key=_file_format):
+            run = [(f[0], f[1]) for f in run]
+            if fmt == NT_FORMAT:
+                loader = self._load_ntriples(graph, run, bnode_prefix, triples_progress)
+            elif fmt == binary_graph.FORMAT_NAME:
+                loader = self._load_binary(graph, run, bnode_prefix, triples_progress)
+            else:
+                raise ValueError('Unknown graph file format {}'.format(fmt))
+            for res in loader:
+                yield res
+
+    def _load_ntriples(self, graph, files, bnode_prefix, triples_progress):
+        tasks = [(fname, ctx, start, end, bnode_prefix)
+                 for fname, ctx in files
+                 for start, end in _chunks(fname, self.chunk_size)]
+        last_chunks = dict()
+        for i, task in enumerate(tasks):
+            last_chunks[task[0]] = i
+
+        unfinished = deque(files)
+        with _ChunkParser(self.processes if len(tasks) > 1 else 1) as parser:
+            count = 0
+            content_hash = 0
+            for i, (task, (triples, chunk_hash)) in enumerate(parser.parse(tasks)):
+                fname, ctx = task[0], task[1]
+                self._write(graph, ctx, triples, triples_progress)
+                count += len(triples)
+                content_hash = (content_hash + chunk_hash) % TRIPLE_HASH_MODULUS
+                if last_chunks[fname] == i:
+                    # Files before this one which had no chunks are empty
+                    while unfinished[0][0] != fname:
+                        empty_fname, empty_ctx = unfinished.popleft()
+                        yield empty_fname, empty_ctx, 0, 0
+                    unfinished.popleft()
+                    yield fname, ctx, count, content_hash
+                    count = 0
+                    content_hash = 0
+        for fname, ctx in unfinished:
+            yield fname, ctx, 0, 0
+
+    def _load_binary(self, graph, files, bnode_prefix, triples_progress):
+        def bnode_factory(b):
+            return _bnode(bnode_prefix, b)
+
+        for fname, ctx in files:
+            if getsize(fname) == 0:
+                yield fname, ctx, 0, 0
+                continue
+            with binary_graph.BinaryGraphReader.open(fname) as reader:
+                has_bnodes = reader.has_bnodes
+                # The stored hash is for the blank node labels in the file, so
+                # it only holds if there aren't any
+                content_hash = None if has_bnodes else reader.content_hash
+                triples = reader.triples(bnode_factory if has_bnodes else None)
+                count = 0
+                computed_hash = 0
+                while True:
+                    batch = list(islice(triples, self.batch_size))
+                    if not batch:
+                        break
+                    if has_bnodes:
+                        computed_hash = (computed_hash +
+                                         sum(triple_hash(t) for t in batch)) % TRIPLE_HASH_MODULUS
+                    self._write(graph, ctx, batch, triples_progress)
+                    count += len(batch)
+            yield fname, ctx, count, computed_hash if content_hash is None else content_hash
+
+    def _write(self, graph, ctx, triples, triples_progress):
+        dest = graph.get_context(URIRef(ctx))
+        for j in range(0, len(triples), self.batch_size):
+            batch = triples[j:j + self.batch_size]
+            dest.addN(t + (dest,) for t in batch)
+            if triples_progress is not None:
+                triples_progress.update(len(batch))
+        self._since_commit += len(triples)
+        self.triples_loaded += len(triples)
+        if self.commit_interval and self._since_commit >= self.commit_interval:
+            import transaction
+            transaction.commit()
+            self._since_commit = 0
+        self.elapsed = time() - self._start_time
+
+
+def _file_format(entry):
+    return entry[2] if len(entry) > 2 and entry[2] else NT_FORMAT
+
+
+def _bnode(prefix, label):
+    '''
+    A blank node for `label` in files loaded with `prefix`.
+
+    The identifier is a fixed-length digest rather than the concatenation so
+    that identifiers don't grow each time a graph is saved and loaded again
+    '''
+    return BNode('N' + md5((prefix + label).encode('utf-8')).hexdigest())
+
+
+class _ChunkParser(object):
+    '''
+    Parses chunks in a pool of processes, returning the results in the order
+    of the input with a bounded number of chunks in flight
+    '''
+
+    def __init__(self, processes):
+        self.processes = processes
+        self.pool = None
+
+    def __enter__(self):
+        if self.processes > 1:
+            self.pool = multiprocessing.Pool(self.processes)
+        return self
+
+    def parse(self, tasks):
+        if self.pool is None:
+            for task in tasks:
+                yield task, _parse_chunk(task)
+            return
+        pending = deque()
+        window = self.processes * 2
+        for task in tasks:
+            pending.append((task, self.pool.apply_async(_parse_chunk, (task,))))
+            if len(pending) >= window:
+                t, res = pending.popleft()
+                yield t, res.get()
+        while pending:
+            t, res = pending.popleft()
+            yield t, res.get()
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            if exc[0] is None:
+                self.pool.close()
+            else:
+                self.pool.terminate()
+            self.pool.join()
+
+
+def _chunks(fname, chunk_size):
+    ''' Byte ranges of `fname`, each ending at the end of a line '''
+    size = getsize(fname)
+    with open(fname, 'rb') as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()
+            end = f.tell()
+            yield start, end
+            start = end
+
+
+def _parse_chunk(task):
+    fname, _, start, end, bnode_prefix = task
+    with open(fname, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    sink = _ListSink()
+    _ChunkNTriplesParser(sink, bnode_prefix).parse(BytesIO(data))
+    chunk_hash = sum(triple_hash(t) for t in sink.triples) % TRIPLE_HASH_MODULUS
+    return sink.triples, chunk_hash
+
+
+class _ListSink(object):
+    def __init__(self):
+        self.triples = []
+
+    def triple(self, s, p, o):
+        self.triples.append((s, p, o))
+
+
+class _ChunkNTriplesParser(NTriplesParser):
+    '''
+    Parser which derives blank nodes from their labels so that a label means
+    the same node in every chunk of every file loaded together
+    '''
+
+    def __init__(self, sink, bnode_prefix):
+        super(_ChunkNTriplesParser, self).__init__(sink)
+        self.bnode_prefix = bnode_prefix
+
+    def nodeid(self):
+        if self.peek('_'):
+            label = self.eat(r_nodeid).group(1)
+            return _bnode(self.bnode_prefix, label)
+        return False
+
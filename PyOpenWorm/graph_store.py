@@ -0,0 +1,204 @@
+'''
+Writing to a remote RDF store with the SPARQL 1.1 Graph Store HTTP Protocol.
+
+Uploading triples as N-Triples documents is much faster for most stores than
+sending them in ``INSERT DATA`` updates, which the store has to parse as
+SPARQL. `GraphStoreClient` splits large uploads into requests of a bounded
+size and can upload several graphs at once, all over the pooled connections of
+an `~PyOpenWorm.http_client.HTTPClient`.
+
+A store gives the blank nodes of each request their own scope, so a blank node
+whose triples were sent in different requests would become several unrelated
+nodes. `upload_blocks` keeps the triples with blank nodes together.
+'''
+from __future__ import absolute_import
+from multiprocessing.pool import ThreadPool
+
+from rdflib.graph import Graph
+from rdflib.term import BNode
+from rdflib.plugins.serializers.nt import _nt_row
+from six.moves.urllib.parse import quote
+
+from .http_client import HTTPClient
+from .utils import chunks
+
+__all__ = ['GraphStoreClient', 'upload_blocks']
+
+NTRIPLES = 'application/n-triples'
+
+
+class GraphStoreClient(object):
+    '''
+    Reads and writes graphs at a Graph Store Protocol endpoint
+
+    Graphs are named by their identifier, or by `None` for the store's default
+    graph
+
+    Parameters
+    ----------
+    endpoint : str
+        The URL of the graph store. Graphs are addressed with the ``graph`` and
+        ``default`` query parameters
+    client : PyOpenWorm.http_client.HTTPClient
+        The client for making requests. A new one is made by default
+    request_size : int
+        The most triples sent in one request
+    max_workers : int
+        The number of requests `post_graphs` makes at once
+    '''
+
+    def __init__(self, endpoint, client=None, request_size=10000, max_workers=4):
+        if request_size < 1:
+            raise ValueError('The request size must be at least 1')
+        self.endpoint = endpoint
+        self.client = client if client is not None else HTTPClient()
+        self.request_size = request_size
+        self.max_workers = max_workers
+
+    def graph_url(self, graph=None):
+        ''' The URL for a graph '''
+        sep = '&' if '?' in self.endpoint else '?'
+        if graph is None:
+            return self.endpoint + sep + 'default'
+        return self.endpoint + sep + 'graph=' + quote(str(graph), safe='')
+
+    def get(self, graph=None):
+        '''
+        Get the triples in a graph
+
+        Returns
+        -------
+        rdflib.graph.Graph
+        '''
+        resp = self.client.request('GET', self.graph_url(graph), headers={'Accept': NTRIPLES})
+        res = Graph(identifier=graph)
+        res.parse(data=resp.text(), format='nt')
+        return res
+
+    def post(self, triples, graph=None):
+        '''
+        Add triples to a graph
+
+        Parameters
+        ----------
+        triples : iterable of tuple
+            The triples to add. They're sent as they're read, `request_size` at
+            a time, except for those with blank nodes. See `upload_blocks`
+        graph : rdflib.term.URIRef
+            The graph to add to
+
+        Returns
+        -------
+        int
+            The number of triples sent
+        '''
+        count = 0
+        for block in upload_blocks(triples, self.request_size):
+            self._send('POST', graph, _nt_body(block))
+            count += len(block)
+        return count
+
+    def put(self, triples, graph=None):
+        '''
+        Replace the triples in a graph
+
+        The triples are sent in one request, whatever `request_size` is, so
+        that the graph is replaced at once
+
+        Returns
+        -------
+        int
+            The number of triples sent
+        '''
+        triples = list(triples)
+        self._send('PUT', graph, _nt_body(triples))
+        return len(triples)
+
+    def delete(self, graph=None):
+        ''' Remove a graph '''
+        self.client.request('DELETE', self.graph_url(graph))
+
+    def post_graphs(self, graphs):
+        '''
+        Add triples to several graphs, making up to `max_workers` requests at
+        once
+
+        The triples are read on the calling thread before any are sent
+
+        Parameters
+        ----------
+        graphs : iterable of tuple
+            Pairs of a graph identifier and the triples to add to it
+
+        Returns
+        -------
+        int
+            The number of triples sent
+
+        Raises
+        ------
+        PyOpenWorm.http_client.HTTPRequestError
+            If any upload fails. The other uploads are still made
+        '''
+        graphs = list(graphs)
+        if len(graphs) <= 1 or self.max_workers <= 1:
+            return sum(self.post(triples, graph) for graph, triples in graphs)
+        # The triples may come from generators over shared objects, so they're
+        # read here rather than in the pool's threads, which only make the
+        # requests
+        uploads = []
+        count = 0
+        for graph, triples in graphs:
+            for block in upload_blocks(triples, self.request_size):
+                uploads.append((graph, _nt_body(block)))
+                count += len(block)
+        pool = ThreadPool(min(self.max_workers, len(uploads)) or 1)
+        try:
+            pool.map(lambda u: self._send('POST', u[0], u[1]), uploads)
+        finally:
+            pool.close()
+            pool.join()
+        return count
+
+    def _send(self, method, graph, body):
+        self.client.request(method, self.graph_url(graph), body=body,
+                            headers={'Content-Type': NTRIPLES})
+
+
+def upload_blocks(triples, size):
+    '''
+    Split triples into blocks to send in separate requests
+
+    Triples without blank nodes are put in blocks of `size` as they're read.
+    Triples with blank nodes are held and put together in the last block,
+    however many there are, so that each blank node is only in one request
+
+    Parameters
+    ----------
+    triples : iterable of tuple
+        The triples
+    size : int
+        The most triples without blank nodes in a block
+
+    Returns
+    -------
+    iterator of list
+        The blocks
+    '''
+    with_bnodes = []
+
+    def ground():
+        for t in triples:
+            if any(isinstance(x, BNode) for x in t):
+                with_bnodes.append(t)
+            else:
+                yield t
+
+    for block in chunks(ground(), size):
+        yield block
+    if with_bnodes:
+        yield with_bnodes
+
+
+def _nt_body(triples):
+    return ''.join(_nt_row(t) for t in triples).encode('utf-8')
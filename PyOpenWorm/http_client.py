@@ -0,0 +1,464 @@
+'''
+An HTTP client for looking up metadata from web services and for talking to
+remote stores.
+
+`HTTPClient` keeps connections open between requests to the same host,
+caches responses on disk, revalidating them with their ``ETag`` or
+``Last-Modified`` headers once they're older than a time-to-live, and limits
+the rate of requests to hosts which ask for it. `shared_client` returns a
+client shared by everything using the same configuration.
+'''
+from __future__ import absolute_import
+import hashlib
+from io import BytesIO
+import json
+import logging
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from six.moves import http_client
+from six.moves.urllib.parse import urlparse, urljoin
+
+__all__ = ['HTTPClient', 'HTTPRequestError', 'Response', 'ResponseCache', 'RateLimiter',
+           'shared_client']
+
+L = logging.getLogger(__name__)
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 5
+_IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+
+
+class HTTPRequestError(Exception):
+    ''' Raised for a request which fails or gets an error status '''
+
+    def __init__(self, url, message, status=None):
+        super(HTTPRequestError, self).__init__('{}: {}'.format(url, message))
+        self.url = url
+        self.status = status
+
+
+class Response(object):
+    '''
+    A response read into memory
+
+    Attributes
+    ----------
+    url : str
+        The URL requested
+    status : int
+        The HTTP status
+    headers : dict
+        The response headers with lower-case names
+    body : bytes
+        The response body
+    from_cache : bool
+        True if the body was read from the cache
+    '''
+
+    def __init__(self, url, status, headers, body, from_cache=False):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.from_cache = from_cache
+        self._stream = BytesIO(body)
+
+    @property
+    def charset(self):
+        ''' The character set from the ``Content-Type`` header, if any '''
+        md = re.search('charset *= *([^ ;]+)', self.headers.get('content-type', ''))
+        return md.group(1) if md else None
+
+    def read(self, size=-1):
+        ''' Read the body like a file '''
+        return self._stream.read(size)
+
+    def text(self):
+        ''' The body decoded with its `charset`, UTF-8 by default '''
+        return self.body.decode(self.charset or 'UTF-8')
+
+    def json(self):
+        ''' The body parsed as JSON '''
+        return json.loads(self.text())
+
+
+class ResponseCache(object):
+    '''
+    Responses stored in a directory, one pair of files for each
+
+    Parameters
+    ----------
+    directory : str
+        The directory for the cache. Created if it doesn't exist
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, url, headers):
+        ''' The cache key for a request '''
+        data = url + '\n' + '\n'.join('{}: {}'.format(k.lower(), v)
+                                      for k, v in sorted(headers.items()))
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key + ext)
+
+    def get(self, key):
+        '''
+        Get a cached response
+
+        Returns
+        -------
+        tuple
+            The metadata stored with the response and the response body, or
+            `None` if there's no response for `key`
+        '''
+        try:
+            with open(self._path(key, '.json'), 'r') as f:
+                meta = json.load(f)
+            with open(self._path(key, '.body'), 'rb') as f:
+                body = f.read()
+        except (IOError, OSError, ValueError):
+            return None
+        return meta, body
+
+    def put(self, key, meta, body):
+        ''' Store a response with its metadata '''
+        # The body is written first so that any metadata read is for a
+        # complete body
+        self._write(key, '.body', body)
+        self._write(key, '.json', json.dumps(meta).encode('utf-8'))
+
+    def touch(self, key, meta):
+        ''' Replace the metadata for a response '''
+        self._write(key, '.json', json.dumps(meta).encode('utf-8'))
+
+    def _write(self, key, ext, data):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.' + key)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(tmp, self._path(key, ext))
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+
+class RateLimiter(object):
+    '''
+    Spaces out calls to `wait` so there are at most a given number per second
+
+    Parameters
+    ----------
+    per_second : float
+        The number of calls allowed each second
+    '''
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        ''' Block until another request may be made '''
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class HTTPClient(object):
+    '''
+    Makes HTTP requests, reusing connections and caching responses to GET
+    requests
+
+    Parameters
+    ----------
+    cache_dir : str
+        A directory to cache responses in. If `None`, responses aren't cached
+    ttl : float
+        Seconds a cached response is used without checking with the server. A
+        ``max-age`` in a response's ``Cache-Control`` header takes precedence
+    timeout : float
+        Seconds to wait for a connection or for data from the server
+    rate_limits : dict
+        Maps host names to the number of requests allowed to them per second
+    max_workers : int
+        The number of requests `get_many` makes at once
+    '''
+
+    def __init__(self, cache_dir=None, ttl=24 * 60 * 60, timeout=10, rate_limits=None,
+                 max_workers=8):
+        self.cache = None if cache_dir is None else ResponseCache(cache_dir)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.connections_opened = 0
+        self._limiters = dict((host, RateLimiter(n))
+                              for host, n in (rate_limits or dict()).items())
+        self._idle = dict()
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        '''
+        Get a URL
+
+        Parameters
+        ----------
+        url : str
+            The URL. Must be ``http`` or ``https``
+        headers : dict
+            Request headers
+
+        Returns
+        -------
+        Response
+
+        Raises
+        ------
+        HTTPRequestError
+            If the request fails or the response has an error status
+        '''
+        headers = dict(headers or ())
+        key = None
+        cached = None
+        if self.cache is not None:
+            key = self.cache.key(url, headers)
+            cached = self.cache.get(key)
+        if cached is not None:
+            meta, body = cached
+            if meta['expires'] > time.time():
+                return Response(url, meta['status'], meta['headers'], body, from_cache=True)
+            if meta['headers'].get('etag'):
+                headers['If-None-Match'] = meta['headers']['etag']
+            if meta['headers'].get('last-modified'):
+                headers['If-Modified-Since'] = meta['headers']['last-modified']
+
+        status, resp_headers, body = self._fetch(url, headers)
+        if status == 304 and cached is not None:
+            meta['expires'] = self._expires(resp_headers)
+            self.cache.touch(key, meta)
+            return Response(url, meta['status'], meta['headers'], cached[1], from_cache=True)
+        if status >= 400:
+            raise HTTPRequestError(url, 'HTTP status {}'.format(status), status)
+        if (key is not None and status == 200 and
+                'no-store' not in resp_headers.get('cache-control', '')):
+            self.cache.put(key, dict(url=url,
+                                     status=status,
+                                     headers=resp_headers,
+                                     expires=self._expires(resp_headers)),
+                           body)
+        return Response(url, status, resp_headers, body)
+
+    def get_many(self, urls, headers=None):
+        '''
+        Get several URLs at once
+
+        Failed requests are logged
+
+        Parameters
+        ----------
+        urls : list of str
+            The URLs
+        headers : dict
+            Request headers for every request
+
+        Returns
+        -------
+        list
+            A `Response` for each URL, or `None` where the request failed
+        '''
+        def get(url):
+            try:
+                return self.get(url, headers)
+            except HTTPRequestError:
+                L.warning("Couldn't retrieve %s", url, exc_info=True)
+                return None
+
+        urls = list(urls)
+        if len(urls) <= 1 or self.max_workers <= 1:
+            return [get(url) for url in urls]
+        pool = ThreadPool(min(self.max_workers, len(urls)))
+        try:
+            return pool.map(get, urls)
+        finally:
+            pool.close()
+            pool.join()
+
+    def request(self, method, url, body=None, headers=None):
+        '''
+        Make a request which isn't cached, like a ``PUT`` or ``POST``
+
+        Redirects aren't followed. If a pooled connection fails, the request is
+        made again on a new one, unless the server may have received it and the
+        method isn't idempotent, as with ``POST``
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method
+        url : str
+            The URL. Must be ``http`` or ``https``
+        body : bytes
+            The request body
+        headers : dict
+            Request headers
+
+        Returns
+        -------
+        Response
+
+        Raises
+        ------
+        HTTPRequestError
+            If the request fails or the response has an error status
+        '''
+        status, resp_headers, resp_body = self._request(url, dict(headers or ()), method, body)
+        if status >= 400:
+            raise HTTPRequestError(url, 'HTTP status {}'.format(status), status)
+        return Response(url, status, resp_headers, resp_body)
+
+    def close(self):
+        ''' Close idle connections '''
+        with self._lock:
+            idle = self._idle
+            self._idle = dict()
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _expires(self, headers):
+        md = re.search(r'max-age *= *(\d+)', headers.get('cache-control', ''))
+        return time.time() + (int(md.group(1)) if md else self.ttl)
+
+    def _fetch(self, url, headers):
+        for _ in range(_MAX_REDIRECTS + 1):
+            status, resp_headers, body = self._request(url, headers)
+            if status not in _REDIRECTS or 'location' not in resp_headers:
+                return status, resp_headers, body
+            url = urljoin(url, resp_headers['location'])
+        raise HTTPRequestError(url, 'Too many redirects')
+
+    def _request(self, url, headers, method='GET', body=None):
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            raise HTTPRequestError(url, 'Unsupported URL scheme')
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+
+        limiter = self._limiters.get(parsed.hostname)
+        if limiter is not None:
+            limiter.wait()
+
+        conn, reused = self._connection(key)
+        try:
+            sent = False
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                sent = True
+                resp = conn.getresponse()
+            except (socket.error, http_client.HTTPException):
+                conn.close()
+                # The server may have closed an idle connection, so try again
+                # once on a new one. A request the server may have received is
+                # only sent again if doing it twice is the same as doing it once
+                if not reused or (sent and method not in _IDEMPOTENT_METHODS):
+                    raise
+                conn, _ = self._connection(key, new=True)
+                resp = self._send(conn, method, path, headers, body)
+            body = resp.read()
+        except (socket.error, http_client.HTTPException) as e:
+            conn.close()
+            raise HTTPRequestError(url, 'Request failed: {}'.format(e))
+
+        resp_headers = dict((k.lower(), v) for k, v in resp.getheaders())
+        if resp.will_close:
+            conn.close()
+        else:
+            with self._lock:
+                self._idle.setdefault(key, []).append(conn)
+        return resp.status, resp_headers, body
+
+    def _send(self, conn, method, path, headers, body):
+        conn.request(method, path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def _connection(self, key, new=False):
+        if not new:
+            with self._lock:
+                idle = self._idle.get(key)
+                if idle:
+                    return idle.pop(), True
+        scheme, host, port = key
+        if scheme == 'https':
+            conn = http_client.HTTPSConnection(host, port, timeout=self.timeout)
+        else:
+            conn = http_client.HTTPConnection(host, port, timeout=self.timeout)
+        self.connections_opened += 1
+        return conn, False
+
+
+_shared_clients = dict()
+_shared_clients_lock = threading.Lock()
+
+PUBMED_HOST = 'eutils.ncbi.nlm.nih.gov'
+''' The host for PubMed's E-utilities '''
+
+
+def shared_client(conf):
+    '''
+    Get the client shared by everything with the same HTTP configuration
+
+    The configuration values are:
+
+    ``http.cache_dir``
+        A directory for caching responses. Responses are not cached by default
+    ``http.cache_ttl``
+        Seconds to use a cached response without checking with the server.
+        Defaults to a day
+    ``http.timeout``
+        Seconds to wait for a server. Defaults to 10
+    ``http.max_workers``
+        The number of requests made at once for bulk lookups. Defaults to 8
+    ``pubmed.api_key``
+        If set, requests to PubMed are limited to 10 per second instead of 3,
+        as the E-utilities allow
+
+    Parameters
+    ----------
+    conf : PyOpenWorm.configure.Configure
+        The configuration
+
+    Returns
+    -------
+    HTTPClient
+    '''
+    pubmed_rate = 10 if conf.get('pubmed.api_key', None) else 3
+    params = (conf.get('http.cache_dir', None),
+              float(conf.get('http.cache_ttl', 24 * 60 * 60)),
+              float(conf.get('http.timeout', 10)),
+              int(conf.get('http.max_workers', 8)),
+              pubmed_rate)
+    with _shared_clients_lock:
+        client = _shared_clients.get(params)
+        if client is None:
+            client = HTTPClient(cache_dir=params[0],
+                                ttl=params[1],
+                                timeout=params[2],
+                                max_workers=params[3],
+                                rate_limits={PUBMED_HOST: pubmed_rate})
+            _shared_clients[params] = client
+    return client
@@ -0,0 +1,450 @@
+'''
+A read-only RDF store backed by a memory-mapped index file.
+
+The index file holds every quad of a store four times, sorted in subject,
+predicate, object, and context order, so that any triple pattern, in the whole
+store or in one context, is answered by a binary search and a contiguous
+scan. Terms are replaced by integer ids that
+index into a sorted term table, which is itself searched in place. Nothing is
+decoded up front, so opening an index costs about the same however large it
+is, and since the file is only ever read through a shared memory map, the
+operating system's page cache holds a single copy for every process reading
+it::
+
+    header      magic, version, counts, and section offsets
+    term index  offsets of each term in the term table
+    terms       terms as written by `PyOpenWorm.binary_graph.encode_term`,
+                sorted by their encoding
+    spoc        (subject, predicate, object, context) ids, sorted
+    posc        (predicate, object, subject, context) ids, sorted
+    ospc        (object, subject, predicate, context) ids, sorted
+    cspo        (context, subject, predicate, object) ids, sorted
+    contexts    context ids with the number of triples in each
+    namespaces  prefix and namespace pairs
+
+Index files are written with `write_index`, usually with ``pow mmap_index``.
+Files of the first version, without ``cspo``, can still be read.
+'''
+from __future__ import absolute_import
+from array import array
+import mmap
+import struct
+import tempfile
+
+from rdflib.graph import Graph
+from rdflib.store import Store, VALID_STORE, NO_STORE
+from rdflib.term import URIRef
+
+from .binary_graph import encode_term, decode_term
+from .utils import external_sort
+
+__all__ = ['MAGIC', 'write_index', 'MmapStore', 'ReadOnlyStoreError']
+
+MAGIC = b'POWMMAPX'
+VERSION = 2
+
+_HEADER = struct.Struct('<8sII' + 'Q' * 13)
+_HEADER_V1 = struct.Struct('<8sII' + 'Q' * 12)
+_MAGIC_VERSION = struct.Struct('<8sI')
+_QUAD = struct.Struct('<4I')
+_OFFSET = struct.Struct('<Q')
+_CONTEXT = struct.Struct('<IQ')
+_U32 = struct.Struct('<I')
+
+# Positions of subject, predicate, object, and context in each ordering, and
+# the inverse, for getting back to subject, predicate, object from the triple
+# part of a quad in the ordering
+_ORDERS = {
+    'spoc': (0, 1, 2, 3),
+    'posc': (1, 2, 0, 3),
+    'ospc': (2, 0, 1, 3),
+    'cspo': (3, 0, 1, 2),
+}
+_UNPERMUTE = {
+    'spoc': (0, 1, 2),
+    'posc': (2, 0, 1),
+    'ospc': (1, 2, 0),
+    'cspo': (0, 1, 2),
+}
+
+# The number of quads read from the temporary file at a time by `write_index`
+_READ_SIZE = 10000
+
+
+class ReadOnlyStoreError(Exception):
+    ''' Raised when attempting to change a `MmapStore` '''
+
+
+def write_index(graph, f):
+    '''
+    Write the index for an `MmapStore` from another store
+
+    The quads are sorted with `~PyOpenWorm.utils.external_sort` by way of a
+    temporary file, so they don't have to fit in memory. Every distinct term is
+    held in memory while the index is written, though
+
+    Parameters
+    ----------
+    graph : rdflib.graph.ConjunctiveGraph
+        The graph to index. Every context is included
+    f : file object
+        A seekable file opened for writing in binary mode
+
+    Returns
+    -------
+    int
+        The number of quads written
+    '''
+    start = f.tell()
+    f.write(b'\0' * _HEADER.size)
+
+    with tempfile.TemporaryFile() as quads:
+        return _write_index(graph, f, start, quads)
+
+
+def _write_index(graph, f, start, quads):
+    # Ids are assigned in order of appearance at first and then remapped so
+    # that they're in the order of the sorted term table. The quads of first
+    # ids are kept in the `quads` file until they're sorted
+    ids = dict()
+    context_counts = dict()
+    quad_count = 0
+    for s, p, o, c in graph.quads((None, None, None, None)):
+        ctx = c.identifier if isinstance(c, Graph) else c
+        for term in (s, p, o, ctx):
+            if term not in ids:
+                ids[term] = len(ids)
+        quads.write(_QUAD.pack(ids[s], ids[p], ids[o], ids[ctx]))
+        quad_count += 1
+        context_counts[ids[ctx]] = context_counts.get(ids[ctx], 0) + 1
+
+    encoded = sorted((encode_term(term), i) for term, i in ids.items())
+    ids = None
+    remap = array('L', [0]) * len(encoded)
+    for new_id, (_, old_id) in enumerate(encoded):
+        remap[old_id] = new_id
+
+    offsets = dict()
+    offsets['term_index'] = f.tell() - start
+    pos = 0
+    for enc, _ in encoded:
+        f.write(_OFFSET.pack(pos))
+        pos += len(enc)
+    f.write(_OFFSET.pack(pos))
+
+    offsets['terms'] = f.tell() - start
+    for enc, _ in encoded:
+        f.write(enc)
+    term_count = len(encoded)
+    encoded = None
+
+    triple_count = 0
+    for name in ('spoc', 'posc', 'ospc', 'cspo'):
+        order = _ORDERS[name]
+        offsets[name] = f.tell() - start
+
+        def permuted():
+            quads.seek(0)
+            while True:
+                data = quads.read(_QUAD.size * _READ_SIZE)
+                if not data:
+                    break
+                for i in range(0, len(data), _QUAD.size):
+                    q = _QUAD.unpack_from(data, i)
+                    yield tuple(remap[q[k]] for k in order)
+
+        last = None
+        for quad in external_sort(permuted()):
+            f.write(_QUAD.pack(*quad))
+            if name == 'spoc' and quad[:3] != last:
+                triple_count += 1
+                last = quad[:3]
+
+    offsets['contexts'] = f.tell() - start
+    ctx_counts = sorted((remap[c], n) for c, n in context_counts.items())
+    for ctx_id, n in ctx_counts:
+        f.write(_CONTEXT.pack(ctx_id, n))
+
+    offsets['namespaces'] = f.tell() - start
+    namespaces = list(graph.namespaces())
+    for prefix, namespace in namespaces:
+        for s in (prefix, namespace):
+            data = u'{}'.format(s).encode('utf-8')
+            f.write(_U32.pack(len(data)) + data)
+    end = f.tell()
+
+    f.seek(start)
+    f.write(_HEADER.pack(MAGIC, VERSION, 0,
+                         quad_count, triple_count, term_count, len(ctx_counts),
+                         len(namespaces),
+                         offsets['term_index'], offsets['terms'],
+                         offsets['spoc'], offsets['posc'], offsets['ospc'],
+                         offsets['cspo'], offsets['contexts'], offsets['namespaces']))
+    f.seek(end)
+    return quad_count
+
+
+class MmapStore(Store):
+    '''
+    A read-only, context-aware store over an index file written by
+    `write_index`
+
+    The configuration passed to `open` is the path to the index file.
+    '''
+
+    context_aware = True
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self._buf = None
+        self._file = None
+        self._term_cache = dict()
+        self._graphs = dict()
+        self._bindings = dict()
+        super(MmapStore, self).__init__(configuration, identifier)
+
+    def open(self, configuration, create=False):
+        try:
+            f = open(configuration, 'rb')
+        except IOError:
+            return NO_STORE
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(buf) < _MAGIC_VERSION.size:
+                raise ValueError('Too short to be an index')
+            magic, version = _MAGIC_VERSION.unpack_from(buf, 0)
+            if magic != MAGIC:
+                raise ValueError('Not an mmap store index')
+            if version not in (1, VERSION):
+                raise ValueError('Unsupported mmap store index version {}'.format(version))
+            header_struct = _HEADER if version == VERSION else _HEADER_V1
+            if len(buf) < header_struct.size:
+                raise ValueError('Too short to be an index')
+            header = header_struct.unpack_from(buf, 0)
+        except Exception:
+            f.close()
+            raise
+        if version == 1:
+            header = header[:13] + (None,) + header[13:]
+        (_, _, _, self._quad_count, self._triple_count, self._term_count,
+         self._context_count, namespace_count, self._term_index_offset,
+         self._terms_offset, spoc, posc, ospc, cspo, self._contexts_offset,
+         namespaces_offset) = header
+        self._index_offsets = dict(spoc=spoc, posc=posc, ospc=ospc)
+        if cspo is not None:
+            self._index_offsets['cspo'] = cspo
+        self._file = f
+        self._buf = buf
+        self._term_cache = dict()
+        self._graphs = dict()
+        self._bindings = dict()
+        pos = namespaces_offset
+        for _ in range(namespace_count):
+            pair = []
+            for _ in range(2):
+                n = _U32.unpack_from(buf, pos)[0]
+                pair.append(buf[pos + 4:pos + 4 + n].decode('utf-8'))
+                pos += 4 + n
+            self._bindings[pair[0]] = URIRef(pair[1])
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        if self._buf is not None:
+            self._buf.close()
+            self._file.close()
+            self._buf = None
+            self._file = None
+
+    def _encoded(self, i):
+        start, end = struct.unpack_from('<QQ', self._buf, self._term_index_offset + 8 * i)
+        return self._buf[self._terms_offset + start:self._terms_offset + end]
+
+    def _term(self, i):
+        term = self._term_cache.get(i)
+        if term is None:
+            term = self._decode(i)
+            self._term_cache[i] = term
+        return term
+
+    def _decode(self, i):
+        start = _OFFSET.unpack_from(self._buf, self._term_index_offset + 8 * i)[0]
+        return decode_term(self._buf, self._terms_offset + start)[0]
+
+    def _id(self, term):
+        ''' The id of `term`, or `None` if it isn't in the store '''
+        try:
+            key = encode_term(term)
+        except ValueError:
+            return None
+        lo, hi = 0, self._term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            enc = self._encoded(mid)
+            if enc < key:
+                lo = mid + 1
+            elif enc > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _quad(self, name, i):
+        return _QUAD.unpack_from(self._buf, self._index_offsets[name] + _QUAD.size * i)
+
+    def _bound(self, name, prefix, upper):
+        ''' Binary search for the first quad in `name` at (or after, if upper) `prefix` '''
+        n = len(prefix)
+        lo, hi = 0, self._quad_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key = self._quad(name, mid)[:n]
+            if key < prefix or (upper and key == prefix):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _context_graph(self, i):
+        g = self._graphs.get(i)
+        if g is None:
+            g = Graph(store=self, identifier=self._term(i))
+            self._graphs[i] = g
+        return g
+
+    def triples(self, triple_pattern, context=None):
+        if self._buf is None:
+            return
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+            else:
+                i = self._id(term)
+                if i is None:
+                    return
+                ids.append(i)
+        ctx_id = None
+        if context is not None:
+            ctx_id = self._id(getattr(context, 'identifier', context))
+            if ctx_id is None:
+                return
+
+        s, p, o = ids
+        check = None
+        if ctx_id is not None and 'cspo' in self._index_offsets and (s is not None or o is None):
+            # Triples in one context are adjacent in cspo. Terms bound after
+            # the first unbound one are checked as the quads are read
+            name, prefix = 'cspo', (ctx_id,)
+            for i in ids:
+                if i is None:
+                    break
+                prefix += (i,)
+            if len(prefix) < 4 and any(i is not None for i in ids[len(prefix) - 1:]):
+                check = ids
+        elif s is not None:
+            if p is not None:
+                name, prefix = 'spoc', (s, p) if o is None else (s, p, o)
+            elif o is not None:
+                name, prefix = 'ospc', (o, s)
+            else:
+                name, prefix = 'spoc', (s,)
+        elif p is not None:
+            name, prefix = 'posc', (p,) if o is None else (p, o)
+        elif o is not None:
+            name, prefix = 'ospc', (o,)
+        else:
+            name, prefix = 'spoc', ()
+
+        unpermute = _UNPERMUTE[name]
+        start = self._bound(name, prefix, False)
+        end = self._bound(name, prefix, True)
+        if name == 'cspo':
+            # Each triple is in the one context, once
+            for i in range(start, end):
+                quad = self._quad(name, i)
+                if check is None or all(x is None or x == y for x, y in zip(check, quad[1:])):
+                    yield self._triple(quad[1:], unpermute), iter([self._context_graph(ctx_id)])
+            return
+        # Contexts come last in the other orderings, so the quads for a triple
+        # are adjacent
+        last = None
+        contexts = []
+        for i in range(start, end):
+            quad = self._quad(name, i)
+            if ctx_id is not None and quad[3] != ctx_id:
+                continue
+            if quad[:3] != last:
+                if last is not None:
+                    yield self._triple(last, unpermute), iter(contexts)
+                last = quad[:3]
+                contexts = []
+            contexts.append(self._context_graph(quad[3]))
+        if last is not None:
+            yield self._triple(last, unpermute), iter(contexts)
+
+    def _triple(self, key, unpermute):
+        return (self._term(key[unpermute[0]]),
+                self._term(key[unpermute[1]]),
+                self._term(key[unpermute[2]]))
+
+    def __len__(self, context=None):
+        if self._buf is None:
+            return 0
+        if context is None:
+            return self._triple_count
+        ctx_id = self._id(getattr(context, 'identifier', context))
+        if ctx_id is None:
+            return 0
+        lo, hi = 0, self._context_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i, n = _CONTEXT.unpack_from(self._buf, self._contexts_offset + _CONTEXT.size * mid)
+            if i < ctx_id:
+                lo = mid + 1
+            elif i > ctx_id:
+                hi = mid
+            else:
+                return n
+        return 0
+
+    def contexts(self, triple=None):
+        if self._buf is None:
+            return
+        if triple is None:
+            for k in range(self._context_count):
+                i = _CONTEXT.unpack_from(self._buf, self._contexts_offset + _CONTEXT.size * k)[0]
+                yield self._context_graph(i)
+        else:
+            seen = set()
+            for _, contexts in self.triples(triple):
+                for c in contexts:
+                    if c.identifier not in seen:
+                        seen.add(c.identifier)
+                        yield c
+
+    def bind(self, prefix, namespace):
+        self._bindings[prefix] = namespace
+
+    def namespace(self, prefix):
+        return self._bindings.get(prefix)
+
+    def prefix(self, namespace):
+        for prefix, ns in self._bindings.items():
+            if ns == namespace:
+                return prefix
+        return None
+
+    def namespaces(self):
+        for prefix, namespace in self._bindings.items():
+            yield prefix, namespace
+
+    def _read_only(self, *args, **kwargs):
+        raise ReadOnlyStoreError('The mmap store is read-only')
+
+    add = _read_only
+    addN = _read_only
+    remove = _read_only
+    add_graph = _read_only
+    remove_graph = _read_only
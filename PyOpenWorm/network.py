@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
 
+from rdflib.namespace import RDF
+import six
+
 from .dataObject import ObjectProperty, Alias
-from .connection import Connection
+from .cell import Cell
+from .connection import Connection, SynapseType
 from .neuron import Neuron
 from .biology import BiologyType
 from .worm_common import WORM_RDF_TYPE
@@ -31,6 +35,8 @@ class Network(BiologyType):
         if worm is not None:
             self.worm(worm)
 
+        self._adjacency_cache = dict()
+
     def neuron_names(self):
         """
         Gets the complete set of neurons' names in this network.
@@ -79,13 +85,7 @@ class Network(BiologyType):
         :rtype: iter(Neuron)
         """
 
-        n = Neuron.contextualize(self.context)()
-        n.type('sensory')
-
-        self.neuron.set(n)
-        res = list(n.load())
-        self.neuron.unset(n)
-        return res
+        return self._neurons_of_type('sensory')
 
     def interneurons(self):
         """
@@ -95,13 +95,7 @@ class Network(BiologyType):
         :rtype: iter(Neuron)
         """
 
-        n = Neuron.contextualize(self.context)()
-        n.type('interneuron')
-
-        self.neuron.set(n)
-        res = list(n.load())
-        self.neuron.unset(n)
-        return res
+        return self._neurons_of_type('interneuron')
 
     def motor(self):
         """
@@ -111,14 +105,119 @@ class Network(BiologyType):
         :rtype: iter(Neuron)
         """
 
+        return self._neurons_of_type('motor')
+
+    def _neurons_of_type(self, typ):
+        # A neuron of a single type in a defined network is answered from the
+        # graph's LiteralIndex by `load`
         n = Neuron.contextualize(self.context)()
-        n.type('motor')
+        n.type(typ)
 
         self.neuron.set(n)
         res = list(n.load())
         self.neuron.unset(n)
         return res
 
+    def to_adjacency(self, syntype=None, weight='number'):
+        """
+        Get the connections in this network as a sparse adjacency matrix
+
+        The matrix is built in one pass over the connections' triples and kept
+        until a triple is added to or removed from any of the contexts the
+        network is read from. NumPy and SciPy must be installed. They can be
+        installed with the ``adjacency`` extra: ``pip install
+        PyOpenWorm[adjacency]``.
+
+        If the network isn't defined, the matrix has every connection in its
+        context.
+
+        Example::
+
+            >>> adj = net.to_adjacency(syntype='gapJunction', weight=None)
+            >>> adj.degree('AVAL')
+            >>> adj.shortest_path_length('AVAL', 'PVCL')
+
+        Parameters
+        ----------
+        syntype : str
+            Only connections of this type, 'send' or 'gapJunction'. By default,
+            all connections are included
+        weight : str
+            The name of the `~PyOpenWorm.connection.Connection` property with
+            the weight of each connection. If None, each connection has weight
+            1. Optional
+
+        Returns
+        -------
+        PyOpenWorm.adjacency.Adjacency
+        """
+        if syntype is not None:
+            syntype = {'send': SynapseType.Chemical,
+                       'gapjunction': SynapseType.GapJunction}.get(syntype.lower(), syntype)
+        key = (syntype, weight)
+        version = self._adjacency_version()
+        cached = self._adjacency_cache.get(key)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+
+        res = self._build_adjacency(syntype, weight)
+        self._adjacency_cache[key] = (version, res)
+        return res
+
+    def _adjacency_version(self):
+        tracker = self.conf.get('rdf.graph.change_tracker', None)
+        if tracker is None:
+            return self.conf.get('rdf.graph.change_counter', None)
+        store = self.rdf.store
+        contexts = sorted(getattr(c, 'identifier', c) for c in store.contexts())
+        return (tracker.serial,
+                tuple(tracker.context_version(c) for c in contexts),
+                getattr(self.context, '_change_counter', None))
+
+    def _build_adjacency(self, syntype, weight):
+        from .adjacency import Adjacency
+
+        graph = self.rdf
+        if self.defined:
+            conns = set(graph.objects(self.identifier, Network.synapse.link))
+        else:
+            conns = set(graph.subjects(RDF.type, Connection.rdf_type))
+
+        def values(prop):
+            res = dict()
+            for s, o in graph.subject_objects(prop.link):
+                if s in conns:
+                    res.setdefault(s, []).append(o)
+            return res
+
+        pres = values(Connection.pre_cell)
+        posts = values(Connection.post_cell)
+        if syntype is not None:
+            syntypes = values(Connection.syntype)
+            conns = set(c for c in conns
+                        if any(six.text_type(t) == syntype for t in syntypes.get(c, ())))
+        weights = None
+        if weight is not None:
+            weights = values(getattr(Connection, weight))
+
+        names = dict()
+        for s, o in graph.subject_objects(Cell.name.link):
+            names.setdefault(s, six.text_type(o))
+
+        def cell_name(ident):
+            return names.get(ident, six.text_type(ident))
+
+        edges = []
+        for c in conns:
+            if c not in pres or c not in posts:
+                continue
+            if weights is None:
+                w = 1
+            else:
+                w = sum(float(x.toPython()) for x in weights.get(c, ()))
+            edges.append((cell_name(pres[c][0]), cell_name(posts[c][0]), w))
+        return Adjacency.from_edges(edges)
+
     def identifier_augment(self):
         return self.make_identifier(self.worm.defined_values[0].identifier.n3())
 
@@ -0,0 +1,112 @@
+'''
+An RDF store which keeps changes in memory over another, read-only store.
+'''
+from __future__ import absolute_import
+
+from rdflib.graph import Graph
+from rdflib.plugins.memory import IOMemory
+from rdflib.store import Store, VALID_STORE
+
+__all__ = ['OverlayStore']
+
+
+class OverlayStore(Store):
+    '''
+    A context-aware store which answers queries from a base store and an
+    in-memory overlay, and which writes only to the overlay
+
+    Triples in the base store can't be removed: removing a triple only removes
+    it from the overlay.
+
+    Parameters
+    ----------
+    base : rdflib.store.Store
+        The store to read from. Usually read-only, like a
+        `~PyOpenWorm.mmap_store.MmapStore`
+    '''
+
+    context_aware = True
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, base, configuration=None, identifier=None):
+        self.base = base
+        self.overlay = IOMemory()
+        self._graphs = dict()
+        super(OverlayStore, self).__init__(configuration, identifier)
+
+    def open(self, configuration, create=False):
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        self.base.close(commit_pending_transaction)
+
+    def _context_graph(self, ctx):
+        ident = getattr(ctx, 'identifier', ctx)
+        g = self._graphs.get(ident)
+        if g is None:
+            g = Graph(store=self, identifier=ident)
+            self._graphs[ident] = g
+        return g
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        self.overlay.add(triple, self._context_graph(context), quoted)
+
+    def remove(self, triple_pattern, context=None):
+        Store.remove(self, triple_pattern, context)
+        if context is not None:
+            context = self._context_graph(context)
+        self.overlay.remove(triple_pattern, context)
+
+    def triples(self, triple_pattern, context=None):
+        overlay_ctx = None if context is None else self._context_graph(context)
+        added = dict()
+        for triple, contexts in self.overlay.triples(triple_pattern, overlay_ctx):
+            added[triple] = list(contexts)
+        base_ctx = None
+        if context is not None:
+            base_ctx = Graph(store=self.base, identifier=getattr(context, 'identifier', context))
+        for triple, contexts in self.base.triples(triple_pattern, base_ctx):
+            contexts = [self._context_graph(c) for c in contexts]
+            idents = set(c.identifier for c in contexts)
+            for c in added.pop(triple, ()):
+                if c.identifier not in idents:
+                    contexts.append(c)
+            yield triple, iter(contexts)
+        for triple, contexts in added.items():
+            yield triple, iter(contexts)
+
+    def __len__(self, context=None):
+        return sum(1 for _ in self.triples((None, None, None), context))
+
+    def contexts(self, triple=None):
+        seen = set()
+        for store in (self.base, self.overlay):
+            for c in store.contexts(triple):
+                ident = getattr(c, 'identifier', c)
+                if ident not in seen:
+                    seen.add(ident)
+                    yield self._context_graph(ident)
+
+    def bind(self, prefix, namespace):
+        self.overlay.bind(prefix, namespace)
+
+    def namespace(self, prefix):
+        ns = self.overlay.namespace(prefix)
+        if ns is None:
+            ns = self.base.namespace(prefix)
+        return ns
+
+    def prefix(self, namespace):
+        prefix = self.overlay.prefix(namespace)
+        if prefix is None:
+            prefix = self.base.prefix(namespace)
+        return prefix
+
+    def namespaces(self):
+        bound = dict(self.base.namespaces())
+        bound.update(self.overlay.namespaces())
+        for prefix, namespace in bound.items():
+            yield prefix, namespace
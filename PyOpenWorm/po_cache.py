@@ -0,0 +1,156 @@
+"""
+A process-wide cache of predicate-object pairs shared between DataObjects.
+
+Each entry holds the :class:`~PyOpenWorm.simpleProperty.POCache` for a subject
+in a graph. Entries are only returned while the graph version recorded with
+them matches the current version (see
+:class:`PyOpenWorm.data.ChangeTracker`), so changes made to the graph
+invalidate the entries for the subjects they touch.
+"""
+from __future__ import absolute_import
+from collections import OrderedDict, namedtuple
+from threading import RLock
+import sys
+
+__all__ = ['PredicateObjectCache', 'PredicateObjectCacheStats', 'shared_po_cache']
+
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class PredicateObjectCacheStats(namedtuple('PredicateObjectCacheStats', ('hits',
+                                                                         'misses',
+                                                                         'evictions',
+                                                                         'invalidations',
+                                                                         'entries',
+                                                                         'bytes'))):
+    """ Statistics for a `PredicateObjectCache` """
+    __slots__ = ()
+
+
+class PredicateObjectCache(object):
+    """
+    A size-bounded, least-recently-used cache of POCaches
+
+    Parameters
+    ----------
+    max_entries : int
+        The maximum number of subjects to hold
+    max_bytes : int
+        The maximum (approximate) number of bytes to hold. The size of an entry
+        is estimated from the sizes of its terms, so terms shared between
+        entries are counted once for each entry
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = RLock()
+        self.clear()
+
+    def get(self, key, cache_index):
+        """
+        Get the POCache for a key if it is still current
+
+        Parameters
+        ----------
+        key : tuple
+            The key, generally a graph key and a subject identifier
+        cache_index : object
+            The current version of the graph for the subject
+
+        Returns
+        -------
+        PyOpenWorm.simpleProperty.POCache
+            The cached value or `None` if there isn't a current one
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self._misses += 1
+                return None
+            po_cache, size = entry
+            if po_cache.cache_index != cache_index:
+                self._bytes -= size
+                self._invalidations += 1
+                self._misses += 1
+                return None
+            # Re-inserting marks the entry as the most recently used
+            self._entries[key] = entry
+            self._hits += 1
+            return po_cache
+
+    def put(self, key, po_cache):
+        """
+        Add or replace the POCache for a key, evicting the least recently used
+        entries as needed to stay within the configured bounds
+        """
+        size = _estimate_size(po_cache)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes or self.max_entries <= 0:
+                return
+            self._entries[key] = (po_cache, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def resize(self, max_entries=None, max_bytes=None):
+        """ Change the bounds of the cache, evicting entries if necessary """
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     self._bytes > self.max_bytes):
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def clear(self):
+        """ Remove all entries and reset the statistics """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._invalidations = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            return PredicateObjectCacheStats(hits=self._hits,
+                                             misses=self._misses,
+                                             evictions=self._evictions,
+                                             invalidations=self._invalidations,
+                                             entries=len(self._entries),
+                                             bytes=self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return 'PredicateObjectCache(max_entries={}, max_bytes={})'.format(self.max_entries,
+                                                                          self.max_bytes)
+
+
+def _estimate_size(po_cache):
+    res = sys.getsizeof(po_cache) + sys.getsizeof(po_cache.cache)
+    for p, o in po_cache.cache:
+        res += sys.getsizeof(p) + sys.getsizeof(o)
+    return res
+
+
+_SHARED = PredicateObjectCache()
+
+
+def shared_po_cache():
+    """ Returns the process-wide `PredicateObjectCache` """
+    return _SHARED
@@ -2,12 +2,41 @@ import rdflib
 import logging
 from itertools import groupby
 from yarom.graphObject import (GraphObjectQuerier,
-                               ZeroOrMoreTQLayer)
+                               ZeroOrMoreTQLayer,
+                               Variable,
+                               _Range,
+                               _QueryPreparer)
+from yarom.rdfUtils import transitive_subjects, UP
 from .rdf_go_modifiers import SubClassModifier
 from . import DEF_CTX
 
 L = logging.getLogger(__name__)
 
+QUERY_ENGINE_CONF_KEY = 'rdf.query_engine'
+'''
+Configuration key naming the engine used to find the objects matching an
+undefined object. One of `QUERY_ENGINES`
+'''
+
+GOQ_ENGINE = 'goq'
+'''
+Walks the graph one hop at a time with yarom's `GraphObjectQuerier`
+'''
+
+SPARQL_ENGINE = 'sparql'
+'''
+Compiles the object into a single SPARQL query and hands it to the graph's
+query engine
+'''
+
+BGP_ENGINE = 'bgp'
+'''
+Compiles the object into a basic graph pattern and joins the pattern's triples
+directly against the graph
+'''
+
+QUERY_ENGINES = (GOQ_ENGINE, SPARQL_ENGINE, BGP_ENGINE)
+
 
 def goq_hop_scorer(hop):
     if hop[1] == rdflib.RDF.type:
@@ -22,17 +51,397 @@ def zomifier(target_type):
     return helper
 
 
-def load(graph, start=None, target_type=None, context=None, idents=None):
+def query_identifiers(graph, start, target_type=None, engine=None, index=None):
+    """
+    Find the identifiers of objects in the graph matching an undefined object
+
+    Parameters
+    ----------
+    graph : rdflib.graph.Graph
+        The graph to query
+    start : yarom.graphObject.GraphObject
+        The object describing the query
+    target_type : rdflib.term.URIRef
+        An RDF type. Wherever this type appears in the query, its sub-classes
+        are also accepted
+    engine : str
+        The query engine to use. One of `QUERY_ENGINES`. Defaults to
+        `GOQ_ENGINE`. The SPARQL and BGP engines only handle queries which can
+        be written as a basic graph pattern (see `compile_bgp`), and the SPARQL
+        engine only handles `rdflib.graph.Graph` instances; other queries go
+        to `GOQ_ENGINE`
+    index : PyOpenWorm.data.LiteralIndex
+        An index which answers the query, whatever the `engine`, if it can.
+        See `indexed_identifiers`
+
+    Returns
+    -------
+    set of rdflib.term.Identifier
+    """
+    if engine is not None and engine not in QUERY_ENGINES:
+        raise ValueError('Unknown query engine "{}". Expected one of {}'.format(engine,
+                                                                              QUERY_ENGINES))
+    if index is not None:
+        idents = indexed_identifiers(graph, start, target_type, index)
+        if idents is not None:
+            return idents
+    if engine in (SPARQL_ENGINE, BGP_ENGINE):
+        bgp = compile_bgp(graph, start, target_type)
+        if bgp is not None:
+            if engine == BGP_ENGINE:
+                return evaluate_bgp(graph, bgp)
+            if isinstance(graph, rdflib.Graph):
+                query = bgp_to_sparql(bgp)
+                L.debug("query_identifiers: SPARQL query %s", query)
+                return set(row[0] for row in graph.query(query))
+    g = graph
+    if target_type is not None:
+        g = ZeroOrMoreTQLayer(zomifier(target_type), graph)
+    return GraphObjectQuerier(start, g, parallel=False,
+                              hop_scorer=goq_hop_scorer)()
+
+
+BGP_RESULT_VARIABLE = rdflib.Variable('x')
+'''
+The variable bound to the matching objects in the patterns from `compile_bgp`
+'''
+
+
+def indexed_identifiers(graph, start, target_type, index):
+    """
+    Find the identifiers of objects matching an undefined object with a
+    `~PyOpenWorm.data.LiteralIndex`
+
+    Only objects with an RDF type and at least one literal property value can
+    be looked up in the index. Properties whose values are defined objects
+    are checked against the graph for each object found in the index. The
+    graph must be the index's graph or read from it through a
+    `~PyOpenWorm.context_store.RDFContextStore`.
+
+    Parameters
+    ----------
+    graph : rdflib.graph.Graph
+        The graph to query
+    start : yarom.graphObject.GraphObject
+        The object describing the query
+    target_type : rdflib.term.URIRef
+        An RDF type which should match its sub-classes as well
+    index : PyOpenWorm.data.LiteralIndex
+        The index
+
+    Returns
+    -------
+    set of rdflib.term.Identifier
+        The identifiers, or `None` if the index can't answer the query
+    """
+    from .context_store import RDFContextStore
+    if graph is index.graph:
+        contexts = None
+    elif (isinstance(graph.store, RDFContextStore) and
+          graph.store.base_graph is index.graph):
+        contexts = frozenset(graph.store.contexts())
+    else:
+        return None
+
+    bgp = compile_bgp(graph, start, target_type)
+    if bgp is None:
+        return None
+    patterns, values = bgp
+    types = None
+    literals = []
+    checks = []
+    x = BGP_RESULT_VARIABLE
+    for s, p, o in patterns:
+        if s == x and p == rdflib.RDF.type:
+            allowed = values.get(o) if isinstance(o, rdflib.Variable) else frozenset([o])
+            if allowed is None:
+                return None
+            types = allowed if types is None else (types & allowed)
+        elif s == x and isinstance(o, rdflib.Literal):
+            literals.append((p, o))
+        elif s == x and not isinstance(o, rdflib.Variable):
+            checks.append((None, p, o))
+        elif o == x and not isinstance(s, rdflib.Variable):
+            checks.append((s, p, None))
+        else:
+            return None
+    if types is None or not literals:
+        return None
+
+    res = index.subjects(types, literals, contexts)
+    for s, p, o in checks:
+        res = set(ident for ident in res
+                  if (ident if s is None else s, p, ident if o is None else o) in graph)
+    return res
+
+
+def compile_bgp(graph, start, target_type=None):
+    """
+    Compile an undefined object into a basic graph pattern
+
+    The sub-classes of `target_type` are looked up in `graph` ahead of time and
+    attached to the pattern as the allowed values for a variable in place of
+    `target_type` in each ``(?, rdf:type, target_type)`` triple. This way the pattern has no property paths and can be
+    answered in one query.
+
+    Parameters
+    ----------
+    graph : rdflib.graph.Graph
+        The graph to look up sub-classes of `target_type` in
+    start : yarom.graphObject.GraphObject
+        The object describing the query
+    target_type : rdflib.term.URIRef
+        An RDF type which should match its sub-classes as well
+
+    Returns
+    -------
+    tuple
+        A list of triple patterns and a dict mapping variables to their allowed
+        values. Objects matching `start` are bound to `BGP_RESULT_VARIABLE`.
+        `None` is returned if `start` cannot be expressed as a basic graph
+        pattern (e.g., if it's defined or it has a range value)
+    """
+    if start.defined:
+        return None
+    paths = _QueryPreparer(start)()
+    if not paths:
+        return None
+
+    patterns = []
+    seen = set()
+    values = dict()
+    sub_classes = None
+    for path in paths:
+        current = BGP_RESULT_VARIABLE
+        for subj, pred, obj, _ in path:
+            other = obj if subj is None else subj
+            if isinstance(other, _Range):
+                return None
+            if isinstance(other, Variable):
+                other = rdflib.Variable('v' + str(int(other)))
+            elif (target_type is not None and subj is None and
+                  pred == rdflib.RDF.type and other == target_type):
+                if sub_classes is None:
+                    sub_classes = frozenset(transitive_subjects(graph, target_type,
+                                                                rdflib.RDFS.subClassOf,
+                                                                direction=UP))
+                other = rdflib.Variable('t' + str(len(values)))
+                values[other] = sub_classes
+
+            if subj is None:
+                pattern = (current, pred, other)
+            else:
+                pattern = (other, pred, current)
+            if pattern not in seen:
+                seen.add(pattern)
+                patterns.append(pattern)
+            current = other
+    return patterns, values
+
+
+def bgp_to_sparql(bgp):
+    """
+    Write a basic graph pattern from `compile_bgp` as a SPARQL ``SELECT`` query
+
+    Returns
+    -------
+    str
+    """
+    patterns, values = bgp
+    lines = [' '.join(x.n3() for x in pattern) + ' .' for pattern in patterns]
+    for var, allowed in sorted(values.items()):
+        lines.append('VALUES {} {{ {} }}'.format(var.n3(),
+                                                 ' '.join(sorted(x.n3() for x in allowed))))
+    return ('SELECT DISTINCT {} WHERE {{\n    '.format(BGP_RESULT_VARIABLE.n3()) +
+            '\n    '.join(lines) + '\n}')
+
+
+def evaluate_bgp(graph, bgp):
+    """
+    Find the values of `BGP_RESULT_VARIABLE` in the solutions to a basic graph
+    pattern from `compile_bgp`
+
+    The patterns are joined one at a time, each time choosing the pattern with
+    the most terms fixed by the constants in the pattern and the solution so
+    far.
+
+    Returns
+    -------
+    set of rdflib.term.Identifier
+    """
+    patterns, values = bgp
+    return set(bindings[BGP_RESULT_VARIABLE]
+               for bindings in _bgp_solutions(graph, patterns, values))
+
+
+def bgp_matches(graph, patterns):
+    """
+    Find the triples matched by a basic graph pattern
+
+    These are the triples which a SPARQL ``DELETE WHERE`` with the pattern
+    would remove, except that each group of patterns joined by shared
+    variables is matched on its own, so patterns for several objects can be
+    given together. Patterns without variables are returned as they are.
+
+    Parameters
+    ----------
+    graph : rdflib.graph.Graph
+        The graph to match against
+    patterns : iterable of tuple
+        Triples which may have `rdflib.term.Variable` terms
+
+    Returns
+    -------
+    set of tuple
+        The triples from `graph` matching the patterns
+    """
+    results = set()
+    for group in _variable_groups(patterns):
+        if len(group) == 1 and not any(isinstance(term, rdflib.Variable)
+                                       for term in group[0]):
+            results.add(group[0])
+            continue
+        for bindings in _bgp_solutions(graph, group, dict()):
+            for pattern in group:
+                results.add(tuple(bindings.get(term, term) for term in pattern))
+    return results
+
+
+def _variable_groups(patterns):
+    # Groups the patterns joined, directly or through other patterns, by
+    # shared variables. Each pattern without variables is a group on its own
+    parent = dict()
+
+    def find(var):
+        while parent[var] != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    groups = []
+    joined = []
+    for pattern in patterns:
+        pattern = tuple(pattern)
+        variables = [term for term in pattern if isinstance(term, rdflib.Variable)]
+        if not variables:
+            groups.append([pattern])
+            continue
+        for var in variables:
+            parent.setdefault(var, var)
+        root = find(variables[0])
+        for var in variables[1:]:
+            other = find(var)
+            if other != root:
+                parent[other] = root
+        joined.append((variables[0], pattern))
+
+    by_root = dict()
+    for var, pattern in joined:
+        by_root.setdefault(find(var), []).append(pattern)
+    return groups + list(by_root.values())
+
+
+def _bgp_solutions(graph, patterns, values):
+    # Generates the solutions to the patterns as dicts of bindings. See
+    # `evaluate_bgp`
+
+    def score(pattern, bindings):
+        res = 0
+        for term in pattern:
+            if not isinstance(term, rdflib.Variable) or term in bindings:
+                res += 2
+            elif term in values:
+                res += 1
+        return res
+
+    def solve(remaining, bindings):
+        if not remaining:
+            yield bindings
+            return
+        idx = max(range(len(remaining)), key=lambda i: score(remaining[i], bindings))
+        pattern = remaining[idx]
+        rest = remaining[:idx] + remaining[idx + 1:]
+        query = []
+        choices = False
+        for term in pattern:
+            if not isinstance(term, rdflib.Variable):
+                query.append(term)
+            elif term in bindings:
+                query.append(bindings[term])
+            elif term in values and not choices:
+                query.append(list(values[term]))
+                choices = True
+            else:
+                query.append(None)
+        if choices:
+            triples = graph.triples_choices(tuple(query))
+        else:
+            triples = graph.triples(tuple(query))
+        for triple in triples:
+            if isinstance(triple[0], tuple):
+                triple = triple[0]
+            new_bindings = dict(bindings)
+            for term, value in zip(pattern, triple):
+                if not isinstance(term, rdflib.Variable):
+                    continue
+                bound = new_bindings.setdefault(term, value)
+                if bound != value or (term in values and value not in values[term]):
+                    break
+            else:
+                for res in solve(rest, new_bindings):
+                    yield res
+
+    return solve(list(patterns), dict())
+
+
+def load(graph, start=None, target_type=None, context=None, idents=None, prefetch=None,
+         engine=None, index=None):
+    """
+    Load objects from the graph
+
+    Parameters
+    ----------
+    graph : rdflib.graph.Graph
+        The graph to query
+    start : PyOpenWorm.dataObject.BaseDataObject
+        The object describing the query. Ignored if `idents` is given
+    target_type : rdflib.term.URIRef
+        The RDF type that loaded objects should have
+    context : PyOpenWorm.context.Context
+        The context for the loaded objects
+    idents : set of rdflib.term.URIRef
+        Identifiers of the objects to load. If not provided, the identifiers
+        are computed from `start`
+    prefetch : set of rdflib.term.URIRef
+        Predicates whose values should be retrieved for all of the loaded
+        objects in one query. The results are stored in each object's
+        ``po_cache`` so that property reads for these predicates don't go to
+        the graph again
+    engine : str
+        The engine used to compute identifiers from `start`. See
+        `query_identifiers`
+    index : PyOpenWorm.data.LiteralIndex
+        An index for computing identifiers from `start`. See
+        `query_identifiers`
+    """
     L.debug("load: graph %s start %s target_type %s context %s", graph, start, target_type, context)
     if idents is None:
-        g = ZeroOrMoreTQLayer(zomifier(target_type), graph)
-        idents = GraphObjectQuerier(start, g, parallel=False,
-                                    hop_scorer=goq_hop_scorer)()
+        idents = query_identifiers(graph, start, target_type, engine, index)
     if idents:
-        choices = graph.triples_choices((list(idents),
-                                         rdflib.RDF['type'],
-                                         None))
-        choices = list(choices)
+        idents = list(idents)
+        po_map = None
+        if prefetch:
+            prefetch = frozenset(prefetch) | frozenset([rdflib.RDF['type']])
+            po_map = prefetch_predicate_objects(graph, idents, prefetch)
+            choices = [(ident, p, o)
+                       for ident, pos in po_map.items()
+                       for p, o in pos
+                       if p == rdflib.RDF['type']]
+        else:
+            choices = graph.triples_choices((idents,
+                                             rdflib.RDF['type'],
+                                             None))
+            choices = list(choices)
         grouped_type_triples = groupby(choices, lambda x: x[0])
         hit = False
         for ident, type_triples in grouped_type_triples:
@@ -42,16 +451,51 @@ def load(graph, start=None, target_type=None, context=None, idents=None):
                 types.add(rdf_type)
             tt = () if target_type is None else (target_type,)
             the_type = get_most_specific_rdf_type(types, context, bases=tt)
-            yield oid(ident, the_type, context)
+            yield _prefetched(oid(ident, the_type, context), po_map, prefetch)
         if not hit:
             for ident in idents:
                 tt = () if target_type is None else (target_type,)
                 the_type = get_most_specific_rdf_type((), context, bases=tt)
-                yield oid(ident, the_type, context)
+                yield _prefetched(oid(ident, the_type, context), po_map, prefetch)
     else:
         return
 
 
+def prefetch_predicate_objects(graph, idents, predicates):
+    """
+    Retrieve the predicate-object pairs for many subjects in one query
+
+    Parameters
+    ----------
+    graph : rdflib.graph.Graph
+        The graph to query
+    idents : list of rdflib.term.URIRef
+        The subjects
+    predicates : set of rdflib.term.URIRef
+        The predicates to retain. Pairs with other predicates are discarded
+
+    Returns
+    -------
+    dict
+        A mapping from each subject in `idents` to a set of predicate-object
+        pairs
+    """
+    res = {ident: set() for ident in idents}
+    for s, p, o in graph.triples_choices((idents, None, None)):
+        if p in predicates:
+            res[s].add((p, o))
+    return res
+
+
+def _prefetched(o, po_map, predicates):
+    if po_map is None:
+        return o
+    from .simpleProperty import POCache, po_cache_index
+    cache_index = po_cache_index(o.conf, o.context, o.identifier)
+    o.po_cache = POCache(cache_index, frozenset(po_map[o.identifier]), predicates)
+    return o
+
+
 def get_most_specific_rdf_type(types, context=None, bases=None):
     """ Gets the most specific rdf_type.
 
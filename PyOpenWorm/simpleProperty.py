@@ -4,9 +4,7 @@ import rdflib as R
 import logging
 from six import with_metaclass
 
-from yarom.graphObject import (GraphObject,
-                               GraphObjectQuerier,
-                               ZeroOrMoreTQLayer)
+from yarom.graphObject import GraphObject
 
 from yarom.mappedProperty import MappedPropertyClass
 from yarom.variable import Variable
@@ -19,12 +17,13 @@ from PyOpenWorm.contextualize import (Contextualizable, ContextualizableClass,
                                       contextualize_helper,
                                       decontextualize_helper)
 from PyOpenWorm.context import Context
-from PyOpenWorm.statement import Statement
+from PyOpenWorm.statement import Statement, StatementList
 import itertools
 from lazy_object_proxy import Proxy
 from .inverse_property import InversePropertyMixin
-from .rdf_query_util import goq_hop_scorer, load
-from .rdf_go_modifiers import SubClassModifier
+from .rdf_query_util import load, query_identifiers, QUERY_ENGINE_CONF_KEY
+from .po_cache import shared_po_cache
+from .async_query import query_runner, graph_key
 
 L = logging.getLogger(__name__)
 
@@ -93,7 +92,7 @@ class RealSimpleProperty(with_metaclass(ContextMappedPropertyClass,
 
     def __init__(self, owner, **kwargs):
         super(RealSimpleProperty, self).__init__(**kwargs)
-        self._v = []
+        self._v = StatementList()
         self.owner = owner
         self._hdf = dict()
         self.filling = False
@@ -111,17 +110,14 @@ class RealSimpleProperty(with_metaclass(ContextMappedPropertyClass,
         return decontextualize_helper(self)
 
     def has_value(self):
-        for x in self._v:
-            if x.context == self.context:
-                return True
-        return False
+        return self._v.has_context(self.context)
 
     def has_defined_value(self):
         hdf = self._hdf.get(self.context)
         if hdf is not None:
             return hdf
-        for x in self._v:
-            if x.context == self.context and x.object.defined:
+        for x in self._v.in_context(self.context):
+            if x.object.defined:
                 self._hdf[self.context] = True
                 return True
         return False
@@ -151,23 +147,22 @@ class RealSimpleProperty(with_metaclass(ContextMappedPropertyClass,
 
     @property
     def defined_values(self):
-        return tuple(x.object for x in self._v
-                     if x.object.defined and x.context == self.context)
+        return tuple(x.object for x in self._v.in_context(self.context)
+                     if x.object.defined)
 
     @property
     def values(self):
         return tuple(self._values_helper())
 
     def _values_helper(self):
-        for x in self._v:
-            if x.context == self.context:
-                # XXX: decontextualzing default context here??
-                if self.context is not None:
-                    yield self.context(x.object)
-                elif isinstance(x.object, Contextualizable):
-                    yield x.object.decontextualize()
-                else:
-                    yield x.object
+        for x in self._v.in_context(self.context):
+            # XXX: decontextualzing default context here??
+            if self.context is not None:
+                yield self.context(x.object)
+            elif isinstance(x.object, Contextualizable):
+                yield x.object.decontextualize()
+            else:
+                yield x.object
 
     @property
     def rdf(self):
@@ -208,15 +203,35 @@ class RealSimpleProperty(with_metaclass(ContextMappedPropertyClass,
             v = Variable("var" + str(id(self)))
             self._insert_value(v)
 
-            def _zomifier(rdf_type):
-                if rdf_type and getattr(self, 'value_rdf_type', None) == rdf_type:
-                    return SubClassModifier(rdf_type)
-            g = ZeroOrMoreTQLayer(_zomifier, self.rdf)
-            results = GraphObjectQuerier(v, g, parallel=False,
-                                         hop_scorer=goq_hop_scorer)()
+            results = query_identifiers(self.rdf, v,
+                                        getattr(self, 'value_rdf_type', None),
+                                        self.conf.get(QUERY_ENGINE_CONF_KEY, None))
             self._remove_value(v)
         return results
 
+    def get_async(self):
+        """ Get the values of this property in a worker thread
+
+        Reads of the same property of the same object from the same graph
+        which are in flight at the same time are made once. See
+        `PyOpenWorm.async_query`
+
+        Returns
+        -------
+        asyncio.Future
+            A tuple of the values
+        """
+        key = None
+        if self.owner.defined and not self.has_defined_value():
+            key = self._async_key('get')
+        return query_runner(self.conf).run(lambda: tuple(self.get()), key)
+
+    def _async_key(self, *args):
+        gk = graph_key(self.conf, self.context)
+        if gk is None:
+            return None
+        return args + (self.link, self.owner.rdf_type, self.owner.identifier, gk)
+
     def _insert_value(self, v):
         stmt = Statement(self.owner, self, v, self.context)
         self._hdf[self.context] = None
@@ -234,10 +249,39 @@ class RealSimpleProperty(with_metaclass(ContextMappedPropertyClass,
     def _ensure_fresh_po_cache(self):
         owner = self.owner
         ident = owner.identifier
-        graph_index = self.conf.get('rdf.graph.change_counter', None)
+        graph_index = po_cache_index(self.conf, self.context, ident)
+        po_cache = owner.po_cache
+
+        if graph_index is None or \
+                po_cache is None or \
+                po_cache.cache_index != graph_index or \
+                (po_cache.predicates is not None and self.link not in po_cache.predicates):
+            owner.po_cache = self._load_po_cache(ident, graph_index)
+
+    def _load_po_cache(self, ident, graph_index):
+        key = self._shared_po_cache_key(ident)
+        if key is None:
+            return POCache(graph_index, frozenset(self.rdf.predicate_objects(ident)))
+
+        shared = shared_po_cache()
+        res = shared.get(key, graph_index)
+        if res is None:
+            res = POCache(graph_index, frozenset(self.rdf.predicate_objects(ident)))
+            shared.put(key, res)
+        return res
 
-        if graph_index is None or owner.po_cache is None or owner.po_cache.cache_index != graph_index:
-            owner.po_cache = POCache(graph_index, frozenset(self.rdf.predicate_objects(ident)))
+    def _shared_po_cache_key(self, ident):
+        tracker = self.conf.get('rdf.graph.change_tracker', None)
+        if tracker is None:
+            return None
+        if self.context is None:
+            graph_key = 'rdf.graph'
+        else:
+            # Staged graphs aren't in the store, so they aren't shared
+            graph_key = getattr(self.context, 'cache_key', None)
+            if graph_key is None:
+                return None
+        return (tracker.serial, graph_key, ident)
 
     def unset(self, v):
         self._remove_value(v)
@@ -253,8 +297,8 @@ class RealSimpleProperty(with_metaclass(ContextMappedPropertyClass,
         return next(iter(self.get()), None)
 
     def onedef(self):
-        for x in self._v:
-            if x.object.defined and x.context == self.context:
+        for x in self._v.in_context(self.context):
+            if x.object.defined:
                 return x.object
         return None
 
@@ -274,14 +318,33 @@ class RealSimpleProperty(with_metaclass(ContextMappedPropertyClass,
         return self.rdf.quads((self.owner.idl, self.link, None, None))
 
 
+def po_cache_index(conf, context, ident):
+    """ Returns the version of the graph for a POCache of the given subject
+
+    The version only changes when a triple with `ident` as its subject is
+    added or removed or, if `context` is given, when a statement is added to
+    or removed from the context.
+    """
+    tracker = conf.get('rdf.graph.change_tracker', None)
+    if tracker is None:
+        return conf.get('rdf.graph.change_counter', None)
+    return (tracker.subject_version(ident),
+            getattr(context, '_change_counter', None))
+
+
 class POCache(tuple):
 
-    """ The predicate-object cache object """
+    """ The predicate-object cache object
 
-    _map = dict(cache_index=0, cache=1)
+    If `predicates` is not `None`, then the cache only holds the values for
+    the given predicates. This is the case for caches filled by a prefetching
+    ``load``.
+    """
+
+    _map = dict(cache_index=0, cache=1, predicates=2)
 
-    def __new__(cls, cache_index, cache):
-        return super(POCache, cls).__new__(cls, (cache_index, cache))
+    def __new__(cls, cache_index, cache, predicates=None):
+        return super(POCache, cls).__new__(cls, (cache_index, cache, predicates))
 
     def __getattr__(self, n):
         return self[POCache._map[n]]
@@ -323,6 +386,17 @@ class PropertyCountMixin(object):
     def count(self):
         return sum(1 for _ in super(PropertyCountMixin, self).get())
 
+    def count_async(self):
+        """ Count the values of this property in the graph in a worker thread
+
+        Returns
+        -------
+        asyncio.Future
+            The number of values
+        """
+        key = self._async_key('count') if self.owner.defined else None
+        return query_runner(self.conf).run(self.count, key)
+
 
 class ObjectProperty (InversePropertyMixin,
                       _ContextualizingPropertySetMixin,
@@ -0,0 +1,364 @@
+'''
+An RDF store persisted in a SQLite database.
+
+Terms are interned in a ``terms`` table and quads are stored as rows of term
+ids in a ``quads`` table with indexes for each position of a triple pattern,
+so opening a database reads nothing and queries are answered from the indexes
+on disk.
+'''
+from __future__ import absolute_import
+import os
+import sqlite3
+import threading
+
+import transaction
+from rdflib.graph import Graph
+from rdflib.store import (Store, VALID_STORE, NO_STORE, TripleAddedEvent,
+                          TripleRemovedEvent)
+from rdflib.term import URIRef, BNode, Literal
+
+from .utils import chunks
+
+__all__ = ['SQLiteStore']
+
+_URIREF = 0
+_BNODE = 1
+_LITERAL = 2
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS terms (
+           id INTEGER PRIMARY KEY,
+           kind INTEGER NOT NULL,
+           value TEXT NOT NULL,
+           lang TEXT NOT NULL,
+           datatype TEXT NOT NULL,
+           UNIQUE (value, kind, lang, datatype))''',
+    '''CREATE TABLE IF NOT EXISTS quads (
+           s INTEGER NOT NULL,
+           p INTEGER NOT NULL,
+           o INTEGER NOT NULL,
+           c INTEGER NOT NULL,
+           PRIMARY KEY (s, p, o, c)) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS quads_pos ON quads (p, o, s)',
+    'CREATE INDEX IF NOT EXISTS quads_osp ON quads (o, s, p)',
+    'CREATE INDEX IF NOT EXISTS quads_c ON quads (c)',
+    '''CREATE TABLE IF NOT EXISTS namespaces (
+           prefix TEXT PRIMARY KEY,
+           uri TEXT NOT NULL)''',
+)
+
+_COLUMNS = ('s', 'p', 'o', 'c')
+
+_TERM_CACHE_SIZE = 100000
+
+_ADD_SIZE = 1000
+
+
+def _where(shape):
+    ''' The WHERE clause for the bound positions in `shape` '''
+    conds = [col + ' = ?' for col, bound in zip(_COLUMNS, shape) if bound]
+    return (' WHERE ' + ' AND '.join(conds)) if conds else ''
+
+
+def _statements(template):
+    ''' Statements from `template` for each combination of bound positions '''
+    res = dict()
+    for mask in range(16):
+        shape = tuple(bool(mask & (1 << i)) for i in range(4))
+        res[shape] = template.format(where=_where(shape))
+    return res
+
+
+# The SQL for each shape of pattern is built once, so the sqlite3 module's
+# statement cache keeps one prepared statement per shape
+_SELECT = _statements('SELECT s, p, o, group_concat(c) FROM quads{where} GROUP BY s, p, o')
+_DELETE = _statements('DELETE FROM quads{where}')
+_CONTEXTS = _statements('SELECT DISTINCT c FROM quads{where}')
+_INSERT = 'INSERT OR IGNORE INTO quads (s, p, o, c) VALUES (?, ?, ?, ?)'
+
+
+class SQLiteStore(Store):
+    '''
+    A context-aware store in a SQLite database
+
+    The configuration passed to `open` is the path to the database file, or
+    ``':memory:'``. Changes are made in a SQL transaction. It joins the current
+    `transaction` transaction, like a ZODB store, so it's committed or aborted
+    with that, as by ``with transaction.manager:``. It's also committed by
+    `commit` and when the store is closed.
+
+    The store may be used from several threads. Their use of the database is
+    made one at a time.
+    '''
+
+    context_aware = True
+    formula_aware = False
+    transaction_aware = True
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self._conn = None
+        self._lock = threading.RLock()
+        self._txn = None
+        self._ids = dict()
+        self._terms = dict()
+        self._graphs = dict()
+        super(SQLiteStore, self).__init__(configuration, identifier)
+
+    def open(self, configuration, create=False):
+        if not create and configuration != ':memory:' and not os.path.exists(configuration):
+            # Connecting would make an empty database file
+            return NO_STORE
+        conn = sqlite3.connect(configuration, cached_statements=128,
+                               check_same_thread=False)
+        try:
+            exists = conn.execute("SELECT name FROM sqlite_master"
+                                  " WHERE type = 'table' AND name = 'quads'").fetchone()
+            if not exists:
+                if not create:
+                    conn.close()
+                    return NO_STORE
+                for stmt in _SCHEMA:
+                    conn.execute(stmt)
+                conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        self._conn = conn
+        self._ids = dict()
+        self._terms = dict()
+        self._graphs = dict()
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=True):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    def commit(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+
+    def rollback(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.rollback()
+            # Ids for terms inserted in the transaction are gone
+            self._ids.clear()
+            self._terms.clear()
+
+    def _join_transaction(self):
+        ''' Have the current `transaction` transaction end the SQL transaction '''
+        txn = transaction.get()
+        if txn is not self._txn:
+            txn.join(_DataManager(self))
+            self._txn = txn
+
+    def _term_key(self, term):
+        if isinstance(term, Graph):
+            term = term.identifier
+        if isinstance(term, Literal):
+            return (_LITERAL, u'{}'.format(term), term.language or u'',
+                    u'{}'.format(term.datatype or u''))
+        if isinstance(term, BNode):
+            return (_BNODE, u'{}'.format(term), u'', u'')
+        if isinstance(term, URIRef):
+            return (_URIREF, u'{}'.format(term), u'', u'')
+        raise ValueError('Cannot store term of type {}'.format(type(term)))
+
+    def _id(self, term, create=False):
+        ''' The id of `term`. If it isn't in the store, `None` unless `create` '''
+        key = self._term_key(term)
+        with self._lock:
+            i = self._ids.get(key)
+            if i is not None:
+                return i
+            row = self._conn.execute('SELECT id FROM terms WHERE value = ? AND kind = ?'
+                                     ' AND lang = ? AND datatype = ?',
+                                     (key[1], key[0], key[2], key[3])).fetchone()
+            if row is not None:
+                i = row[0]
+            elif create:
+                i = self._conn.execute('INSERT INTO terms (kind, value, lang, datatype)'
+                                       ' VALUES (?, ?, ?, ?)', key).lastrowid
+            else:
+                return None
+            self._cache(self._ids, key, i)
+            return i
+
+    def _term(self, i):
+        term = self._terms.get(i)
+        if term is None:
+            with self._lock:
+                kind, value, lang, datatype = self._conn.execute(
+                    'SELECT kind, value, lang, datatype FROM terms WHERE id = ?', (i,)).fetchone()
+                if kind == _URIREF:
+                    term = URIRef(value)
+                elif kind == _BNODE:
+                    term = BNode(value)
+                else:
+                    term = Literal(value, lang=lang or None,
+                                   datatype=URIRef(datatype) if datatype else None)
+                self._cache(self._terms, i, term)
+        return term
+
+    def _cache(self, cache, key, value):
+        if len(cache) >= _TERM_CACHE_SIZE:
+            cache.clear()
+        cache[key] = value
+
+    def _context_graph(self, i):
+        g = self._graphs.get(i)
+        if g is None:
+            g = Graph(store=self, identifier=self._term(i))
+            self._graphs[i] = g
+        return g
+
+    def _pattern(self, triple_pattern, context):
+        '''
+        The shape and parameters for a pattern, or `None` if a term in the
+        pattern isn't in the store, so nothing can match
+        '''
+        shape = []
+        params = []
+        for term in tuple(triple_pattern) + (context,):
+            if term is None:
+                shape.append(False)
+            else:
+                i = self._id(term)
+                if i is None:
+                    return None
+                shape.append(True)
+                params.append(i)
+        return tuple(shape), params
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        self._join_transaction()
+        with self._lock:
+            self._conn.execute(_INSERT,
+                               tuple(self._id(t, True) for t in tuple(triple) + (context,)))
+
+    def addN(self, quads):
+        # Quads are added a batch at a time, so they aren't all held in memory.
+        # Each batch is de-duplicated so that listeners see a triple added in
+        # it once
+        for batch in chunks(quads, _ADD_SIZE):
+            seen = set()
+            batch = [q for q in batch if not (q in seen or seen.add(q))]
+            self._join_transaction()
+            with self._lock:
+                self._conn.executemany(_INSERT,
+                                       [tuple(self._id(t, True) for t in q) for q in batch])
+            for s, p, o, c in batch:
+                self.dispatcher.dispatch(TripleAddedEvent(triple=(s, p, o), context=c))
+
+    def remove(self, triple_pattern, context=None):
+        self.dispatcher.dispatch(TripleRemovedEvent(triple=triple_pattern, context=context))
+        self._join_transaction()
+        with self._lock:
+            pattern = self._pattern(triple_pattern, context)
+            if pattern is not None:
+                self._conn.execute(_DELETE[pattern[0]], pattern[1])
+
+    def remove_graph(self, graph):
+        self.remove((None, None, None), graph)
+
+    def triples(self, triple_pattern, context=None):
+        pattern = self._pattern(triple_pattern, context)
+        if pattern is None:
+            return
+        # The rows are all read while the lock is held: a cursor left open on
+        # the connection could see changes made by other threads as they're
+        # read
+        with self._lock:
+            rows = self._conn.execute(_SELECT[pattern[0]], pattern[1]).fetchall()
+        for s, p, o, cs in rows:
+            yield ((self._term(s), self._term(p), self._term(o)),
+                   (self._context_graph(int(c)) for c in cs.split(',')))
+
+    def __len__(self, context=None):
+        with self._lock:
+            if context is None:
+                return self._conn.execute('SELECT COUNT(*) FROM'
+                                          ' (SELECT DISTINCT s, p, o FROM quads)').fetchone()[0]
+            i = self._id(context)
+            if i is None:
+                return 0
+            return self._conn.execute('SELECT COUNT(*) FROM quads WHERE c = ?',
+                                      (i,)).fetchone()[0]
+
+    def contexts(self, triple=None):
+        pattern = self._pattern(triple or (None, None, None), None)
+        if pattern is None:
+            return
+        with self._lock:
+            rows = self._conn.execute(_CONTEXTS[pattern[0]], pattern[1]).fetchall()
+        for (c,) in rows:
+            yield self._context_graph(c)
+
+    def bind(self, prefix, namespace):
+        self._join_transaction()
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO namespaces (prefix, uri) VALUES (?, ?)',
+                               (prefix, u'{}'.format(namespace)))
+
+    def namespace(self, prefix):
+        with self._lock:
+            row = self._conn.execute('SELECT uri FROM namespaces WHERE prefix = ?',
+                                     (prefix,)).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace):
+        with self._lock:
+            row = self._conn.execute('SELECT prefix FROM namespaces WHERE uri = ?',
+                                     (u'{}'.format(namespace),)).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT prefix, uri FROM namespaces').fetchall()
+        for prefix, uri in rows:
+            yield prefix, URIRef(uri)
+
+
+class _DataManager(object):
+    '''
+    Ends the SQL transaction of a `SQLiteStore` with a `transaction` transaction
+
+    SQLite can't prepare a commit, so the SQL transaction is committed when
+    the transaction is voted on. A failure then aborts the transaction
+    '''
+
+    def __init__(self, store):
+        self.store = store
+        self.transaction_manager = transaction.manager
+
+    def _done(self, txn):
+        if self.store._txn is txn:
+            self.store._txn = None
+
+    def abort(self, txn):
+        self.store.rollback()
+        self._done(txn)
+
+    def tpc_begin(self, txn):
+        pass
+
+    def commit(self, txn):
+        pass
+
+    def tpc_vote(self, txn):
+        self.store.commit()
+
+    def tpc_finish(self, txn):
+        self._done(txn)
+
+    def tpc_abort(self, txn):
+        self.abort(txn)
+
+    def sortKey(self):
+        return 'PyOpenWorm.sqlite_store:{}'.format(id(self.store))
@@ -1,7 +1,8 @@
 from __future__ import absolute_import
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 
 from yarom.mapper import FCN
+from yarom.propertyValue import PropertyValue
 
 
 class Statement(namedtuple('Statement', ('subject', 'property', 'object', 'context'))):
@@ -25,3 +26,215 @@ class Statement(namedtuple('Statement', ('subject', 'property', 'object', 'conte
                                                                  repr(self.property),
                                                                  repr(self.object),
                                                                  repr(self.context))
+
+
+class StatementList(object):
+    '''
+    Statements in the order they were added, indexed by context, by the
+    identity of their objects, and by a key of their values
+
+    Appending and removing statements takes constant time, and the statements
+    in a context can be iterated over without looking at those in other
+    contexts. Statements are found for removal by the identity of their
+    objects or else by their property's link, their object's literal value or
+    identifier, and their context. Only statements whose objects had no
+    identifier when they were added have to be compared one by one.
+
+    Most lists only ever hold a statement or two, so the statements are kept
+    in a plain list until there are more than `INDEX_THRESHOLD` of them, and
+    only then indexed.
+
+    Iterating over the list and changing it in the same loop is allowed: the
+    iteration continues over the statements as they were when it began.
+    '''
+
+    __slots__ = ('_entries', '_by_context', '_by_object', '_by_value', '_value_keys',
+                 '_unkeyed', '_next_key', '_readers')
+
+    INDEX_THRESHOLD = 8
+    ''' The number of statements held before they're indexed '''
+
+    def __init__(self):
+        self._entries = []
+        self._by_context = None
+        self._by_object = None
+        self._by_value = None
+        self._value_keys = None
+        self._unkeyed = None
+        self._next_key = 0
+        self._readers = 0
+
+    def append(self, stmt):
+        self._detach()
+        if self._by_context is None:
+            self._entries.append(stmt)
+            if len(self._entries) > self.INDEX_THRESHOLD:
+                self._index()
+            return
+        key = self._next_key
+        self._next_key += 1
+        self._entries[key] = stmt
+        self._by_context.setdefault(stmt.context, OrderedDict())[key] = stmt
+        self._by_object.setdefault(id(stmt.object), OrderedDict())[key] = stmt
+        value_key = _value_key(stmt)
+        self._value_keys[key] = value_key
+        if value_key is None:
+            self._unkeyed[key] = stmt
+        else:
+            self._by_value.setdefault(value_key, OrderedDict())[key] = stmt
+
+    def _index(self):
+        entries = self._entries
+        self._entries = OrderedDict()
+        self._by_context = dict()
+        self._by_object = dict()
+        self._by_value = dict()
+        self._value_keys = dict()
+        self._unkeyed = OrderedDict()
+        for stmt in entries:
+            self.append(stmt)
+
+    def _detach(self):
+        # Iterators hold on to the entries they started with, so those are
+        # copied rather than changed under them
+        if self._readers:
+            self._readers = 0
+            if self._by_context is None:
+                self._entries = list(self._entries)
+            else:
+                self._entries = OrderedDict(self._entries)
+
+    def remove(self, stmt):
+        ''' Remove a statement equal to `stmt`, like `list.remove` '''
+        key = self._find(stmt)
+        if key is None:
+            raise ValueError('{} is not in the list'.format(stmt))
+        self._detach()
+        if self._by_context is None:
+            del self._entries[key]
+        else:
+            self._discard(key)
+
+    def _find(self, stmt):
+        if self._by_context is None:
+            entries = self._entries
+            for i, x in enumerate(entries):
+                if _same_statement(x, stmt):
+                    return i
+            for i, x in enumerate(entries):
+                if x == stmt:
+                    return i
+            return None
+
+        candidates = self._by_object.get(id(stmt.object))
+        if candidates:
+            for key, x in candidates.items():
+                if _same_statement(x, stmt):
+                    return key
+            for key, x in candidates.items():
+                if x == stmt:
+                    return key
+        value_key = _value_key(stmt)
+        if value_key is None:
+            # Objects without identifiers are only equal to themselves
+            return None
+        for key, x in self._by_value.get(value_key, {}).items():
+            if x == stmt:
+                return key
+        # Objects can get identifiers after they're added
+        for key, x in self._unkeyed.items():
+            if x == stmt:
+                return key
+        return None
+
+    def _discard(self, key):
+        stmt = self._entries.pop(key)
+        value_key = self._value_keys.pop(key)
+        if value_key is None:
+            del self._unkeyed[key]
+            indices = ((self._by_context, stmt.context),
+                       (self._by_object, id(stmt.object)))
+        else:
+            indices = ((self._by_context, stmt.context),
+                       (self._by_object, id(stmt.object)),
+                       (self._by_value, value_key))
+        for index, index_key in indices:
+            bucket = index[index_key]
+            del bucket[key]
+            if not bucket:
+                del index[index_key]
+
+    def in_context(self, context):
+        ''' The statements in `context` in the order they were added '''
+        if self._by_context is None:
+            return iter(tuple(x for x in self._entries if x.context == context))
+        bucket = self._by_context.get(context)
+        if bucket is None:
+            return iter(())
+        return iter(tuple(bucket.values()))
+
+    def has_context(self, context):
+        ''' True if there are any statements in `context` '''
+        if self._by_context is None:
+            return any(x.context == context for x in self._entries)
+        return context in self._by_context
+
+    def clear(self):
+        self._entries = []
+        self._by_context = None
+        self._by_object = None
+        self._by_value = None
+        self._value_keys = None
+        self._unkeyed = None
+        self._readers = 0
+
+    def _statements(self):
+        if self._by_context is None:
+            return self._entries
+        return self._entries.values()
+
+    def __iter__(self):
+        self._readers += 1
+        return self._iter(self._entries, self._statements())
+
+    def _iter(self, entries, statements):
+        try:
+            for x in statements:
+                yield x
+        finally:
+            if self._entries is entries:
+                self._readers -= 1
+
+    def __contains__(self, stmt):
+        return self._find(stmt) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return '{}({})'.format(FCN(type(self)), list(self._statements()))
+
+
+def _value_key(stmt):
+    '''
+    A key shared by statements that may be equal, or `None` if the statement's
+    object is only equal to itself
+    '''
+    obj = stmt.object
+    if isinstance(obj, PropertyValue):
+        value = obj.value
+    elif not hasattr(obj, 'defined'):
+        # Equal objects have equal hashes
+        value = obj
+    elif obj.defined:
+        value = obj.identifier
+    else:
+        return None
+    return (getattr(stmt.property, 'link', None), value, stmt.context)
+
+
+def _same_statement(a, b):
+    return (a.subject is b.subject and
+            a.property is b.property and
+            a.object is b.object and
+            a.context is b.context)
@@ -0,0 +1,308 @@
+'''
+Running a batch of translations in dependency order on a pool of processes.
+
+A plan lists translations as `TranslationJob` records. A translation which
+takes the output of another translation in the plan as one of its data sources
+depends on that translation. Translations which don't depend on each other can
+run at the same time, each in its own process.
+'''
+from __future__ import absolute_import
+from collections import namedtuple
+from functools import partial
+import json
+import multiprocessing
+import traceback
+
+from six import string_types, PY2
+from six.moves import queue, cPickle as pickle
+
+__all__ = ['TranslationJob', 'PlanError', 'read_plan', 'job_dependencies',
+           'translation_order', 'check_types', 'run_jobs']
+
+
+TranslationJob = namedtuple('TranslationJob', ['translator', 'data_sources',
+                                               'named_data_sources', 'output_key',
+                                               'output_identifier'])
+''' A translation in a plan. The fields are as the arguments to `POW.translate` '''
+
+
+LIVENESS_CHECK_INTERVAL = 1
+''' Seconds between checks that the processes running translations are alive '''
+
+
+class PlanError(Exception):
+    ''' Raised for a plan which can't be carried out '''
+
+
+def read_plan(f):
+    '''
+    Read a plan from a JSON file
+
+    The file holds a list of objects, each with a "translator" and,
+    optionally, "data_sources", "named_data_sources", "output_key", and
+    "output_identifier"
+
+    Parameters
+    ----------
+    f : file object
+        The file to read
+
+    Returns
+    -------
+    list of TranslationJob
+    '''
+    try:
+        entries = json.load(f)
+    except ValueError as e:
+        raise PlanError('The plan is not valid JSON: {}'.format(e))
+    if not isinstance(entries, list):
+        raise PlanError('The plan must be a list of translations')
+    res = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or 'translator' not in entry:
+            raise PlanError('Translation {} has no "translator"'.format(i))
+        unknown = set(entry) - set(TranslationJob._fields)
+        if unknown:
+            raise PlanError('Translation {} has unknown fields: {}'.format(
+                i, ', '.join(sorted(unknown))))
+        if entry.get('output_key') and entry.get('output_identifier'):
+            raise PlanError('Translation {} has both an "output_key" and an'
+                            ' "output_identifier"'.format(i))
+        data_sources = entry.get('data_sources', ())
+        if isinstance(data_sources, string_types):
+            data_sources = (data_sources,)
+        res.append(TranslationJob(translator=entry['translator'],
+                                  data_sources=tuple(data_sources),
+                                  named_data_sources=dict(entry.get('named_data_sources') or ()),
+                                  output_key=entry.get('output_key'),
+                                  output_identifier=entry.get('output_identifier')))
+    return res
+
+
+def job_dependencies(jobs):
+    '''
+    Find the translations which make the inputs of each translation
+
+    Parameters
+    ----------
+    jobs : list of TranslationJob
+        The plan
+
+    Returns
+    -------
+    list of set
+        For each job, the indexes of the jobs whose outputs are among its data
+        sources
+    '''
+    producers = dict()
+    for i, job in enumerate(jobs):
+        if job.output_identifier is None:
+            continue
+        if job.output_identifier in producers:
+            raise PlanError('More than one translation outputs ' + job.output_identifier)
+        producers[job.output_identifier] = i
+
+    res = []
+    for i, job in enumerate(jobs):
+        deps = set(producers[s] for s in _sources(job) if s in producers)
+        if i in deps:
+            raise PlanError('Translation {} takes its own output as input'.format(i))
+        res.append(deps)
+    return res
+
+
+def _sources(job):
+    return tuple(job.data_sources) + tuple(job.named_data_sources.values())
+
+
+def translation_order(deps):
+    '''
+    Order jobs such that each comes after the jobs it depends on
+
+    Jobs are otherwise kept in their original order
+
+    Parameters
+    ----------
+    deps : list of set
+        The dependencies of each job, as from `job_dependencies`
+
+    Returns
+    -------
+    list of int
+        Indexes of the jobs
+    '''
+    remaining = [set(d) for d in deps]
+    res = []
+    done = set()
+    while len(res) < len(deps):
+        ready = [i for i, d in enumerate(remaining)
+                 if i not in done and d <= done]
+        if not ready:
+            cycle = sorted(i for i in range(len(deps)) if i not in done)
+            raise PlanError('Translations depend on each other in a cycle: ' +
+                            ', '.join(str(i) for i in cycle))
+        res += ready
+        done.update(ready)
+    return res
+
+
+def check_types(jobs, deps, translator_types):
+    '''
+    Check that the outputs of translations are of the types their dependents
+    take as input
+
+    Parameters
+    ----------
+    jobs : list of TranslationJob
+        The plan
+    deps : list of set
+        The dependencies of each job, as from `job_dependencies`
+    translator_types : dict
+        Maps each translator identifier to a pair of its
+        `~PyOpenWorm.datasource.BaseDataTranslator.input_type` and
+        `~PyOpenWorm.datasource.BaseDataTranslator.output_type`
+    '''
+    producers = dict((jobs[d].output_identifier, d) for job_deps in deps for d in job_deps)
+    for i, job in enumerate(jobs):
+        input_type = translator_types[job.translator][0]
+        for k, src in enumerate(job.data_sources):
+            if src not in producers:
+                continue
+            output_type = translator_types[jobs[producers[src]].translator][1]
+            expected = _input_type_at(input_type, k)
+            if expected is not None and not issubclass(output_type, expected):
+                raise PlanError('Translation {} takes a {} as data source {}, but {}'
+                                ' outputs a {}'.format(i, expected.__name__, k, src,
+                                                       output_type.__name__))
+
+
+def _input_type_at(input_type, k):
+    from .datasource import OneOrMore
+    if isinstance(input_type, OneOrMore):
+        return input_type.source_type
+    if isinstance(input_type, (tuple, list)):
+        return input_type[k] if k < len(input_type) else None
+    return input_type
+
+
+def run_jobs(worker, args, deps, processes=None):
+    '''
+    Call `worker` for each job once the jobs it depends on have finished
+
+    Parameters
+    ----------
+    worker : callable
+        Called with a job's argument and a list of the results of all of the
+        jobs it depends on, directly or not, in the order they were run. It
+        must be picklable, so defined at module level, unless `processes` is 1
+    args : list
+        The argument for each job. Must be picklable, unless `processes` is 1
+    deps : list of set
+        The dependencies of each job, as from `job_dependencies`
+    processes : int
+        The number of jobs to run at once. If 1 or less, jobs are run in this
+        process, one after the other. Defaults to the number of CPUs
+
+    Yields
+    ------
+    tuple
+        The index and result of each job as it finishes
+
+    Raises
+    ------
+    PlanError
+        If a job raises an exception, its result can't be sent back, or the
+        process running it dies
+    '''
+    order = translation_order(deps)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes <= 1 or len(args) <= 1:
+        results = dict()
+        finished = []
+        for i in order:
+            results[i] = worker(args[i], _ancestor_results(i, deps, finished, results))
+            finished.append(i)
+            yield i, results[i]
+        return
+
+    done = queue.Queue()
+    pool = multiprocessing.Pool(min(processes, len(args)))
+    workers = _worker_pids(pool)
+    running = set()
+    try:
+        results = dict()
+        finished = []
+        started = set()
+        while len(finished) < len(args):
+            for i in order:
+                if i not in started and deps[i] <= set(finished):
+                    started.add(i)
+                    running.add(i)
+                    kwargs = dict(callback=done.put)
+                    if not PY2:
+                        kwargs['error_callback'] = partial(_put_error, done, i)
+                    pool.apply_async(_call_worker,
+                                     (worker, i, args[i],
+                                      _ancestor_results(i, deps, finished, results)),
+                                     **kwargs)
+            i, error, result = _next_done(done, pool, workers)
+            running.discard(i)
+            if error is not None:
+                raise PlanError('Translation {} failed:\n{}'.format(i, error))
+            result = pickle.loads(result)
+            results[i] = result
+            finished.append(i)
+            yield i, result
+    finally:
+        pool.close()
+        # Terminating a worker while it sends back a result leaves the pool
+        # unable to shut down, so the jobs still running are waited for, and
+        # the workers only terminated if one has died
+        try:
+            while running:
+                running.discard(_next_done(done, pool, workers)[0])
+        except PlanError:
+            pool.terminate()
+        pool.join()
+
+
+def _next_done(done, pool, workers):
+    while True:
+        try:
+            return done.get(timeout=LIVENESS_CHECK_INTERVAL)
+        except queue.Empty:
+            # The pool replaces a worker which dies, but the job it was running
+            # is lost and would be waited for forever
+            if _worker_pids(pool) != workers:
+                raise PlanError('A translation process died')
+
+
+def _ancestor_results(i, deps, finished, results):
+    ancestors = set()
+    stack = list(deps[i])
+    while stack:
+        d = stack.pop()
+        if d not in ancestors:
+            ancestors.add(d)
+            stack.extend(deps[d])
+    return [results[d] for d in finished if d in ancestors]
+
+
+def _put_error(done, i, error):
+    done.put((i, ''.join(traceback.format_exception_only(type(error), error)), None))
+
+
+def _worker_pids(pool):
+    # The live worker processes. Pool has no public way to list them
+    return frozenset(p.pid for p in pool._pool if p.exitcode is None)
+
+
+def _call_worker(worker, i, arg, dep_results):
+    # Errors are sent back as formatted tracebacks since the exceptions
+    # themselves may not be picklable. The result is pickled here so that a
+    # result which can't be is reported like any other error
+    try:
+        return i, None, pickle.dumps(worker(arg, dep_results), pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return i, traceback.format_exc(), None
@@ -3,8 +3,12 @@ Common utilities for translation, massaging data, etc., that don't fit
 elsewhere in PyOpenWorm
 """
 import re
+import heapq
+import tempfile
+from itertools import islice
+from six.moves import cPickle as pickle
 
-__all__ = ['normalize_cell_name', 'grouper']
+__all__ = ['normalize_cell_name', 'grouper', 'chunks', 'external_sort']
 # to normalize certain neuron and muscle names
 SEARCH_STRING = re.compile(r'\w+0+[1-9]+')
 REPLACE_STRING = re.compile(r'0+')
@@ -44,3 +48,70 @@ def grouper(iterable, n, fillvalue=None):
         yield l
         if len(l) < n:
             break
+
+
+def chunks(iterable, n):
+    """
+    Split an iterable into lists of at most `n` items
+
+    Unlike `grouper`, errors raised while reading `iterable` are passed on, and
+    there's no empty list at the end
+    """
+    it = iter(iterable)
+    return iter(lambda: list(islice(it, n)), [])
+
+
+def external_sort(iterable, run_size=100000, tmpdir=None):
+    """
+    Sort items without holding all of them in memory
+
+    Items are sorted in runs of `run_size` which are written to temporary files
+    and then merged. At most `run_size` items are held in memory at a time,
+    plus one item per run while merging. If there are no more than `run_size`
+    items, they're sorted in memory.
+
+    Parameters
+    ----------
+    iterable : iterable
+        The items to sort. Must be picklable
+    run_size : int
+        The number of items sorted in memory at a time
+    tmpdir : str
+        Where to write the runs. Defaults to the system temporary directory
+
+    Returns
+    -------
+    iterator
+        The items in sorted order
+    """
+    it = iter(iterable)
+    first = sorted(islice(it, run_size))
+    if len(first) < run_size:
+        return iter(first)
+    return _merge_runs(first, it, run_size, tmpdir)
+
+
+def _merge_runs(first, it, run_size, tmpdir):
+    runs = []
+    try:
+        run = first
+        while run:
+            f = tempfile.TemporaryFile(dir=tmpdir)
+            runs.append(f)
+            for item in run:
+                pickle.dump(item, f, pickle.HIGHEST_PROTOCOL)
+            f.seek(0)
+            run = sorted(islice(it, run_size))
+        for item in heapq.merge(*[_read_run(f) for f in runs]):
+            yield item
+    finally:
+        for f in runs:
+            f.close()
+
+
+def _read_run(f):
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
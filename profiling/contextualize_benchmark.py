@@ -0,0 +1,55 @@
+'''
+Micro-benchmark for contextualized objects.
+
+Times contextualizing new objects, attribute access through the resulting
+proxies, and property reads on them::
+
+    python profiling/contextualize_benchmark.py [number]
+'''
+from __future__ import print_function
+import sys
+import timeit
+
+import PyOpenWorm
+from PyOpenWorm.context import Context
+from PyOpenWorm.data import Data
+from PyOpenWorm.neuron import Neuron
+
+
+def main(number=2000):
+    PyOpenWorm.connect(conf=Data())
+    try:
+        ctx = Context(ident='http://example.org/benchmark')
+        other = Context(ident='http://example.org/benchmark-other')
+        n = ctx(Neuron)(name='AVAL')
+        n.type('interneuron')
+        ctx.save_context()
+        proxy = n.contextualize(other)
+        stored = ctx.stored(Neuron)(name='AVAL')
+
+        def contextualize_new():
+            Neuron().contextualize(other)
+
+        def contextualize_property():
+            Neuron().name.contextualize(other)
+
+        def attribute_access():
+            proxy.name
+            proxy.context
+            proxy.rdf_type
+
+        def property_read():
+            stored.type()
+
+        for name, fn in (('contextualize a new Neuron', contextualize_new),
+                         ('contextualize a property', contextualize_property),
+                         ('attribute access on a proxy', attribute_access),
+                         ('property read', property_read)):
+            t = min(timeit.repeat(fn, number=number, repeat=3))
+            print('{:<32} {:8.1f} us/call'.format(name, t / number * 1e6))
+    finally:
+        PyOpenWorm.disconnect()
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,53 @@
+'''
+Memory benchmark for loaded objects.
+
+Saves a number of Connections and reports the memory allocated for each one
+when they're loaded back from the graph::
+
+    python profiling/memory_benchmark.py [count]
+'''
+from __future__ import print_function
+import gc
+import sys
+import tracemalloc
+
+import PyOpenWorm
+from PyOpenWorm.connection import Connection
+from PyOpenWorm.context import Context
+from PyOpenWorm.data import Data
+from PyOpenWorm.neuron import Neuron
+
+
+def main(count=2000):
+    PyOpenWorm.connect(conf=Data())
+    try:
+        ctx = Context(ident='http://example.org/memory-benchmark')
+        for i in range(count):
+            ctx(Connection)(pre_cell=ctx(Neuron)(name='pre%d' % i),
+                            post_cell=ctx(Neuron)(name='post%d' % i),
+                            syntype='send', number=i)
+        ctx.save_context()
+        start = ctx.stored(Connection)()
+        # Loaded once first so that classes, caches, and the like are made
+        # before measuring
+        list(start.load())
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        loaded = list(ctx.stored(Connection)().load())
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        size = sum(s.size_diff for s in after.compare_to(before, 'filename'))
+        print('{:,} Connections loaded'.format(len(loaded)))
+        print('{:,.0f} bytes per loaded Connection'.format(size / float(len(loaded))))
+        print('{:,.1f} objects per loaded Connection'.format(
+            sum(s.count_diff for s in after.compare_to(before, 'filename')) / float(len(loaded))))
+    finally:
+        PyOpenWorm.disconnect()
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -82,6 +82,9 @@ setup(
     ] + (['zodbpickle==1.0', 'backports.tempfile==1.0'] if PY2 else [])
       + (['scandir'] if sys.version_info.major < 3 or
           sys.version_info.major == 3 and sys.version_info.minor < 5 else []),
+    extras_require={
+        'adjacency': ['numpy', 'scipy'],
+    },
     version=version,
     packages=['PyOpenWorm',
               'PyOpenWorm.data_trans',
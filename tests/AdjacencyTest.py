@@ -0,0 +1,60 @@
+from __future__ import absolute_import
+import unittest
+
+try:
+    import scipy  # noqa: F401
+    has_scipy = True
+except ImportError:
+    has_scipy = False
+
+from PyOpenWorm.adjacency import Adjacency
+
+
+@unittest.skipIf(not has_scipy, 'SciPy is not installed')
+class AdjacencyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.adj = Adjacency.from_edges([('a', 'b', 2),
+                                         ('b', 'c', 1),
+                                         ('a', 'b', 1),
+                                         ('a', 'c', 5)],
+                                        cells=['d'])
+
+    def test_cells_sorted(self):
+        self.assertEqual(['a', 'b', 'c', 'd'], self.adj.cells)
+
+    def test_index(self):
+        self.assertEqual(2, self.adj.index['c'])
+
+    def test_parallel_edges_summed(self):
+        self.assertEqual(3, self.adj.weight('a', 'b'))
+
+    def test_degree(self):
+        self.assertEqual(8, self.adj.degree('a', 'pre'))
+        self.assertEqual(6, self.adj.degree('c', 'post'))
+        self.assertEqual(4, self.adj.degree('b'))
+
+    def test_degree_bad_direction(self):
+        with self.assertRaises(ValueError):
+            self.adj.degree('a', 'sideways')
+
+    def test_degrees(self):
+        self.assertEqual({'a': 8, 'b': 4, 'c': 6, 'd': 0}, self.adj.degrees())
+
+    def test_neighbors(self):
+        self.assertEqual(['b', 'c'], sorted(self.adj.neighbors('a')))
+
+    def test_shortest_path_length(self):
+        self.assertEqual(4, self.adj.shortest_path_length('a', 'c'))
+
+    def test_shortest_path_unweighted(self):
+        self.assertEqual(1, self.adj.shortest_path_length('a', 'c', unweighted=True))
+
+    def test_no_path(self):
+        self.assertEqual(float('inf'), self.adj.shortest_path_length('c', 'a'))
+
+    def test_undirected(self):
+        self.assertEqual(4, self.adj.shortest_path_length('c', 'a', directed=False))
+
+    def test_shortest_paths_cached(self):
+        self.assertIs(self.adj.shortest_paths(), self.adj.shortest_paths())
@@ -0,0 +1,206 @@
+from __future__ import absolute_import
+
+import shutil
+import tempfile
+import threading
+import unittest
+from os.path import join as p
+
+import rdflib as R
+
+import PyOpenWorm
+from PyOpenWorm.async_query import QueryRunner, query_runner, pattern_key, asyncio
+from PyOpenWorm.context import Context
+from PyOpenWorm.data import Data
+from PyOpenWorm.dataObject import DataObject
+
+from .DataTestTemplate import _DataTest
+
+EX = R.Namespace('http://example.org/')
+
+
+def run(*futures):
+    loop = asyncio.get_event_loop()
+    return loop.run_until_complete(asyncio.gather(*futures))
+
+
+@unittest.skipIf(asyncio is None, 'asyncio is not available')
+class QueryRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.cut = QueryRunner()
+        self.gate = threading.Event()
+        # Holds up the worker so that the reads started in a test are in
+        # flight together
+        self.blocker = self.cut.run(self.gate.wait)
+
+    def tearDown(self):
+        self.gate.set()
+        self.cut.close()
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def finish(self, *futures):
+        self.gate.set()
+        return run(self.blocker, *futures)[1:]
+
+    def test_result(self):
+        self.assertEqual([3], self.finish(self.cut.run(lambda: 3)))
+
+    def test_same_key_shared(self):
+        calls = []
+
+        def read():
+            calls.append(1)
+            return 'r'
+
+        res = self.finish(self.cut.run(read, 'k'), self.cut.run(read, 'k'))
+        self.assertEqual(['r', 'r'], res)
+        self.assertEqual(1, len(calls))
+        self.assertEqual(1, self.cut.shared)
+
+    def test_different_keys_not_shared(self):
+        self.assertEqual([1, 2], self.finish(self.cut.run(lambda: 1, 'a'),
+                                             self.cut.run(lambda: 2, 'b')))
+        self.assertEqual(0, self.cut.shared)
+
+    def test_no_key_not_shared(self):
+        self.assertEqual([1, 2], self.finish(self.cut.run(lambda: 1),
+                                             self.cut.run(lambda: 2)))
+
+    def test_finished_read_not_shared(self):
+        self.finish(self.cut.run(lambda: 1, 'k'))
+        self.assertEqual([2], run(self.cut.run(lambda: 2, 'k')))
+
+    def test_error_to_every_caller(self):
+        def read():
+            raise ValueError()
+
+        a = self.cut.run(read, 'k')
+        b = self.cut.run(read, 'k')
+        self.gate.set()
+        for f in (a, b):
+            with self.assertRaises(ValueError):
+                self.loop.run_until_complete(f)
+
+    def test_cancel_leaves_other_callers(self):
+        a = self.cut.run(lambda: 1, 'k')
+        b = self.cut.run(lambda: 1, 'k')
+        a.cancel()
+        self.assertEqual([1], self.finish(b))
+
+
+class PatternKeyTest(unittest.TestCase):
+
+    def test_variable_names_ignored(self):
+        a = [(R.Variable('a'), EX.p, R.Variable('b')), (R.Variable('b'), EX.q, R.Literal(1))]
+        b = [(R.Variable('c'), EX.p, R.Variable('d')), (R.Variable('d'), EX.q, R.Literal(1))]
+        self.assertEqual(pattern_key(a, R.Variable('a')), pattern_key(b, R.Variable('c')))
+
+    def test_start_distinguished(self):
+        a = [(R.Variable('a'), EX.p, R.Variable('b'))]
+        self.assertNotEqual(pattern_key(a, R.Variable('a')), pattern_key(a, R.Variable('b')))
+
+    def test_different_patterns(self):
+        a = [(R.Variable('a'), EX.p, R.Literal(1))]
+        b = [(R.Variable('a'), EX.p, R.Literal(2))]
+        self.assertNotEqual(pattern_key(a, R.Variable('a')), pattern_key(b, R.Variable('a')))
+
+
+@unittest.skipIf(asyncio is None, 'asyncio is not available')
+class AsyncReadTest(_DataTest):
+
+    def setUp(self):
+        super(AsyncReadTest, self).setUp()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.context(DataObject)(ident=EX.a, rdfs_label='a')
+        self.context(DataObject)(ident=EX.b, rdfs_label='b')
+        self.save()
+        self.runner = query_runner(self.config)
+        self.gate = threading.Event()
+        self.blocker = self.runner.run(self.gate.wait)
+
+    def tearDown(self):
+        self.gate.set()
+        super(AsyncReadTest, self).tearDown()
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def finish(self, *futures):
+        self.gate.set()
+        return run(self.blocker, *futures)[1:]
+
+    def stored(self, **kwargs):
+        return self.context.stored(DataObject)(**kwargs)
+
+    def test_load_async(self):
+        res, = self.finish(self.stored(rdfs_label='a').load_async())
+        self.assertEqual([EX.a], [o.identifier for o in res])
+
+    def test_load_async_shared(self):
+        a, b = self.finish(self.stored(rdfs_label='a').load_async(),
+                           self.stored(rdfs_label='a').load_async())
+        self.assertEqual(a, b)
+        self.assertEqual(1, self.runner.shared)
+
+    def test_load_async_different_objects_not_shared(self):
+        a, b = self.finish(self.stored(rdfs_label='a').load_async(),
+                           self.stored(rdfs_label='b').load_async())
+        self.assertEqual([EX.a], [o.identifier for o in a])
+        self.assertEqual([EX.b], [o.identifier for o in b])
+        self.assertEqual(0, self.runner.shared)
+
+    def test_count_async(self):
+        self.assertEqual([2], self.finish(self.stored().count_async()))
+
+    def test_get_async(self):
+        a, b = self.finish(self.stored(ident=EX.a).rdfs_label.get_async(),
+                           self.stored(ident=EX.a).rdfs_label.get_async())
+        self.assertEqual(('a',), a)
+        self.assertEqual(a, b)
+        self.assertEqual(1, self.runner.shared)
+
+    def test_get_async_with_value_set_not_shared(self):
+        a, b = self.finish(self.stored(ident=EX.a).rdfs_label.get_async(),
+                           self.stored(ident=EX.a, rdfs_label='c').rdfs_label.get_async())
+        self.assertEqual(set(['a']), set(a))
+        self.assertEqual(set(['a', 'c']), set(b))
+        self.assertEqual(0, self.runner.shared)
+
+    def test_property_count_async(self):
+        self.assertEqual([1], self.finish(self.stored(ident=EX.b).rdfs_label.count_async()))
+
+    def test_close_database_closes_runner(self):
+        self.gate.set()
+        self.config.closeDatabase()
+        self.assertIsNone(self.config['rdf.query_runner'])
+        self.config.init_database()
+
+
+@unittest.skipIf(asyncio is None, 'asyncio is not available')
+class AsyncSQLiteReadTest(unittest.TestCase):
+    ''' Reads are made in worker threads, so the store must allow them '''
+
+    def setUp(self):
+        self.testdir = tempfile.mkdtemp(prefix=__name__ + '.')
+        self.conf = Data({'rdf.source': 'sqlite',
+                          'rdf.store_conf': p(self.testdir, 'db.sqlite')})
+        PyOpenWorm.connect(conf=self.conf)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        PyOpenWorm.disconnect()
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        shutil.rmtree(self.testdir)
+
+    def test_load_async(self):
+        ctx = Context(ident=EX.ctx, conf=self.conf)
+        ctx(DataObject)(ident=EX.a, rdfs_label='a')
+        ctx.save_context()
+        res, = run(ctx.stored(DataObject)(rdfs_label='a').load_async())
+        self.assertEqual([EX.a], [o.identifier for o in res])
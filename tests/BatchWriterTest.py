@@ -0,0 +1,71 @@
+from __future__ import absolute_import
+import unittest
+import threading
+
+import rdflib as R
+
+from PyOpenWorm.batch_writer import BatchWriter
+
+EX = R.Namespace('http://example.org/')
+
+
+class RecordingGraph(object):
+    def __init__(self):
+        self.batches = []
+        self.threads = set()
+
+    def addN(self, quads):
+        self.batches.append(list(quads))
+        self.threads.add(threading.current_thread())
+
+
+def quads(n):
+    return [(EX['s' + str(i)], EX.p, R.Literal(i), None) for i in range(n)]
+
+
+class BatchWriterTest(unittest.TestCase):
+
+    def test_batches(self):
+        g = RecordingGraph()
+        with BatchWriter(g, batch_size=3) as w:
+            w.addN(quads(7))
+        self.assertEqual([3, 3, 1], [len(b) for b in g.batches])
+        self.assertEqual(7, w.quads_written)
+        self.assertEqual(3, w.batches_written)
+
+    def test_written_when_full(self):
+        g = RecordingGraph()
+        w = BatchWriter(g, batch_size=3)
+        w.addN(quads(4))
+        self.assertEqual(1, len(g.batches))
+        w.close()
+        self.assertEqual(2, len(g.batches))
+
+    def test_background(self):
+        g = RecordingGraph()
+        with BatchWriter(g, batch_size=2, background=True, max_pending=1) as w:
+            w.addN(quads(5))
+        self.assertEqual(quads(5), [q for b in g.batches for q in b])
+        self.assertNotIn(threading.current_thread(), g.threads)
+
+    def test_background_error_raised(self):
+        class Failing(object):
+            def addN(self, quads):
+                raise RuntimeError('fail')
+        w = BatchWriter(Failing(), batch_size=1, background=True)
+        w.add(quads(1)[0])
+        with self.assertRaises(RuntimeError):
+            w.close()
+
+    def test_background_with_savepoints(self):
+        with self.assertRaises(ValueError):
+            BatchWriter(RecordingGraph(), savepoints=True, background=True)
+
+    def test_savepoints(self):
+        import transaction
+        g = R.ConjunctiveGraph()
+        ctx = g.get_context(EX.ctx)
+        with transaction.manager:
+            with BatchWriter(ctx, batch_size=2, savepoints=True) as w:
+                w.addN((s, p, o, ctx) for s, p, o, _ in quads(3))
+        self.assertEqual(3, len(ctx))
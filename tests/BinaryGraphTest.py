@@ -0,0 +1,97 @@
+from __future__ import absolute_import
+import unittest
+import tempfile
+import shutil
+from io import BytesIO
+from os.path import join as p
+
+import rdflib as R
+
+from PyOpenWorm.binary_graph import (write, BinaryGraphReader, FormatError,
+                                     is_binary_graph, ntriples_lines)
+from PyOpenWorm.data import triple_hash, TRIPLE_HASH_MODULUS
+
+EX = R.Namespace('http://example.org/')
+
+TRIPLES = [
+    (EX.a, EX.p, R.Literal('1')),
+    (EX.a, EX.q, R.BNode('b0')),
+    (R.BNode('b0'), EX.p, R.Literal('two\nlines')),
+    (EX.b, EX.label, R.Literal(u'caf\xe9', lang='fr')),
+    (EX.b, EX['count'], R.Literal(3)),
+    (EX.b, EX.p, EX.a),
+]
+
+
+def _write(triples):
+    f = BytesIO()
+    content_hash = write(triples, f)
+    return f.getvalue(), content_hash
+
+
+class BinaryGraphTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        data, _ = _write(TRIPLES)
+        self.assertEqual(TRIPLES, list(BinaryGraphReader(data).triples()))
+
+    def test_terms_written_once(self):
+        data, _ = _write(TRIPLES)
+        reader = BinaryGraphReader(data)
+        self.assertEqual(len(set(t for tr in TRIPLES for t in tr)), len(reader.terms))
+        self.assertEqual(len(TRIPLES), len(reader))
+
+    def test_content_hash(self):
+        data, content_hash = _write(TRIPLES)
+        expected = sum(triple_hash(t) for t in TRIPLES) % TRIPLE_HASH_MODULUS
+        self.assertEqual(expected, content_hash)
+        self.assertEqual(expected, BinaryGraphReader(data).content_hash)
+
+    def test_bnode_factory(self):
+        data, _ = _write(TRIPLES)
+        reader = BinaryGraphReader(data)
+        self.assertTrue(reader.has_bnodes)
+        triples = list(reader.triples(lambda b: R.BNode('x' + b)))
+        self.assertEqual(R.BNode('xb0'), triples[1][2])
+        self.assertEqual(R.BNode('xb0'), triples[2][0])
+
+    def test_is_binary_graph(self):
+        data, _ = _write(TRIPLES)
+        self.assertTrue(is_binary_graph(data))
+        self.assertFalse(is_binary_graph(b'<http://example.org/a> <http://example.org/p> "1" .'))
+
+    def test_not_binary_graph(self):
+        with self.assertRaises(FormatError):
+            BinaryGraphReader(b'<http://example.org/a> <http://example.org/p> <http://example.org/q> .')
+
+    def test_ntriples_lines(self):
+        data, _ = _write(TRIPLES[:1])
+        self.assertEqual(['<http://example.org/a> <http://example.org/p> "1" .'],
+                         ntriples_lines(data))
+
+    def test_empty(self):
+        data, content_hash = _write([])
+        self.assertEqual(0, content_hash)
+        self.assertEqual([], list(BinaryGraphReader(data).triples()))
+
+
+class BinaryGraphFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testdir = tempfile.mkdtemp(prefix=__name__ + '.')
+
+    def tearDown(self):
+        shutil.rmtree(self.testdir)
+
+    def test_open(self):
+        fname = p(self.testdir, 'g.ntb')
+        with open(fname, 'wb') as f:
+            write(TRIPLES, f)
+        with BinaryGraphReader.open(fname) as reader:
+            self.assertEqual(TRIPLES, list(reader.triples()))
+
+    def test_open_empty_file(self):
+        fname = p(self.testdir, 'g.ntb')
+        open(fname, 'wb').close()
+        with self.assertRaises(FormatError):
+            BinaryGraphReader.open(fname)
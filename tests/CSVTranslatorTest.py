@@ -0,0 +1,103 @@
+from __future__ import absolute_import
+import unittest
+
+from PyOpenWorm.context import Context
+from PyOpenWorm.neuron import Neuron
+from PyOpenWorm.muscle import Muscle
+from PyOpenWorm.cell import Cell
+from PyOpenWorm.connection import Connection
+from PyOpenWorm.network import Network
+from PyOpenWorm.worm import Worm
+from PyOpenWorm.utils import normalize_cell_name
+from PyOpenWorm.data_trans.csv_ds import column_chunks, map_column
+from PyOpenWorm.data_trans.connections import (ConnectionAdder, add_synapse, convert_to_cell,
+                                               normalize_muscle, changed_muscle, MUSCLES)
+
+from .DataTestTemplate import _DataTest
+
+
+class ColumnChunksTest(unittest.TestCase):
+
+    def test_chunks(self):
+        rows = [['a', '1'], ['b', '2'], ['c', '3']]
+        self.assertEqual([[('a', 'b'), ('1', '2')], [('c',), ('3',)]],
+                         list(column_chunks(iter(rows), chunk_size=2)))
+
+    def test_empty(self):
+        self.assertEqual([], list(column_chunks(iter([]))))
+
+    def test_ragged_rows(self):
+        with self.assertRaises(ValueError):
+            list(column_chunks(iter([['a', '1'], ['b']])))
+
+
+class MapColumnTest(unittest.TestCase):
+
+    def test_once_per_value(self):
+        calls = []
+
+        def fn(v):
+            calls.append(v)
+            return v.upper()
+        table = dict()
+        self.assertEqual(['A', 'B', 'A'], map_column(['a', 'b', 'a'], fn, table))
+        self.assertEqual(['B'], map_column(['b'], fn, table))
+        self.assertEqual(['a', 'b'], calls)
+
+
+class ConnectionAdderTest(_DataTest):
+
+    neurons = ['ADAL', 'ADAR', 'AVAL']
+    muscles = ['MDL08', 'MU_ANAL']
+    rows = [('ADAL', ' ADAR', '3', 'chemical'),
+            ('ADAL', 'MDL08', '1', 'electrical'),
+            ('MC1V', 'PM1D', '2', 'send'),
+            ('ANAL', 'ADAL', '4', 'Send'),
+            ('VBWML1', 'AVAL', '5', 'other'),
+            ('ADAL', 'ADAR', '3', 'chemical')]
+
+    def add_connections(self, add):
+        data_ctx = Context(ident='http://example.org/data', conf=self.TestConfig)
+        doc_ctx = Context(ident='http://example.org/doc', conf=self.TestConfig)
+        net = data_ctx(Network)(worm=data_ctx(Worm)())
+        with doc_ctx(Neuron, Muscle, Cell, Connection) as ctx:
+            add(ctx, net)
+        return set(doc_ctx.contents_triples()), set(data_ctx.contents_triples())
+
+    def add_objects(self, ctx, net):
+        ''' Adds the connections as the translator did before `ConnectionAdder` '''
+        for row in self.rows:
+            source, target, weight, syn_type = map(str.strip, row)
+            if syn_type == 'electrical':
+                syn_type = 'gapJunction'
+            elif syn_type == 'chemical':
+                syn_type = 'send'
+            source = normalize_cell_name(source).upper()
+            target = normalize_cell_name(target).upper()
+            if 'BWM' in source:
+                source = normalize_muscle(source)
+            if 'BWM' in target:
+                target = normalize_muscle(target)
+            if source in MUSCLES:
+                source = changed_muscle(source)
+            if target in MUSCLES:
+                target = changed_muscle(target)
+            sources = convert_to_cell(ctx, source, self.muscles, self.neurons)
+            targets = convert_to_cell(ctx, target, self.muscles, self.neurons)
+            for s in sources:
+                for t in targets:
+                    net.synapse(add_synapse(ctx, s, t, int(weight), syn_type))
+
+    def add_columns(self, ctx, net):
+        adder = ConnectionAdder(ctx, net, self.muscles, self.neurons)
+        for columns in column_chunks(iter(self.rows), chunk_size=4):
+            adder.add(*columns)
+        self.counts = adder.counts
+
+    def test_same_triples(self):
+        self.assertEqual(self.add_connections(self.add_objects),
+                         self.add_connections(self.add_columns))
+
+    def test_counts(self):
+        self.add_connections(self.add_columns)
+        self.assertEqual({'neuron': 2, 'muscle': 1, None: 2}, self.counts)
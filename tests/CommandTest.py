@@ -13,6 +13,7 @@ import json
 from rdflib.term import URIRef
 from pytest import mark
 import re
+import transaction
 
 import git
 from PyOpenWorm.git_repo import GitRepoProvider, _CloneProgress
@@ -412,6 +413,25 @@ class POWTest(BaseTest):
             self.cut.save('tests', 'test')
             c[0]._backer.save_context.assert_called()
 
+    def test_serialize_graphs_format_change_removes_old_file(self):
+        q = (URIRef('http://example.org/s'),
+             URIRef('http://example.org/p'),
+             URIRef('http://example.org/o'),
+             URIRef('http://example.org/c'))
+        self._init_conf()
+        self.cut.repository_provider = Mock()
+        with transaction.manager:
+            self.cut._conf()['rdf.graph'].addN([q])
+        self.cut._serialize_graphs()
+        old_files = listdir(p('.pow', 'graphs'))
+
+        self.cut._conf()['graphs.format'] = 'binary'
+        self.cut._serialize_graphs()
+        old_graph_files = [p('graphs', f) for f in old_files if f != 'index']
+        self.assertEqual(1, len(old_graph_files))
+        self.cut.repository_provider.remove.assert_called_with(old_graph_files)
+        self.assertFalse(exists(p('.pow', old_graph_files[0])))
+
 
 class POWTranslateTest(BaseTest):
 
@@ -445,6 +465,23 @@ class POWTranslateTest(BaseTest):
         with self.assertRaisesRegexp(GenericUserError, re.escape(source)):
             self.cut.translate(translator, imports_context_ident, data_sources=(source,))
 
+    def test_translate_all_unknown_translator_message(self):
+        translator = 'http://example.org/translator'
+        with open('plan.json', 'w') as f:
+            json.dump([{'translator': translator}], f)
+        with self.assertRaisesRegexp(GenericUserError, re.escape(translator)):
+            self.cut.translate_all('plan.json')
+
+    def test_translate_all_unknown_source_message(self):
+        source = 'http://example.org/source'
+        with open('plan.json', 'w') as f:
+            json.dump([{'translator': 'http://example.org/translator',
+                        'data_sources': [source]}], f)
+        self.cut._lookup_translator = lambda *args, **kwargs: Mock()
+        self.cut._lookup_source = lambda *args, **kwargs: None
+        with self.assertRaisesRegexp(GenericUserError, re.escape(source)):
+            self.cut.translate_all('plan.json')
+
     # Test saving a translator ensures the input and output types are saved source is saved
 
 
@@ -648,6 +685,37 @@ class GitCommandTest(BaseTest):
 
         self.assertIn(p('graphs', 'index'), [x[0] for x in repo.index.entries])
 
+    def test_regendb_incremental_reloads_changed_file(self):
+        self.cut.init()
+        self._add_to_graph()
+        self.cut.commit('Commit Message')
+
+        fname = self.cut._context_fnames['http://example.org/c']
+        with open(fname, 'a') as f:
+            f.write('<http://example.org/s> <http://example.org/p> <http://example.org/o2> .\n')
+        self.cut.regendb(incremental=True)
+
+        ctx = self.cut._rdf().get_context(URIRef('http://example.org/c'))
+        self.assertIn((URIRef('http://example.org/s'),
+                       URIRef('http://example.org/p'),
+                       URIRef('http://example.org/o2')), ctx)
+        self.assertEqual(2, len(ctx))
+
+    def test_regendb_incremental_removes_unindexed_context(self):
+        self.cut.init()
+        self._add_to_graph()
+        self.cut.commit('Commit Message')
+
+        g = self.cut._rdf()
+        g.get_context(URIRef('http://example.org/uncommitted')).add(
+            (URIRef('http://example.org/s'),
+             URIRef('http://example.org/p'),
+             URIRef('http://example.org/o')))
+        self.cut.regendb(incremental=True)
+
+        self.assertEqual(0, len(g.get_context(URIRef('http://example.org/uncommitted'))))
+        self.assertEqual(1, len(g.get_context(URIRef('http://example.org/c'))))
+
     def _add_to_graph(self):
         m = Mock()
         q = (URIRef('http://example.org/s'),
@@ -0,0 +1,90 @@
+from __future__ import absolute_import
+import unittest
+import rdflib as R
+
+from PyOpenWorm.data import ContextHashes, triple_hash, TRIPLE_HASH_MODULUS
+
+from .DataTestTemplate import _DataTest
+
+CTX = R.URIRef('http://example.org/ctx')
+
+
+def _trip(n):
+    return (R.URIRef('http://example.org/s' + str(n)),
+            R.URIRef('http://example.org/p'),
+            R.Literal(n))
+
+
+def _expected(graph):
+    return sum(triple_hash(t) for t in graph) % TRIPLE_HASH_MODULUS
+
+
+class ContextHashesTest(unittest.TestCase):
+
+    def test_unknown(self):
+        self.assertIsNone(ContextHashes().get(CTX))
+
+    def test_set_get(self):
+        ch = ContextHashes()
+        ch.set(CTX, 5)
+        self.assertEqual(5, ch.get(CTX))
+
+    def test_invalidate(self):
+        ch = ContextHashes()
+        ch.set(CTX, 5)
+        ch.invalidate(CTX)
+        self.assertIsNone(ch.get(CTX))
+
+    def test_invalidate_all(self):
+        ch = ContextHashes()
+        ch.set(CTX, 5)
+        ch.set(R.URIRef('http://example.org/other'), 6)
+        ch.invalidate()
+        self.assertEqual(0, len(ch.mapping))
+
+    def test_triple_hash_stable(self):
+        self.assertEqual(triple_hash(_trip(1)), triple_hash(_trip(1)))
+        self.assertNotEqual(triple_hash(_trip(1)), triple_hash(_trip(2)))
+
+
+class ContextHashesGraphTest(_DataTest):
+
+    def setUp(self):
+        super(ContextHashesGraphTest, self).setUp()
+        self.g = self.config['rdf.graph']
+        self.hashes = self.config['rdf.graph.context_hashes']
+        self.hashes.set(CTX, 0)
+
+    def test_add_updates_hash(self):
+        self.g.add(_trip(1) + (CTX,))
+        self.g.add(_trip(2) + (CTX,))
+        self.assertEqual(_expected(self.g.get_context(CTX)), self.hashes.get(CTX))
+
+    def test_add_through_context_updates_hash(self):
+        self.g.get_context(CTX).add(_trip(1))
+        self.assertEqual(_expected(self.g.get_context(CTX)), self.hashes.get(CTX))
+
+    def test_duplicate_add_no_change(self):
+        self.g.add(_trip(1) + (CTX,))
+        self.g.add(_trip(1) + (CTX,))
+        self.assertEqual(triple_hash(_trip(1)), self.hashes.get(CTX))
+
+    def test_order_independent(self):
+        other = R.URIRef('http://example.org/other')
+        self.hashes.set(other, 0)
+        for i in range(5):
+            self.g.add(_trip(i) + (CTX,))
+        for i in reversed(range(5)):
+            self.g.add(_trip(i) + (other,))
+        self.assertEqual(self.hashes.get(CTX), self.hashes.get(other))
+
+    def test_remove_hash_not_stale(self):
+        self.g.add(_trip(1) + (CTX,))
+        self.g.add(_trip(2) + (CTX,))
+        self.g.remove(_trip(1) + (CTX,))
+        self.assertIn(self.hashes.get(CTX), (None, _expected(self.g.get_context(CTX))))
+
+    def test_unknown_hash_not_updated(self):
+        other = R.URIRef('http://example.org/other')
+        self.g.add(_trip(1) + (other,))
+        self.assertIsNone(self.hashes.get(other))
@@ -239,6 +239,141 @@ class ContextTest(_DataTest):
         ctx1.save_context(graph, inline_imports=True)
         self.assertEqual(ctx1.triples_saved, 3)
 
+    def test_staged_graph_sees_later_statements(self):
+        ident_uri = 'http://example.com/context_1'
+        ctx = Context(ident=ident_uri)
+        ctx.add_statement(create_mock_statement(ident_uri, 1))
+        graph = ctx.rdf_graph()
+        self.assertEqual(1, len(graph))
+        ctx.add_statement(create_mock_statement(ident_uri, 2))
+        self.assertIs(graph, ctx.rdf_graph())
+        self.assertEqual(2, len(graph))
+
+    def test_staged_graph_remove_statement(self):
+        ident_uri = 'http://example.com/context_1'
+        ctx = Context(ident=ident_uri)
+        stmt = create_mock_statement(ident_uri, 1)
+        ctx.add_statement(stmt)
+        ctx.add_statement(create_mock_statement(ident_uri, 2))
+        graph = ctx.rdf_graph()
+        ctx.remove_statement(stmt)
+        self.assertEqual(set([(True, 2, -2)]), set(graph.triples((None, None, None))))
+
+    def test_staged_graph_duplicate_statement_removed_once(self):
+        ident_uri = 'http://example.com/context_1'
+        ctx = Context(ident=ident_uri)
+        stmt = create_mock_statement(ident_uri, 1)
+        ctx.add_statement(stmt)
+        ctx.add_statement(create_mock_statement(ident_uri, 1))
+        ctx.remove_statement(stmt)
+        self.assertEqual(1, len(ctx.rdf_graph()))
+
+    def test_staged_graph_sees_imported_changes(self):
+        ctx = Context(ident='http://example.com/context_1')
+        ctx2 = Context(ident='http://example.com/context_2')
+        ctx.add_import(ctx2)
+        graph = ctx.rdf_graph()
+        ctx2.add_statement(create_mock_statement('http://example.com/context_2', 1))
+        self.assertEqual(set([(True, 1, -1)]), set(graph.triples((None, None, None))))
+
+    def test_staged_graph_undefined_becomes_defined(self):
+        ident_uri = 'http://example.com/context_1'
+        ctx = Context(ident=ident_uri)
+        stmt = create_mock_statement(ident_uri, 1)
+        stmt.to_triple.return_value = (Variable('var'), 1, -1)
+        ctx.add_statement(stmt)
+        graph = ctx.rdf_graph()
+        self.assertEqual(0, len(graph))
+        stmt.to_triple.return_value = (True, 1, -1)
+        self.assertEqual(1, len(graph))
+
+    def test_write_behind(self):
+        ident_uri = 'http://example.com/context_1'
+        graph = rdflib.ConjunctiveGraph()
+        ctx = Context(ident=ident_uri)
+        ctx._set_buffer_size = 2
+        with ctx.write_behind(graph):
+            for i in range(5):
+                ctx.add_statement(create_triple_statement(ident_uri, i))
+                self.assertLess(len(ctx), 2)
+        self.assertEqual(0, len(ctx))
+        self.assertEqual(5, len(graph.get_context(URIRef(ident_uri))))
+
+    def test_write_behind_keeps_undefined(self):
+        ident_uri = 'http://example.com/context_1'
+        graph = rdflib.ConjunctiveGraph()
+        ctx = Context(ident=ident_uri)
+        ctx._set_buffer_size = 1
+        stmt = create_triple_statement(ident_uri, 1)
+        stmt.to_triple.return_value = (Variable('var'), URIRef('p'), URIRef('o'))
+        with ctx.write_behind(graph):
+            ctx.add_statement(stmt)
+        self.assertEqual(1, len(ctx))
+        self.assertEqual(0, len(graph))
+
+    def test_write_behind_undefined_not_counted(self):
+        ident_uri = 'http://example.com/context_1'
+        graph = rdflib.ConjunctiveGraph()
+        ctx = Context(ident=ident_uri)
+        ctx._set_buffer_size = 2
+        for i in range(2):
+            stmt = create_triple_statement(ident_uri, i)
+            stmt.to_triple.return_value = (Variable('var'), URIRef('p'), URIRef('o'))
+            ctx.add_statement(stmt)
+        with patch.object(ctx, '_write_behind_statements',
+                          wraps=ctx._write_behind_statements) as write:
+            with ctx.write_behind(graph):
+                for i in range(2, 6):
+                    ctx.add_statement(create_triple_statement(ident_uri, i))
+                # The first write keeps the undefined statements, and the
+                # next waits for two more
+                self.assertEqual(2, write.call_count)
+        self.assertEqual(2, len(ctx))
+        self.assertEqual(4, len(graph.get_context(URIRef(ident_uri))))
+
+    def test_write_behind_triples_saved(self):
+        ident_uri = 'http://example.com/context_1'
+        graph = rdflib.ConjunctiveGraph()
+        ctx = Context(ident=ident_uri)
+        ctx._set_buffer_size = 2
+        with ctx.write_behind(graph):
+            for i in range(3):
+                ctx.add_statement(create_triple_statement(ident_uri, i))
+        ctx.add_statement(create_triple_statement(ident_uri, 3))
+        ctx.save_context(graph)
+        self.assertEqual(4, ctx.triples_saved)
+
+    def test_add_triples_saved(self):
+        graph = set()
+        ident_uri = 'http://example.com/context_1'
+        ctx = Context(ident=ident_uri)
+        ctx.add_statement(create_triple_statement(ident_uri, 0))
+        ctx.add_triples([(URIRef('http://example.org/s'), URIRef('http://example.org/p'),
+                          rdflib.Literal(i)) for i in range(3)])
+        self.assertEqual(4, len(ctx))
+        ctx.save_context(graph)
+        self.assertEqual(4, len(graph))
+        self.assertEqual(4, ctx.triples_saved)
+
+    def test_add_triples_staged(self):
+        ident_uri = 'http://example.com/context_1'
+        ctx = Context(ident=ident_uri)
+        triple = (URIRef('http://example.org/s'), URIRef('http://example.org/p'), rdflib.Literal(1))
+        ctx.add_triples([triple])
+        self.assertIn(triple, ctx.load_staged_graph())
+
+    def test_add_triples_write_behind(self):
+        ident_uri = 'http://example.com/context_1'
+        graph = rdflib.ConjunctiveGraph()
+        ctx = Context(ident=ident_uri)
+        ctx._set_buffer_size = 2
+        with ctx.write_behind(graph):
+            ctx.add_triples([(URIRef('http://example.org/s'), URIRef('http://example.org/p'),
+                              rdflib.Literal(i)) for i in range(3)])
+            self.assertEqual(0, len(ctx))
+        self.assertEqual(3, len(graph.get_context(URIRef(ident_uri))))
+        self.assertEqual(0, len(ctx.load_staged_graph()))
+
     def test_context_getter(self):
         ctx = Context(ident='http://example.com/context_1')
         self.assertIsNone(ctx.context)
@@ -397,3 +532,12 @@ def create_mock_statement(ident_uri, stmt_id):
     statement.context.identifier = rdflib.term.URIRef(ident_uri)
     statement.to_triple.return_value = (True, stmt_id, -stmt_id)
     return statement
+
+
+def create_triple_statement(ident_uri, stmt_id):
+    statement = MagicMock()
+    statement.context.identifier = rdflib.term.URIRef(ident_uri)
+    statement.to_triple.return_value = (URIRef('http://example.org/s' + str(stmt_id)),
+                                        URIRef('http://example.org/p'),
+                                        rdflib.Literal(stmt_id))
+    return statement
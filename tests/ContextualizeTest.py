@@ -0,0 +1,129 @@
+from __future__ import absolute_import
+
+import unittest
+
+import six
+
+from PyOpenWorm.contextualize import (BaseContextualizable, ContextualizingProxy,
+                                      ContextualizableClass, contextualize_helper,
+                                      contextualizing_proxy_type)
+
+
+class Ctxble(BaseContextualizable):
+    marker = 'class value'
+
+    def __init__(self):
+        super(Ctxble, self).__init__()
+        self.value = 1
+
+    def contextualize_augment(self, context):
+        return contextualize_helper(context, self)
+
+    def method(self):
+        return self.context
+
+
+class Ctx(object):
+    ''' A stand-in for a Context. Just needs to be hashable and weak-referenceable '''
+
+
+class ContextualizeHelperTest(unittest.TestCase):
+
+    def test_proxy(self):
+        ctx = Ctx()
+        res = Ctxble().contextualize(ctx)
+        self.assertIsInstance(res, ContextualizingProxy)
+        self.assertIs(ctx, res.context)
+
+    def test_method_gets_context(self):
+        ctx = Ctx()
+        self.assertIs(ctx, Ctxble().contextualize(ctx).method())
+
+    def test_instance_and_class_attributes(self):
+        res = Ctxble().contextualize(Ctx())
+        self.assertEqual(1, res.value)
+        self.assertEqual('class value', res.marker)
+
+    def test_proxy_type_shared(self):
+        a = Ctxble().contextualize(Ctx())
+        b = Ctxble().contextualize(Ctx())
+        self.assertIs(type(a), type(b))
+
+    def test_proxy_type_per_class(self):
+        class Sub(Ctxble):
+            pass
+        a = Ctxble().contextualize(Ctx())
+        b = Sub().contextualize(Ctx())
+        self.assertIsNot(type(a), type(b))
+
+    def test_proxy_type_remade_for_new_attribute(self):
+        class Sub(Ctxble):
+            pass
+        a = Sub().contextualize(Ctx())
+        Sub.added = 'added'
+        b = Sub().contextualize(Ctx())
+        self.assertIsNot(type(a), type(b))
+        self.assertEqual('added', b.added)
+        self.assertIs(type(b), type(Sub().contextualize(Ctx())))
+
+    def test_proxy_type_remade_for_replaced_attribute(self):
+        class Sub(Ctxble):
+            def f(self):
+                return 'orig'
+        Sub().contextualize(Ctx())
+        Sub.f = lambda self: 'patched'
+        self.assertEqual('patched', Sub().contextualize(Ctx()).f())
+
+    def test_proxy_type_remade_for_deleted_attribute(self):
+        class Sub(Ctxble):
+            marker = 'sub value'
+        Sub().contextualize(Ctx())
+        del Sub.marker
+        self.assertEqual('class value', Sub().contextualize(Ctx()).marker)
+
+    def test_contextualization_reused(self):
+        ctx = Ctx()
+        obj = Ctxble()
+        self.assertIs(obj.contextualize(ctx), obj.contextualize(ctx))
+
+    def test_no_contextualizations_until_contextualized(self):
+        obj = Ctxble()
+        self.assertNotIn('_contexts', vars(obj))
+        obj.contextualize(Ctx())
+        self.assertIn('_contexts', vars(obj))
+
+
+class CtxbleWithMeta(six.with_metaclass(ContextualizableClass, Ctxble)):
+    pass
+
+
+class ContextualizableClassProxyTypeTest(unittest.TestCase):
+
+    def setUp(self):
+        class Sub(CtxbleWithMeta):
+            marker = 'sub value'
+
+            def f(self):
+                return 'orig'
+        self.cls = Sub
+        self.proxy_type = type(Sub().contextualize(Ctx()))
+
+    def test_proxy_type_shared(self):
+        self.assertIs(self.proxy_type, type(self.cls().contextualize(Ctx())))
+
+    def test_cached_with_change_count(self):
+        # Compared with an integer rather than a snapshot of the attributes
+        self.assertIsInstance(vars(self.cls)['_contextualizing_proxy_type'][0], int)
+        self.assertIs(self.proxy_type, contextualizing_proxy_type(self.cls))
+
+    def test_proxy_type_remade_for_new_attribute(self):
+        self.cls.added = 'added'
+        self.assertEqual('added', self.cls().contextualize(Ctx()).added)
+
+    def test_proxy_type_remade_for_replaced_attribute(self):
+        self.cls.f = lambda self: 'patched'
+        self.assertEqual('patched', self.cls().contextualize(Ctx()).f())
+
+    def test_proxy_type_remade_for_deleted_attribute(self):
+        del self.cls.marker
+        self.assertEqual('class value', self.cls().contextualize(Ctx()).marker)
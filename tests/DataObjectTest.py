@@ -8,7 +8,8 @@ import warnings
 from yarom.utils import FCN
 
 from PyOpenWorm.data import DataUser
-from PyOpenWorm.dataObject import DataObject, DatatypeProperty, _partial_property
+from PyOpenWorm.dataObject import (DataObject, DatatypeProperty, _partial_property,
+                                   save_objects)
 from PyOpenWorm.neuron import Neuron
 from PyOpenWorm.connection import Connection
 from PyOpenWorm.context import Context
@@ -191,3 +192,50 @@ class DataObjectTest(_DataTest):
             owner = Mock()
             getattr(DataObject, property_classmethod)(owner=owner, linkName="")
             owner.attach_property.assert_called_once()
+
+    def test_load_prefetch_fills_po_cache(self):
+        self.context(DataObject)(ident='http://example.org/a', rdfs_label='a')
+        self.context(DataObject)(ident='http://example.org/b', rdfs_label='b')
+        self.save()
+        loaded = list(self.context.stored(DataObject)().load(prefetch=('rdfs_label',)))
+        self.assertEqual(2, len(loaded))
+        for o in loaded:
+            self.assertIn(R.RDFS.label, o.po_cache.predicates)
+
+    def test_load_prefetch_property_read_uses_cache(self):
+        self.context(DataObject)(ident='http://example.org/a', rdfs_label='a')
+        self.save()
+        o = next(self.context.stored(DataObject)().load(prefetch=('rdfs_label',)))
+        c1 = o.po_cache
+        self.assertEqual(set(['a']), o.rdfs_label())
+        self.assertIs(c1, o.po_cache)
+
+    def test_retract(self):
+        self.context(DataObject)(ident='http://example.org/a', rdfs_label='a')
+        self.context(DataObject)(ident='http://example.org/b', rdfs_label='b')
+        self.save()
+        self.context.stored(DataObject)(ident='http://example.org/a', rdfs_label='a').retract()
+        labels = set(self.config['rdf.graph'].objects(None, R.RDFS.label))
+        self.assertEqual(set([R.Literal('b')]), labels)
+
+    def test_retract_undefined(self):
+        self.context(DataObject)(ident='http://example.org/a', rdfs_label='a')
+        self.context(DataObject)(ident='http://example.org/b', rdfs_label='b')
+        self.save()
+        self.context.stored(DataObject)(rdfs_label='b').retract()
+        subjects = set(self.config['rdf.graph'].subjects(R.RDF.type, DataObject.rdf_type))
+        self.assertEqual(set([R.URIRef('http://example.org/a')]), subjects)
+
+    def test_save_objects(self):
+        objs = [DataObject(ident='http://example.org/%d' % i, rdfs_label=str(i))
+                for i in range(3)]
+        save_objects(objs)
+        labels = set(self.config['rdf.graph'].objects(None, R.RDFS.label))
+        self.assertEqual(set(R.Literal(str(i)) for i in range(3)), labels)
+
+    def test_save_objects_none(self):
+        save_objects([])
+
+    def test_load_prefetch_unknown_property(self):
+        with self.assertRaises(ValueError):
+            next(DataObject().load(prefetch=('not_a_property',)))
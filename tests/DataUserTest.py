@@ -1,7 +1,14 @@
 from __future__ import absolute_import
 from six.moves import range
+import shutil
+import tempfile
 import unittest
-from PyOpenWorm.data import DataUser
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+from os.path import join as p
+from PyOpenWorm.data import Data, DataUser
 from PyOpenWorm.configure import (Configureable, BadConf, Configure)
 import rdflib
 import rdflib as R
@@ -98,3 +105,129 @@ class DataUserTest(_DataTest):
             g.add((s, p, o))
         du = DataUser(conf=self.config)
         du.add_statements(g)
+
+
+    def test_add_statements_counts_blocks(self):
+        """ The change counter moves once per block of statements added """
+        self.config['rdf.upload_block_statement_count'] = 10
+        du = DataUser(conf=self.config)
+        start = self.config['rdf.graph.change_counter']
+        du.add_statements((rdflib.URIRef("http://somehost.com/s%d" % i),
+                           rdflib.URIRef("http://somehost.com/p"),
+                           rdflib.Literal(i)) for i in range(25))
+        self.assertEqual(3, self.config['rdf.graph.change_counter'] - start)
+        self.assertEqual(25, len(self.config['rdf.graph']))
+
+    def test_add_statements_to_named_graph(self):
+        du = DataUser(conf=self.config)
+        ident = rdflib.URIRef("http://somehost.com/ctx")
+        du._add_to_store([(rdflib.URIRef("http://somehost.com/s"),
+                           rdflib.URIRef("http://somehost.com/p"),
+                           rdflib.URIRef("http://somehost.com/o"))], graph_name=ident)
+        self.assertEqual(1, len(self.config['rdf.graph'].get_context(ident)))
+
+    def test_add_statements_error_passed_on(self):
+        """ An error while reading the statements isn't taken for their end """
+        def statements():
+            yield (rdflib.URIRef("http://somehost.com/s"),
+                   rdflib.URIRef("http://somehost.com/p"),
+                   rdflib.URIRef("http://somehost.com/o"))
+            raise RuntimeError()
+
+        testdir = tempfile.mkdtemp(prefix=__name__ + '.')
+        conf = Data({'rdf.source': 'sqlite',
+                     'rdf.store_conf': p(testdir, 'worm.sqlite'),
+                     'rdf.upload_block_statement_count': 50})
+        conf.init_database()
+        try:
+            du = DataUser(conf=conf)
+            with self.assertRaises(RuntimeError):
+                du.add_statements(statements())
+        finally:
+            conf.closeDatabase()
+            shutil.rmtree(testdir)
+
+    def test_add_statements_zodb_savepoint_per_block(self):
+        """ On ZODB, each block goes in a savepoint and there's one commit """
+        statements = [(rdflib.URIRef("http://somehost.com/s"),
+                       rdflib.URIRef("http://somehost.com/p"),
+                       rdflib.Literal(i)) for i in range(120)]
+        source = self.config['rdf.source']
+        self.config['rdf.source'] = 'ZODB'
+        try:
+            with patch('PyOpenWorm.data.transaction') as tx:
+                DataUser(conf=self.config).add_statements(statements)
+        finally:
+            self.config['rdf.source'] = source
+        self.assertEqual(3, tx.savepoint.call_count)
+        tx.savepoint.assert_called_with(optimistic=True)
+        self.assertEqual(1, tx.commit.call_count)
+
+    def test_add_statements_zodb_no_commit_on_error(self):
+        def statements():
+            for i in range(60):
+                yield (rdflib.URIRef("http://somehost.com/s"),
+                       rdflib.URIRef("http://somehost.com/p"),
+                       rdflib.Literal(i))
+            raise RuntimeError()
+
+        source = self.config['rdf.source']
+        self.config['rdf.source'] = 'ZODB'
+        try:
+            with patch('PyOpenWorm.data.transaction') as tx:
+                with self.assertRaises(RuntimeError):
+                    DataUser(conf=self.config).add_statements(statements())
+        finally:
+            self.config['rdf.source'] = source
+        tx.commit.assert_not_called()
+
+
+class RetractTest(_DataTest):
+
+    def setUp(self):
+        super(RetractTest, self).setUp()
+        self.du = DataUser(conf=self.config)
+        self.g = self.config['rdf.graph']
+        self.ns = R.Namespace('http://somehost.com/')
+        self.ctx1 = self.g.get_context(self.ns.ctx1)
+        self.ctx2 = self.g.get_context(self.ns.ctx2)
+        for i in range(3):
+            self.ctx1.add((self.ns['s%d' % i], self.ns.p, self.ns['o%d' % i]))
+            self.ctx1.add((self.ns['s%d' % i], self.ns.q, R.Literal(i)))
+        self.ctx2.add((self.ns.s0, self.ns.p, self.ns.o0))
+        self.ctx2.add((self.ns.t, self.ns.p, self.ns.u))
+
+    def test_retract_triples(self):
+        self.du.retract_statements([(self.ns.s1, self.ns.p, self.ns.o1)])
+        self.assertNotIn((self.ns.s1, self.ns.p, self.ns.o1), self.g)
+        self.assertEqual(6, len(self.g))
+
+    def test_retract_removes_from_every_context(self):
+        self.du.retract_statements([(self.ns.s0, self.ns.p, self.ns.o0)])
+        self.assertEqual(0, len(list(self.g.quads((self.ns.s0, self.ns.p, self.ns.o0)))))
+
+    def test_retract_pattern(self):
+        v = R.Variable('v')
+        self.du.retract_statements([(v, self.ns.q, R.Literal(1)),
+                                    (v, self.ns.p, R.Variable('w'))])
+        self.assertEqual(set([self.ns.s0, self.ns.s2]),
+                         set(self.g.subjects(self.ns.q, None)))
+        self.assertNotIn((self.ns.s1, self.ns.p, self.ns.o1), self.g)
+
+    def test_retract_pattern_without_match(self):
+        v = R.Variable('v')
+        self.du.retract_statements([(v, self.ns.q, R.Literal(7)),
+                                    (v, self.ns.p, R.Variable('w'))])
+        self.assertEqual(7, len(self.g))
+
+    def test_retract_patterns_matched_separately(self):
+        ''' Patterns that don't share variables don't have to all match '''
+        self.du.retract_statements([(R.Variable('a'), self.ns.q, R.Literal(0)),
+                                    (R.Variable('b'), self.ns.q, R.Literal(7))])
+        self.assertEqual(set([self.ns.s1, self.ns.s2]),
+                         set(self.g.subjects(self.ns.q, None)))
+
+    def test_retract_contexts(self):
+        self.du.retract_contexts([self.ns.ctx1])
+        self.assertEqual(0, len(self.ctx1))
+        self.assertEqual(2, len(self.ctx2))
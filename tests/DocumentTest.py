@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from .DataTestTemplate import _DataTest
-from PyOpenWorm.document import Document
+from .HTTPClientTest import StubServer
+from PyOpenWorm.document import Document, update_documents
+from PyOpenWorm.http_client import HTTPClient
+import json
 import pytest
 
 
@@ -24,6 +27,94 @@ class DocumentTest(_DataTest):
         self.assertIn(u'Jean César', Document(bibtex=bibtex).author())
 
 
+_ESUMMARY = u"""<?xml version="1.0" encoding="UTF-8"?>
+<eSummaryResult>
+{}
+</eSummaryResult>"""
+
+_DOCSUM = u"""<DocSum>
+  <Id>{pmid}</Id>
+  <Item Name="PubDate" Type="Date">{year}</Item>
+  <Item Name="AuthorList" Type="List">
+    <Item Name="Author" Type="String">{author}</Item>
+  </Item>
+  <Item Name="Title" Type="String">Paper {pmid}</Item>
+</DocSum>"""
+
+
+class UpdateDocumentsTest(_DataTest):
+    '''
+    Tests for looking up many documents at once against a local server
+    '''
+
+    def setUp(self):
+        super(UpdateDocumentsTest, self).setUp()
+        self.server = StubServer()
+        self.TestConfig['pubmed_api_root_url'] = self.server.url
+        self.TestConfig['wormbase_api_root_url'] = self.server.url
+        self.client = HTTPClient(max_workers=4)
+        self.esummary_ids = []
+
+        def esummary(query, headers):
+            ids = query['id'][0].split(',')
+            self.esummary_ids.append(ids)
+            docsums = u''.join(_DOCSUM.format(pmid=i, year=2000 + int(i), author=u'Frédéric ' + i)
+                               for i in ids if i != '404')
+            return (200, {'Content-Type': 'text/xml; charset=UTF-8'},
+                    _ESUMMARY.format(docsums).encode('UTF-8'))
+
+        self.server.routes['/entrez/eutils/esummary.fcgi'] = esummary
+
+    def tearDown(self):
+        self.server.close()
+        super(UpdateDocumentsTest, self).tearDown()
+
+    def add_wormbase_paper(self, wbid, authors):
+        body = json.dumps({'fields': {'authors': {'data': [{'label': a} for a in authors]},
+                                      'year': {'data': '2010'}}}).encode('UTF-8')
+        self.server.routes['/rest/widget/paper/' + wbid + '/overview'] = \
+            lambda q, h: (200, {'Content-Type': 'application/json'}, body)
+
+    def test_pubmed_batched(self):
+        docs = [Document(pmid=str(i), conf=self.config) for i in range(1, 6)]
+        update_documents(docs, sources=('pubmed',), client=self.client, batch_size=2)
+        self.assertEqual(3, len(self.esummary_ids))
+        self.assertEqual(set([u'Frédéric 3']), set(docs[2].author()))
+        self.assertEqual('2005', str(docs[4].year()))
+
+    def test_pubmed_missing_id(self):
+        docs = [Document(pmid='404', conf=self.config), Document(pmid='1', conf=self.config)]
+        update_documents(docs, sources=('pubmed',), client=self.client)
+        self.assertEqual([], list(docs[0].author()))
+        self.assertEqual(set([u'Frédéric 1']), set(docs[1].author()))
+
+    def test_pubmed_same_id(self):
+        docs = [Document(pmid='1', conf=self.config), Document(pmid='1', conf=self.config)]
+        update_documents(docs, sources=('pubmed',), client=self.client)
+        self.assertEqual([['1']], self.esummary_ids)
+        self.assertEqual(set([u'Frédéric 1']), set(docs[1].author()))
+
+    def test_wormbase(self):
+        self.add_wormbase_paper('WBPaper1', ['A', 'B'])
+        self.add_wormbase_paper('WBPaper2', ['C'])
+        docs = [Document(wormbase='WBPaper1', conf=self.config),
+                Document(wormbase='WBPaper2', conf=self.config),
+                Document(wormbase='WBPaper3', conf=self.config)]
+        update_documents(docs, sources=('wormbase',), client=self.client)
+        self.assertEqual(set(['A', 'B']), set(docs[0].author()))
+        self.assertEqual(set(['C']), set(docs[1].author()))
+        self.assertEqual([], list(docs[2].author()))
+
+    def test_update_from_pubmed_local(self):
+        doc = Document(pmid='7', conf=self.config)
+        doc.update_from_pubmed()
+        self.assertEqual(set([u'Frédéric 7']), set(doc.author()))
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            update_documents([Document(pmid='1', conf=self.config)], sources=('scholar',))
+
+
 @pytest.mark.inttest
 class DocumentElaborationTest(_DataTest):
     '''
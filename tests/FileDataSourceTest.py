@@ -0,0 +1,157 @@
+from __future__ import absolute_import
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from PyOpenWorm.data_trans.file_ds import hash_stream, hash_file
+from PyOpenWorm.data_trans.local_file_ds import LocalFileDataSource
+from PyOpenWorm.data_trans.http_ds import (HTTPFileDataSource, DownloadCache,
+                                           DownloadHashMismatch)
+
+from .DataTestTemplate import _DataTest
+from .HTTPClientTest import StubServer
+
+DATA = b'0123456789' * 1000
+
+
+def _digests(data):
+    return dict((a, hashlib.new(a, data).hexdigest()) for a in ('md5', 'sha256', 'sha512'))
+
+
+class HashTest(_DataTest):
+
+    def setUp(self):
+        super(HashTest, self).setUp()
+        self.testdir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.testdir, 'data')
+        with open(self.fname, 'wb') as f:
+            f.write(DATA)
+
+    def tearDown(self):
+        shutil.rmtree(self.testdir)
+        super(HashTest, self).tearDown()
+
+    def test_hash_stream(self):
+        self.assertEqual(_digests(DATA), hash_stream(io.BytesIO(DATA), chunk_size=7))
+
+    def test_hash_file(self):
+        self.assertEqual(_digests(DATA), hash_file(self.fname, chunk_size=7))
+
+    def test_hash_empty_file(self):
+        open(self.fname, 'wb').close()
+        self.assertEqual(_digests(b''), hash_file(self.fname))
+
+    def test_hash_file_some_algorithms(self):
+        self.assertEqual(set(['md5']), set(hash_file(self.fname, ('md5',))))
+
+    def test_update_hashes(self):
+        ds = LocalFileDataSource(file_name=self.fname, conf=self.config)
+        ds.update_hashes()
+        expected = _digests(DATA)
+        self.assertEqual(expected['sha512'], ds.sha512.one())
+        self.assertEqual(expected['md5'], ds.md5.one())
+
+    def test_update_hash(self):
+        ds = LocalFileDataSource(file_name=self.fname, conf=self.config)
+        ds.update_hash('sha256')
+        self.assertEqual(_digests(DATA)['sha256'], ds.sha256.one())
+        self.assertIsNone(ds.md5.one())
+
+    def test_update_hashes_unknown_algorithm(self):
+        ds = LocalFileDataSource(file_name=self.fname, conf=self.config)
+        with self.assertRaises(ValueError):
+            ds.update_hashes(('crc32',))
+
+
+class DownloadCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testdir = tempfile.mkdtemp()
+        self.cache = DownloadCache(self.testdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.testdir)
+
+    def test_add_find(self):
+        path, digests = self.cache.add(io.BytesIO(DATA))
+        self.assertEqual(_digests(DATA), digests)
+        for a in ('md5', 'sha256', 'sha512'):
+            self.assertEqual(path, self.cache.find({a: digests[a]}))
+        with open(path, 'rb') as f:
+            self.assertEqual(DATA, f.read())
+
+    def test_not_found(self):
+        self.assertIsNone(self.cache.find(_digests(DATA)))
+
+    def test_add_expected(self):
+        path, _ = self.cache.add(io.BytesIO(DATA), expected={'md5': _digests(DATA)['md5'].upper()})
+        self.assertEqual(path, self.cache.find(_digests(DATA)))
+
+    def test_add_mismatch_not_cached(self):
+        with self.assertRaises(DownloadHashMismatch):
+            self.cache.add(io.BytesIO(DATA), expected={'sha256': '0' * 64})
+        self.assertIsNone(self.cache.find(_digests(DATA)))
+        for a in ('md5', 'sha256', 'sha512'):
+            self.assertEqual([], os.listdir(os.path.join(self.testdir, a)))
+        self.assertEqual(sorted(['md5', 'sha256', 'sha512']), sorted(os.listdir(self.testdir)))
+
+
+class HTTPFileDataSourceTest(_DataTest):
+
+    def setUp(self):
+        super(HTTPFileDataSourceTest, self).setUp()
+        self.testdir = tempfile.mkdtemp()
+        self.server = StubServer()
+        self.server.routes['/data'] = lambda q, h: (200, {}, DATA)
+        self.url = self.server.url + '/data'
+        self.TestConfig['http.download_cache_dir'] = self.testdir
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.testdir)
+        super(HTTPFileDataSourceTest, self).tearDown()
+
+    def downloads(self):
+        return sum(1 for path, _ in self.server.requests if path == '/data')
+
+    def test_no_cache(self):
+        del self.TestConfig['http.download_cache_dir']
+        ds = HTTPFileDataSource(url=self.url, conf=self.config)
+        with ds.file_contents() as f:
+            self.assertEqual(DATA, f.read())
+
+    def test_cached_after_first_read(self):
+        ds = HTTPFileDataSource(url=self.url, conf=self.config)
+        for _ in range(2):
+            with ds.file_contents() as f:
+                self.assertEqual(DATA, f.read())
+        self.assertEqual(1, self.downloads())
+
+    def test_known_hash_not_downloaded(self):
+        DownloadCache(self.testdir).add(io.BytesIO(DATA))
+        ds = HTTPFileDataSource(url=self.url, conf=self.config, md5=_digests(DATA)['md5'])
+        with ds.file_contents() as f:
+            self.assertEqual(DATA, f.read())
+        self.assertEqual(0, self.downloads())
+
+    def test_hash_mismatch(self):
+        ds = HTTPFileDataSource(url=self.url, conf=self.config, sha256='0' * 64)
+        with self.assertRaises(DownloadHashMismatch):
+            with ds.file_contents():
+                pass
+
+    def test_hash_mismatch_not_cached(self):
+        ds = HTTPFileDataSource(url=self.url, conf=self.config, md5='0' * 32)
+        with self.assertRaises(DownloadHashMismatch):
+            with ds.file_contents():
+                pass
+        self.assertIsNone(DownloadCache(self.testdir).find(_digests(DATA)))
+
+    def test_update_hashes_one_download(self):
+        ds = HTTPFileDataSource(url=self.url, conf=self.config)
+        self.assertEqual(_digests(DATA), ds.update_hashes())
+        self.assertEqual(1, self.downloads())
@@ -0,0 +1,126 @@
+from __future__ import absolute_import
+import unittest
+import tempfile
+import shutil
+from os.path import join as p
+
+import rdflib as R
+from rdflib.compare import isomorphic
+
+from PyOpenWorm.graph_loader import GraphFileLoader, STORE_TUNING
+from PyOpenWorm.data import triple_hash, TRIPLE_HASH_MODULUS
+from PyOpenWorm import binary_graph
+
+
+NT = '''<http://example.org/a> <http://example.org/p> "1" .
+<http://example.org/a> <http://example.org/q> _:b0 .
+_:b0 <http://example.org/p> "two\\nlines" .
+<http://example.org/b> <http://example.org/p> <http://example.org/a> .
+_:b0 <http://example.org/r> _:b1 .
+'''
+
+
+class GraphFileLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testdir = tempfile.mkdtemp(prefix=__name__ + '.')
+        self.files = []
+        for i in range(3):
+            fname = p(self.testdir, str(i) + '.nt')
+            with open(fname, 'w') as f:
+                f.write(NT)
+            self.files.append((fname, 'http://example.org/ctx' + str(i)))
+
+    def tearDown(self):
+        shutil.rmtree(self.testdir)
+
+    def load(self, **kwargs):
+        g = R.ConjunctiveGraph()
+        res = list(GraphFileLoader(**kwargs).load(g, self.files))
+        return g, res
+
+    def test_load_counts(self):
+        g, res = self.load(processes=1)
+        self.assertEqual([(f, c, 5) for f, c in self.files], [x[:3] for x in res])
+        self.assertEqual(15, len(list(g.quads())))
+
+    def test_load_into_contexts(self):
+        g, _ = self.load(processes=1)
+        for _, ctx in self.files:
+            self.assertEqual(5, len(g.get_context(R.URIRef(ctx))))
+
+    def test_bnodes_consistent_across_chunks(self):
+        g, _ = self.load(processes=1, chunk_size=1)
+        ctx = g.get_context(R.URIRef(self.files[0][1]))
+        b0 = ctx.value(R.URIRef('http://example.org/a'), R.URIRef('http://example.org/q'))
+        self.assertIsInstance(b0, R.BNode)
+        self.assertEqual(R.Literal('two\nlines'), ctx.value(b0, R.URIRef('http://example.org/p')))
+        self.assertIsNotNone(ctx.value(b0, R.URIRef('http://example.org/r')))
+
+    def test_parallel_matches_serial(self):
+        serial, _ = self.load(processes=1, chunk_size=64)
+        parallel, res = self.load(processes=2, chunk_size=64)
+        self.assertEqual(len(list(serial.quads())), len(list(parallel.quads())))
+        self.assertEqual([(f, c, 5) for f, c in self.files], [x[:3] for x in res])
+        self.assertTrue(isomorphic(serial, parallel))
+
+    def test_small_batches(self):
+        g, _ = self.load(processes=1, batch_size=2)
+        self.assertEqual(15, len(list(g.quads())))
+
+    def test_empty_file(self):
+        fname = p(self.testdir, 'empty.nt')
+        open(fname, 'w').close()
+        self.files.insert(1, (fname, 'http://example.org/empty'))
+        _, res = self.load(processes=1)
+        self.assertEqual([5, 0, 5, 5], [x[2] for x in res])
+        self.assertEqual(fname, res[1][0])
+
+    def test_triples_progress(self):
+        class Progress(object):
+            n = 0
+
+            def update(self, k):
+                self.n += k
+        prog = Progress()
+        g = R.ConjunctiveGraph()
+        list(GraphFileLoader(processes=1).load(g, self.files, prog))
+        self.assertEqual(15, prog.n)
+
+    def test_content_hash(self):
+        g, res = self.load(processes=1, chunk_size=1)
+        ctx = g.get_context(R.URIRef(self.files[0][1]))
+        expected = sum(triple_hash(t) for t in ctx) % TRIPLE_HASH_MODULUS
+        self.assertEqual(expected, res[0][3])
+
+    def test_for_store_tuning(self):
+        loader = GraphFileLoader.for_store('ZODB', processes=1)
+        self.assertEqual(STORE_TUNING['zodb']['batch_size'], loader.batch_size)
+        self.assertEqual(STORE_TUNING['zodb']['commit_interval'], loader.commit_interval)
+
+    def test_for_store_override(self):
+        loader = GraphFileLoader.for_store('ZODB', processes=1, batch_size=7)
+        self.assertEqual(7, loader.batch_size)
+
+    def test_rate(self):
+        loader = GraphFileLoader(processes=1)
+        list(loader.load(R.ConjunctiveGraph(), self.files))
+        self.assertEqual(15, loader.triples_loaded)
+        self.assertGreater(loader.rate, 0)
+
+    def test_binary_format(self):
+        expected, _ = self.load(processes=1)
+        fname = p(self.testdir, 'b.ntb')
+        with open(fname, 'wb') as f:
+            binary_graph.write(R.Graph().parse(self.files[0][0], format='nt'), f)
+        self.files[1] = (fname, self.files[1][1], binary_graph.FORMAT_NAME)
+        g, res = self.load(processes=1)
+        self.assertEqual([5, 5, 5], [x[2] for x in res])
+        ctx = g.get_context(R.URIRef(self.files[1][1]))
+        self.assertTrue(isomorphic(expected.get_context(ctx.identifier), ctx))
+        self.assertEqual(sum(triple_hash(t) for t in ctx) % TRIPLE_HASH_MODULUS, res[1][3])
+
+    def test_unknown_format(self):
+        self.files[0] = self.files[0] + ('turtle',)
+        with self.assertRaises(ValueError):
+            self.load(processes=1)
@@ -0,0 +1,325 @@
+from __future__ import absolute_import
+
+import threading
+import unittest
+
+import rdflib as R
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from six.moves.urllib.parse import urlparse, parse_qs
+
+from PyOpenWorm.context import Context
+from PyOpenWorm.data import Data, DataUser
+from PyOpenWorm.graph_store import GraphStoreClient
+from PyOpenWorm.http_client import HTTPClient, HTTPRequestError
+
+from .HTTPClientTest import _ThreadingHTTPServer
+
+
+class StubStore(object):
+    '''
+    A local SPARQL endpoint and Graph Store Protocol endpoint over an
+    in-memory rdflib graph
+
+    Queries are answered at ``/query``, updates at ``/update``, and graphs are
+    at ``/data``
+    '''
+
+    def __init__(self):
+        self.graph = R.ConjunctiveGraph()
+        self.requests = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                stub.connections += 1
+                BaseHTTPRequestHandler.setup(self)
+
+            def _body(self):
+                n = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(n) if n else b''
+
+            def _respond(self, status, body=b'', content_type='text/plain'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _graph(self, query):
+                if 'graph' in query:
+                    return stub.graph.get_context(R.URIRef(query['graph'][0]))
+                return stub.graph.default_context
+
+            def _handle(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                body = self._body()
+                stub.requests.append((self.command, parsed.path, query, body))
+                with stub.lock:
+                    if parsed.path == '/query':
+                        if self.command == 'POST':
+                            query.update(parse_qs(body.decode('utf-8')))
+                        res = stub.graph.query(query['query'][0])
+                        return self._respond(200, res.serialize(format='xml'),
+                                             'application/sparql-results+xml')
+                    if parsed.path == '/update':
+                        stub.graph.update(body.decode('utf-8'))
+                        return self._respond(204)
+                    if parsed.path != '/data':
+                        return self._respond(404)
+                    g = self._graph(query)
+                    if self.command == 'GET':
+                        return self._respond(200, g.serialize(format='nt'),
+                                             'application/n-triples')
+                    if self.command in ('PUT', 'DELETE'):
+                        stub.graph.remove((None, None, None, g))
+                    if self.command in ('PUT', 'POST'):
+                        g.parse(data=body.decode('utf-8'), format='nt')
+                    return self._respond(204)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs=dict(poll_interval=0.05))
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def uploads(self):
+        return [r for r in self.requests if r[1] == '/data' and r[0] in ('PUT', 'POST')]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+EX = R.Namespace('http://example.org/')
+
+
+def triples(n, prefix='s'):
+    return [(EX[prefix + str(i)], EX.p, R.Literal('line 1\nline "{}"'.format(i)))
+            for i in range(n)]
+
+
+class GraphStoreClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = StubStore()
+        self.cut = GraphStoreClient(self.store.url + '/data', request_size=10)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_post(self):
+        self.assertEqual(25, self.cut.post(triples(25), EX.g))
+        self.assertEqual(set(triples(25)), set(self.store.graph.get_context(EX.g)))
+
+    def test_post_in_requests_of_request_size(self):
+        self.cut.post(triples(25), EX.g)
+        self.assertEqual(3, len(self.store.uploads()))
+
+    def test_post_reuses_connection(self):
+        self.cut.post(triples(25), EX.g)
+        self.assertEqual(1, self.store.connections)
+
+    def test_post_default_graph(self):
+        self.cut.post(triples(3))
+        self.assertEqual(3, len(self.store.graph.default_context))
+
+    def test_put_replaces(self):
+        self.cut.post(triples(5, 'old'), EX.g)
+        self.cut.put(triples(15), EX.g)
+        self.assertEqual(set(triples(15)), set(self.store.graph.get_context(EX.g)))
+
+    def test_put_empty_clears(self):
+        self.cut.post(triples(5), EX.g)
+        self.cut.put([], EX.g)
+        self.assertEqual(0, len(self.store.graph.get_context(EX.g)))
+
+    def test_get(self):
+        self.cut.post(triples(5), EX.g)
+        self.assertEqual(set(triples(5)), set(self.cut.get(EX.g)))
+
+    def test_delete(self):
+        self.cut.post(triples(5), EX.g)
+        self.cut.delete(EX.g)
+        self.assertEqual(0, len(self.store.graph.get_context(EX.g)))
+
+    def test_post_graphs(self):
+        graphs = [(EX['g' + str(i)], triples(12, 'g' + str(i))) for i in range(4)]
+        self.assertEqual(48, self.cut.post_graphs(graphs))
+        for ident, trips in graphs:
+            self.assertEqual(set(trips), set(self.store.graph.get_context(ident)))
+
+    def test_error(self):
+        cut = GraphStoreClient(self.store.url + '/nothing')
+        with self.assertRaises(HTTPRequestError):
+            cut.post(triples(1))
+
+    def test_post_error_passed_on(self):
+        def gen():
+            for t in triples(15):
+                yield t
+            raise RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            self.cut.post(gen(), EX.g)
+
+    def test_put_error_passed_on(self):
+        def gen():
+            yield triples(1)[0]
+            raise RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            self.cut.put(gen(), EX.g)
+
+    def test_post_bnode_triples_in_one_request(self):
+        b = R.BNode()
+        trips = [(b, EX.p, R.Literal(i)) for i in range(5)] + triples(12) + \
+            [(EX.s, EX.q, b)] + [(b, EX.p, R.Literal(i)) for i in range(5, 10)]
+        self.assertEqual(23, self.cut.post(trips, EX.g))
+        bnode_counts = [r[3].count(b'_:') for r in self.store.uploads()]
+        self.assertEqual([0, 11], bnode_counts[-2:])
+        self.assertEqual(11, sum(bnode_counts))
+        self.assertEqual(23, len(self.store.graph.get_context(EX.g)))
+
+    def test_put_one_request(self):
+        self.cut.put(triples(25), EX.g)
+        self.assertEqual(['PUT'], [r[0] for r in self.store.uploads()])
+        self.assertEqual(set(triples(25)), set(self.store.graph.get_context(EX.g)))
+
+    def test_post_graphs_reads_triples_on_calling_thread(self):
+        threads = set()
+
+        def gen(prefix):
+            for t in triples(12, prefix):
+                threads.add(threading.current_thread())
+                yield t
+
+        graphs = [(EX['g' + str(i)], gen('g' + str(i))) for i in range(4)]
+        self.assertEqual(48, self.cut.post_graphs(graphs))
+        self.assertEqual(set([threading.current_thread()]), threads)
+        self.assertEqual(set(triples(12, 'g0')), set(self.store.graph.get_context(EX.g0)))
+
+    def test_request_size_checked(self):
+        with self.assertRaises(ValueError):
+            GraphStoreClient(self.store.url + '/data', request_size=0)
+
+    def test_shared_client(self):
+        client = HTTPClient()
+        self.assertIs(client, GraphStoreClient(self.store.url + '/data', client=client).client)
+
+
+class SPARQLSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = StubStore()
+
+    def tearDown(self):
+        self.store.close()
+
+    def connect(self, **kwargs):
+        conf = Data()
+        conf['rdf.source'] = 'sparql_endpoint'
+        conf['rdf.store'] = 'SPARQLUpdateStore'
+        conf['rdf.store_conf'] = [self.store.url + '/query', self.store.url + '/update']
+        for k, v in kwargs.items():
+            conf[k] = v
+        conf.init_database()
+        self.addCleanup(conf.closeDatabase)
+        return conf
+
+    def test_add_statements_uses_graph_store(self):
+        conf = self.connect(**{'rdf.graph_store_endpoint': self.store.url + '/data'})
+        DataUser(conf=conf).add_statements(triples(5))
+        self.assertEqual(set(triples(5)), set(self.store.graph.default_context))
+        self.assertEqual(1, len(self.store.uploads()))
+
+    def test_insert_data_into_named_graph(self):
+        conf = self.connect(**{'rdf.remote_request_size': 2})
+        DataUser(conf=conf)._add_to_store(triples(5), graph_name=EX.g)
+        updates = [r[3].decode('utf-8') for r in self.store.requests if r[1] == '/update']
+        self.assertEqual(3, len(updates))
+        for u in updates:
+            self.assertIn('INSERT DATA { GRAPH <http://example.org/g>', u)
+
+    def test_insert_data_bnode_triples_in_one_update(self):
+        b = R.BNode()
+        conf = self.connect(**{'rdf.remote_request_size': 2})
+        DataUser(conf=conf)._add_to_store([(b, EX.p, EX.o)] + triples(3) + [(EX.s, EX.q, b)],
+                                          graph_name=EX.g)
+        updates = [r[3].decode('utf-8') for r in self.store.requests if r[1] == '/update']
+        self.assertEqual(3, len(updates))
+        self.assertEqual(0, sum(1 for u in updates[:2] if '_:' in u))
+        self.assertEqual(2, updates[2].count('_:'))
+
+    def test_insert_data_error_passed_on(self):
+        def gen():
+            for t in triples(3):
+                yield t
+            raise RuntimeError()
+
+        conf = self.connect(**{'rdf.remote_request_size': 2})
+        with self.assertRaises(RuntimeError):
+            DataUser(conf=conf)._add_to_store(gen(), graph_name=EX.g)
+
+    def test_save_context_uploads_imports_to_their_graphs(self):
+        conf = self.connect(**{'rdf.graph_store_endpoint': self.store.url + '/data'})
+        ctx = Context(ident=EX.ctx, conf=conf)
+        imported = Context(ident=EX.imported, conf=conf)
+        ctx.add_import(imported)
+        ctx.add_triples(triples(3, 'a'))
+        imported.add_triples(triples(4, 'b'))
+        ctx.save_context(inline_imports=True)
+        self.assertEqual(set(triples(3, 'a')), set(self.store.graph.get_context(EX.ctx)))
+        self.assertEqual(set(triples(4, 'b')), set(self.store.graph.get_context(EX.imported)))
+        self.assertEqual(7, ctx.triples_saved)
+
+    def test_save_context_calls_imports_save_context(self):
+        saved = []
+
+        class RecordingContext(Context):
+            def save_context(self, *args, **kwargs):
+                saved.append(self.identifier)
+                return super(RecordingContext, self).save_context(*args, **kwargs)
+
+        conf = self.connect(**{'rdf.graph_store_endpoint': self.store.url + '/data'})
+        ctx = Context(ident=EX.ctx, conf=conf)
+        imported = RecordingContext(ident=EX.imported, conf=conf)
+        ctx.add_import(imported)
+        imported.add_triples(triples(4, 'b'))
+        ctx.save_context(inline_imports=True)
+        self.assertEqual([EX.imported], saved)
+        self.assertEqual(set(triples(4, 'b')), set(self.store.graph.get_context(EX.imported)))
+
+    def test_upload_recorded_as_change(self):
+        conf = self.connect(**{'rdf.graph_store_endpoint': self.store.url + '/data'})
+        counter = conf['rdf.graph.change_counter']
+        version = conf['rdf.graph.change_tracker'].subject_version(EX.s0)
+        DataUser(conf=conf)._add_to_store(triples(5), graph_name=EX.g)
+        self.assertEqual(counter + 1, conf['rdf.graph.change_counter'])
+        self.assertNotEqual(version, conf['rdf.graph.change_tracker'].subject_version(EX.s0))
+        self.assertNotEqual((0, 0), conf['rdf.graph.change_tracker'].context_version(EX.g))
+
+    def test_save_context_recorded_as_change(self):
+        conf = self.connect(**{'rdf.graph_store_endpoint': self.store.url + '/data'})
+        counter = conf['rdf.graph.change_counter']
+        ctx = Context(ident=EX.ctx, conf=conf)
+        ctx.add_triples(triples(3))
+        ctx.save_context()
+        self.assertEqual(counter + 1, conf['rdf.graph.change_counter'])
+        self.assertNotEqual((0, 0), conf['rdf.graph.change_tracker'].context_version(EX.ctx))
+
+    def test_insert_data_recorded_as_change(self):
+        conf = self.connect()
+        counter = conf['rdf.graph.change_counter']
+        DataUser(conf=conf)._add_to_store(triples(3), graph_name=EX.g)
+        self.assertEqual(counter + 1, conf['rdf.graph.change_counter'])
@@ -0,0 +1,215 @@
+from __future__ import absolute_import
+
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import urlparse, parse_qs
+
+from PyOpenWorm.http_client import HTTPClient, HTTPRequestError, RateLimiter, shared_client
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubServer(object):
+    '''
+    A local HTTP/1.1 server answering from a dict of paths to handlers
+
+    Each handler is called with the parsed query and request headers and
+    returns a status, a dict of headers, and a body
+    '''
+
+    def __init__(self):
+        self.routes = dict()
+        self.requests = []
+        self.connections = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                stub.connections += 1
+                BaseHTTPRequestHandler.setup(self)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                stub.requests.append((parsed.path, dict(self.headers)))
+                handler = stub.routes.get(parsed.path)
+                if handler is None:
+                    status, headers, body = 404, {}, b'Not found'
+                else:
+                    status, headers, body = handler(parse_qs(parsed.query), self.headers)
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs=dict(poll_interval=0.05))
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class HTTPClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.cache_dir = tempfile.mkdtemp()
+        self.hits = 0
+
+        def data(query, headers):
+            self.hits += 1
+            if headers.get('If-None-Match') == '"v1"':
+                return 304, {'ETag': '"v1"'}, b''
+            return (200,
+                    {'Content-Type': 'application/json; charset=utf-8', 'ETag': '"v1"'},
+                    json.dumps({'hits': self.hits}).encode('utf-8'))
+
+        self.server.routes['/data'] = data
+        self.server.routes['/moved'] = lambda q, h: (302, {'Location': '/data'}, b'')
+        self.server.routes['/fail'] = lambda q, h: (500, {}, b'oops')
+        self.server.routes['/nostore'] = lambda q, h: (200, {'Cache-Control': 'no-store'}, b'x')
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_get(self):
+        client = HTTPClient()
+        resp = client.get(self.server.url + '/data')
+        self.assertEqual(200, resp.status)
+        self.assertEqual({'hits': 1}, resp.json())
+        self.assertEqual('utf-8', resp.charset)
+
+    def test_connection_reused(self):
+        client = HTTPClient()
+        for _ in range(5):
+            client.get(self.server.url + '/data')
+        self.assertEqual(1, client.connections_opened)
+        self.assertEqual(1, self.server.connections)
+
+    def _retried(self, method, failing):
+        client = HTTPClient()
+        retry = Mock()
+        retry.getresponse.return_value.status = 204
+        retry.getresponse.return_value.getheaders.return_value = []
+        retry.getresponse.return_value.read.return_value = b''
+        with patch.object(client, '_connection', side_effect=[(failing, True), (retry, False)]):
+            try:
+                client.request(method, self.server.url + '/data', body=b'x')
+            except HTTPRequestError:
+                pass
+        return retry.request.called
+
+    def test_post_not_sent_again_after_response_lost(self):
+        failing = Mock()
+        failing.getresponse.side_effect = socket.error()
+        self.assertFalse(self._retried('POST', failing))
+
+    def test_put_sent_again_after_response_lost(self):
+        failing = Mock()
+        failing.getresponse.side_effect = socket.error()
+        self.assertTrue(self._retried('PUT', failing))
+
+    def test_post_sent_again_if_not_sent(self):
+        failing = Mock()
+        failing.request.side_effect = socket.error()
+        self.assertTrue(self._retried('POST', failing))
+
+    def test_error_status(self):
+        client = HTTPClient()
+        with self.assertRaises(HTTPRequestError) as cm:
+            client.get(self.server.url + '/fail')
+        self.assertEqual(500, cm.exception.status)
+
+    def test_connection_refused(self):
+        client = HTTPClient()
+        self.server.close()
+        with self.assertRaises(HTTPRequestError):
+            client.get(self.server.url + '/data')
+
+    def test_redirect(self):
+        client = HTTPClient()
+        self.assertEqual({'hits': 1}, client.get(self.server.url + '/moved').json())
+
+    def test_cache_fresh(self):
+        client = HTTPClient(cache_dir=self.cache_dir)
+        client.get(self.server.url + '/data')
+        resp = client.get(self.server.url + '/data')
+        self.assertTrue(resp.from_cache)
+        self.assertEqual(1, self.hits)
+
+    def test_cache_shared_on_disk(self):
+        HTTPClient(cache_dir=self.cache_dir).get(self.server.url + '/data')
+        resp = HTTPClient(cache_dir=self.cache_dir).get(self.server.url + '/data')
+        self.assertEqual({'hits': 1}, resp.json())
+
+    def test_cache_revalidated_with_etag(self):
+        client = HTTPClient(cache_dir=self.cache_dir, ttl=0)
+        client.get(self.server.url + '/data')
+        resp = client.get(self.server.url + '/data')
+        self.assertEqual(2, self.hits)
+        self.assertTrue(resp.from_cache)
+        self.assertEqual({'hits': 1}, resp.json())
+        self.assertEqual('"v1"', self.server.requests[-1][1].get('If-None-Match'))
+
+    def test_no_store_not_cached(self):
+        client = HTTPClient(cache_dir=self.cache_dir)
+        client.get(self.server.url + '/nostore')
+        self.assertFalse(client.get(self.server.url + '/nostore').from_cache)
+
+    def test_get_many(self):
+        client = HTTPClient(max_workers=4)
+        urls = [self.server.url + '/data'] * 6 + [self.server.url + '/fail']
+        res = client.get_many(urls)
+        self.assertEqual(7, len(res))
+        self.assertIsNone(res[-1])
+        self.assertEqual(set(range(1, 7)), set(r.json()['hits'] for r in res[:-1]))
+
+    def test_rate_limit(self):
+        client = HTTPClient(rate_limits={'127.0.0.1': 20})
+        start = time.time()
+        for _ in range(5):
+            client.get(self.server.url + '/data')
+        self.assertGreaterEqual(time.time() - start, 0.19)
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_first_call_immediate(self):
+        start = time.time()
+        RateLimiter(1).wait()
+        self.assertLess(time.time() - start, 0.5)
+
+
+class SharedClientTest(unittest.TestCase):
+
+    def test_same_conf_same_client(self):
+        self.assertIs(shared_client({'http.timeout': 3}), shared_client({'http.timeout': 3}))
+
+    def test_different_conf_different_client(self):
+        self.assertIsNot(shared_client({'http.timeout': 3}), shared_client({'http.timeout': 4}))
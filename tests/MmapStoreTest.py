@@ -0,0 +1,187 @@
+from __future__ import absolute_import
+import unittest
+import tempfile
+import shutil
+from os.path import join as p
+
+import rdflib as R
+
+from PyOpenWorm.configure import Configure, Configureable
+from PyOpenWorm.data import Data
+from PyOpenWorm.mmap_store import (write_index, MmapStore, ReadOnlyStoreError,
+                                   _HEADER, _HEADER_V1)
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+EX = R.Namespace('http://example.org/')
+
+
+def _source_graph():
+    g = R.ConjunctiveGraph()
+    g.bind('ex', EX)
+    c1 = g.get_context(EX.c1)
+    c2 = g.get_context(EX.c2)
+    c1.add((EX.a, EX.p, R.Literal('1')))
+    c1.add((EX.a, EX.q, EX.b))
+    c1.add((EX.b, EX.p, R.Literal(u'caf\xe9', lang='fr')))
+    c2.add((EX.a, EX.q, EX.b))
+    c2.add((EX.b, EX.r, R.Literal(2)))
+    c2.add((EX.c, EX.q, R.BNode('x')))
+    return g
+
+
+class MmapStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testdir = tempfile.mkdtemp(prefix=__name__ + '.')
+        self.source = _source_graph()
+        self.fname = p(self.testdir, 'index')
+        with open(self.fname, 'wb') as f:
+            self.count = write_index(self.source, f)
+        self.g = R.ConjunctiveGraph(MmapStore())
+        self.g.open(self.fname)
+
+    def tearDown(self):
+        self.g.close()
+        shutil.rmtree(self.testdir)
+
+    def assertSameTriples(self, pattern, context=None):
+        if context is None:
+            expected, actual = self.source, self.g
+        else:
+            expected, actual = self.source.get_context(context), self.g.get_context(context)
+        self.assertEqual(set(expected.triples(pattern)), set(actual.triples(pattern)))
+
+    def test_write_count(self):
+        self.assertEqual(6, self.count)
+
+    def test_all_patterns(self):
+        for s in (None, EX.a, EX.b):
+            for p_ in (None, EX.p, EX.q):
+                for o in (None, EX.b, R.Literal('1')):
+                    self.assertSameTriples((s, p_, o))
+
+    def test_missing_term(self):
+        self.assertEqual([], list(self.g.triples((EX.nothing, None, None))))
+
+    def test_context(self):
+        self.assertSameTriples((None, None, None), EX.c1)
+        self.assertSameTriples((EX.a, None, None), EX.c2)
+
+    def test_context_patterns(self):
+        for c in (EX.c1, EX.c2):
+            for s in (None, EX.a, EX.b):
+                for p_ in (None, EX.p, EX.q):
+                    for o in (None, EX.b, R.Literal('1')):
+                        self.assertSameTriples((s, p_, o), c)
+
+    def test_context_reads_only_context(self):
+        source = _source_graph()
+        big = source.get_context(EX.big)
+        for i in range(1000):
+            big.add((EX['s{}'.format(i)], EX.p, R.Literal(i)))
+        fname = p(self.testdir, 'index_big')
+        with open(fname, 'wb') as f:
+            write_index(source, f)
+        g = R.ConjunctiveGraph(MmapStore())
+        g.open(fname)
+        try:
+            store = g.store
+            with patch.object(store, '_quad', wraps=store._quad) as quad:
+                res = set(g.get_context(EX.c1).triples((None, None, None)))
+            self.assertEqual(set(source.get_context(EX.c1).triples((None, None, None))), res)
+            # The three quads in the context and a binary search for each end
+            self.assertLess(quad.call_count, 50)
+        finally:
+            g.close()
+
+    def test_version_1(self):
+        with open(self.fname, 'rb') as f:
+            data = f.read()
+        header = _HEADER.unpack_from(data, 0)
+        shift = _HEADER.size - _HEADER_V1.size
+        # Drop the cspo offset and move the others to the shorter header
+        offsets = tuple(x - shift for x in header[8:13] + header[14:])
+        fname = p(self.testdir, 'index_v1')
+        with open(fname, 'wb') as f:
+            f.write(_HEADER_V1.pack(*((header[0], 1) + header[2:8] + offsets)))
+            f.write(data[_HEADER.size:])
+        self.g.close()
+        self.g = R.ConjunctiveGraph(MmapStore())
+        self.g.open(fname)
+        self.assertNotIn('cspo', self.g.store._index_offsets)
+        self.assertSameTriples((None, None, None), EX.c1)
+        self.assertSameTriples((EX.a, None, None), EX.c2)
+        self.assertSameTriples((None, None, None))
+
+    def test_quads(self):
+        self.assertEqual(set((s, p_, o, c.identifier) for s, p_, o, c in self.source.quads()),
+                         set((s, p_, o, c.identifier) for s, p_, o, c in self.g.quads()))
+
+    def test_contexts(self):
+        self.assertEqual(set([EX.c1, EX.c2]), set(c.identifier for c in self.g.contexts()))
+        self.assertEqual(set([EX.c1, EX.c2]),
+                         set(c.identifier for c in self.g.contexts((EX.a, EX.q, EX.b))))
+
+    def test_len(self):
+        self.assertEqual(5, len(self.g))
+        self.assertEqual(3, len(self.g.get_context(EX.c1)))
+        self.assertEqual(0, len(self.g.get_context(EX.nothing)))
+
+    def test_triples_choices(self):
+        res = set(self.g.triples_choices((EX.a, [EX.p, EX.q], None)))
+        self.assertEqual(set([(EX.a, EX.p, R.Literal('1')), (EX.a, EX.q, EX.b)]), res)
+
+    def test_literals(self):
+        self.assertEqual(R.Literal(u'caf\xe9', lang='fr'), self.g.value(EX.b, EX.p))
+        self.assertEqual(R.Literal(2), self.g.value(EX.b, EX.r))
+
+    def test_namespaces(self):
+        self.assertEqual(R.URIRef(EX), self.g.store.namespace('ex'))
+
+    def test_read_only(self):
+        with self.assertRaises(ReadOnlyStoreError):
+            self.g.add((EX.a, EX.p, EX.b))
+        with self.assertRaises(ReadOnlyStoreError):
+            self.g.remove((EX.a, None, None))
+
+
+class MmapSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testdir = tempfile.mkdtemp(prefix=__name__ + '.')
+        self.fname = p(self.testdir, 'index')
+        with open(self.fname, 'wb') as f:
+            write_index(_source_graph(), f)
+
+    def tearDown(self):
+        shutil.rmtree(self.testdir)
+
+    def test_open(self):
+        c = Configure()
+        c['rdf.source'] = 'mmap'
+        c['rdf.store_conf'] = self.fname
+        Configureable.default = c
+        d = Data()
+        d.openDatabase()
+        try:
+            self.assertEqual(5, len(d['rdf.graph']))
+        finally:
+            d.closeDatabase()
+
+    def test_overlay(self):
+        c = Configure()
+        c['rdf.source'] = 'mmap'
+        c['rdf.store_conf'] = self.fname
+        c['rdf.mmap.overlay'] = True
+        Configureable.default = c
+        d = Data()
+        d.openDatabase()
+        try:
+            d['rdf.graph'].get_context(EX.c3).add((EX.d, EX.p, EX.a))
+            self.assertEqual(6, len(d['rdf.graph']))
+        finally:
+            d.closeDatabase()
@@ -1,4 +1,11 @@
 from __future__ import absolute_import
+import unittest
+
+try:
+    import scipy  # noqa: F401
+    has_scipy = True
+except ImportError:
+    has_scipy = False
 
 from PyOpenWorm.worm import Worm
 from PyOpenWorm.network import Network
@@ -10,7 +17,7 @@ from .DataTestTemplate import _DataTest
 
 class NetworkTest(_DataTest):
 
-    ctx_classes = (Worm, Network, Neuron)
+    ctx_classes = (Worm, Network, Neuron, Connection)
 
     def setUp(self):
         super(NetworkTest, self).setUp()
@@ -53,3 +60,51 @@ class NetworkTest(_DataTest):
         self.save()
         n = self.context.stored(Network)()
         self.assertIn(n1, n.interneurons())
+
+    def _connect(self, pre, post, syntype, number):
+        conn = self.ctx.Connection(pre_cell=self.ctx.Neuron(name=pre),
+                                   post_cell=self.ctx.Neuron(name=post),
+                                   syntype=syntype, number=number)
+        self.net.synapse(conn)
+        return conn
+
+    @unittest.skipIf(not has_scipy, 'SciPy is not installed')
+    def test_to_adjacency(self):
+        self._connect('AVAL', 'PVCL', 'send', 3)
+        self._connect('AVAL', 'AVAR', 'gapJunction', 2)
+        self._connect('PVCL', 'AVAR', 'send', 1)
+        self.save()
+        net = self.context.stored(Network)(conf=self.config)
+        adj = net.to_adjacency()
+        self.assertEqual(['AVAL', 'AVAR', 'PVCL'], adj.cells)
+        self.assertEqual(3, adj.weight('AVAL', 'PVCL'))
+        self.assertEqual(5, adj.degree('AVAL'))
+
+    @unittest.skipIf(not has_scipy, 'SciPy is not installed')
+    def test_to_adjacency_syntype(self):
+        self._connect('AVAL', 'PVCL', 'send', 3)
+        self._connect('AVAL', 'AVAR', 'gapJunction', 2)
+        self.save()
+        net = self.context.stored(Network)(conf=self.config)
+        adj = net.to_adjacency(syntype='gapjunction', weight=None)
+        self.assertEqual(['AVAL', 'AVAR'], adj.cells)
+        self.assertEqual(1, adj.weight('AVAL', 'AVAR'))
+
+    @unittest.skipIf(not has_scipy, 'SciPy is not installed')
+    def test_to_adjacency_cached(self):
+        self._connect('AVAL', 'PVCL', 'send', 3)
+        self.save()
+        net = self.context.stored(Network)(conf=self.config)
+        self.assertIs(net.to_adjacency(), net.to_adjacency())
+
+    @unittest.skipIf(not has_scipy, 'SciPy is not installed')
+    def test_to_adjacency_invalidated(self):
+        self._connect('AVAL', 'PVCL', 'send', 3)
+        self.save()
+        net = self.context.stored(Network)(conf=self.config)
+        adj = net.to_adjacency()
+        self._connect('PVCL', 'AVAR', 'send', 1)
+        self.save()
+        adj2 = net.to_adjacency()
+        self.assertIsNot(adj, adj2)
+        self.assertEqual(['AVAL', 'AVAR', 'PVCL'], adj2.cells)
@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+import unittest
+
+import rdflib as R
+from rdflib.store import TripleAddedEvent
+
+from PyOpenWorm.overlay_store import OverlayStore
+
+EX = R.Namespace('http://example.org/')
+
+
+class OverlayStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        base = R.ConjunctiveGraph()
+        base.bind('ex', EX)
+        base.get_context(EX.c1).add((EX.a, EX.p, EX.b))
+        base.get_context(EX.c2).add((EX.b, EX.p, EX.c))
+        self.base = base
+        self.g = R.ConjunctiveGraph(OverlayStore(base.store))
+
+    def test_reads_base(self):
+        self.assertEqual(set([(EX.a, EX.p, EX.b), (EX.b, EX.p, EX.c)]),
+                         set(self.g.triples((None, EX.p, None))))
+
+    def test_add_goes_to_overlay(self):
+        self.g.get_context(EX.c1).add((EX.c, EX.p, EX.d))
+        self.assertIn((EX.c, EX.p, EX.d), self.g)
+        self.assertNotIn((EX.c, EX.p, EX.d), self.base)
+
+    def test_add_in_other_context_merges_contexts(self):
+        self.g.get_context(EX.c3).add((EX.a, EX.p, EX.b))
+        self.assertEqual(set([EX.c1, EX.c3]),
+                         set(c.identifier for c in self.g.contexts((EX.a, EX.p, EX.b))))
+        self.assertEqual(1, len(list(self.g.triples((EX.a, None, None)))))
+
+    def test_context_filter(self):
+        self.g.get_context(EX.c2).add((EX.c, EX.p, EX.d))
+        self.assertEqual(set([(EX.b, EX.p, EX.c), (EX.c, EX.p, EX.d)]),
+                         set(self.g.get_context(EX.c2)))
+
+    def test_len(self):
+        self.g.get_context(EX.c1).add((EX.c, EX.p, EX.d))
+        self.g.get_context(EX.c2).add((EX.a, EX.p, EX.b))
+        self.assertEqual(3, len(self.g))
+        self.assertEqual(2, len(self.g.get_context(EX.c1)))
+
+    def test_remove_only_from_overlay(self):
+        ctx = self.g.get_context(EX.c1)
+        ctx.add((EX.c, EX.p, EX.d))
+        ctx.remove((None, EX.p, None))
+        self.assertNotIn((EX.c, EX.p, EX.d), self.g)
+        self.assertIn((EX.a, EX.p, EX.b), self.g)
+
+    def test_contexts_have_overlay_store(self):
+        for c in self.g.contexts():
+            self.assertIs(self.g.store, c.store)
+
+    def test_add_event(self):
+        events = []
+        self.g.store.dispatcher.subscribe(TripleAddedEvent, events.append)
+        self.g.get_context(EX.c1).add((EX.c, EX.p, EX.d))
+        self.assertEqual([(EX.c, EX.p, EX.d)], [e.triple for e in events])
+
+    def test_namespaces(self):
+        self.g.store.bind('ex2', EX.sub)
+        self.assertEqual(R.URIRef(EX), self.g.store.namespace('ex'))
+        self.assertEqual(EX.sub, self.g.store.namespace('ex2'))
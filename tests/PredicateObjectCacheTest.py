@@ -0,0 +1,87 @@
+from __future__ import absolute_import
+import unittest
+import rdflib as R
+
+from PyOpenWorm.po_cache import PredicateObjectCache, shared_po_cache
+from PyOpenWorm.simpleProperty import POCache
+from PyOpenWorm.dataObject import DataObject
+
+from .DataTestTemplate import _DataTest
+
+
+def _poc(index, n=1):
+    return POCache(index, frozenset((R.URIRef('http://example.org/p'),
+                                     R.Literal(i)) for i in range(n)))
+
+
+class PredicateObjectCacheTest(unittest.TestCase):
+
+    def test_get_missing(self):
+        cut = PredicateObjectCache()
+        self.assertIsNone(cut.get('k', 0))
+        self.assertEqual(1, cut.stats.misses)
+
+    def test_put_get(self):
+        cut = PredicateObjectCache()
+        poc = _poc(0)
+        cut.put('k', poc)
+        self.assertIs(poc, cut.get('k', 0))
+        self.assertEqual(1, cut.stats.hits)
+
+    def test_stale_entry_invalidated(self):
+        cut = PredicateObjectCache()
+        cut.put('k', _poc(0))
+        self.assertIsNone(cut.get('k', 1))
+        self.assertEqual(1, cut.stats.invalidations)
+        self.assertEqual(0, len(cut))
+        self.assertEqual(0, cut.stats.bytes)
+
+    def test_evicts_least_recently_used(self):
+        cut = PredicateObjectCache(max_entries=2)
+        cut.put('a', _poc(0))
+        cut.put('b', _poc(0))
+        cut.get('a', 0)
+        cut.put('c', _poc(0))
+        self.assertIsNone(cut.get('b', 0))
+        self.assertIsNotNone(cut.get('a', 0))
+        self.assertEqual(1, cut.stats.evictions)
+
+    def test_evicts_for_bytes(self):
+        cut = PredicateObjectCache()
+        cut.put('a', _poc(0, 10))
+        cut.put('b', _poc(0, 10))
+        cut.resize(max_bytes=cut.stats.bytes - 1)
+        self.assertEqual(1, len(cut))
+        self.assertIsNotNone(cut.get('b', 0))
+
+    def test_too_large_entry_not_kept(self):
+        cut = PredicateObjectCache(max_bytes=10)
+        cut.put('a', _poc(0, 10))
+        self.assertEqual(0, len(cut))
+        self.assertEqual(0, cut.stats.bytes)
+
+
+class SharedPredicateObjectCacheTest(_DataTest):
+
+    def setUp(self):
+        super(SharedPredicateObjectCacheTest, self).setUp()
+        self.context(DataObject)(ident='http://example.org/a', rdfs_label='a')
+        self.save()
+        shared_po_cache().clear()
+
+    def test_shared_between_instances(self):
+        a1 = self.context.stored(DataObject)(ident='http://example.org/a')
+        a2 = self.context.stored(DataObject)(ident='http://example.org/a')
+        a1.rdfs_label()
+        a2.rdfs_label()
+        self.assertIs(a1.po_cache, a2.po_cache)
+        self.assertEqual(1, shared_po_cache().stats.hits)
+
+    def test_not_shared_after_change(self):
+        a1 = self.context.stored(DataObject)(ident='http://example.org/a')
+        a1.rdfs_label()
+        g = self.config['rdf.graph'].get_context(self.context.identifier)
+        g.add((R.URIRef('http://example.org/a'), R.RDFS.label, R.Literal('b')))
+        a2 = self.context.stored(DataObject)(ident='http://example.org/a')
+        self.assertEqual(set(['a', 'b']), a2.rdfs_label())
+        self.assertIsNot(a1.po_cache, a2.po_cache)
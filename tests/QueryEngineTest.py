@@ -0,0 +1,206 @@
+from __future__ import absolute_import
+
+import unittest
+import rdflib as R
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from PyOpenWorm.rdf_query_util import (query_identifiers, compile_bgp, bgp_to_sparql,
+                                       indexed_identifiers, QUERY_ENGINE_CONF_KEY,
+                                       GOQ_ENGINE, SPARQL_ENGINE, BGP_ENGINE,
+                                       BGP_RESULT_VARIABLE)
+from PyOpenWorm.cell import Cell
+from PyOpenWorm.neuron import Neuron
+from PyOpenWorm.connection import Connection
+
+from .DataTestTemplate import _DataTest
+
+
+def _has_sparql():
+    try:
+        R.Graph().query('SELECT ?x WHERE { ?x ?y ?z }')
+        return True
+    except Exception:
+        return False
+
+
+HAS_SPARQL = _has_sparql()
+
+
+class QueryEngineTest(_DataTest):
+    ctx_classes = (Cell, Neuron, Connection)
+
+    def setUp(self):
+        super(QueryEngineTest, self).setUp()
+        self.ctx.Neuron(name='AVAL').type('interneuron')
+        self.ctx.Neuron(name='ADAL').type('sensory')
+        self.ctx.Neuron(name='PVDL').type('sensory')
+        self.ctx.Cell(name='sensory-cell')
+        self.ctx.Connection(pre_cell=self.ctx.Neuron(name='ADAL'),
+                            post_cell=self.ctx.Neuron(name='AVAL'),
+                            syntype='send')
+        self.save()
+        self.stored = self.context.stored
+
+    def add_neuron_sub_class(self):
+        ctx = self.config['rdf.graph'].get_context(self.context.identifier)
+        ctx.add((Neuron.rdf_type, R.RDFS.subClassOf, Cell.rdf_type))
+
+    def assertEnginesAgree(self, start, target_type):
+        graph = self.context.stored.rdf_graph()
+        goq = query_identifiers(graph, start, target_type, GOQ_ENGINE)
+        bgp = query_identifiers(graph, start, target_type, BGP_ENGINE)
+        self.assertEqual(goq, bgp)
+        if HAS_SPARQL:
+            sparql = query_identifiers(graph, start, target_type, SPARQL_ENGINE)
+            self.assertEqual(goq, sparql)
+        return bgp
+
+    def test_type_and_literal(self):
+        res = self.assertEnginesAgree(self.stored(Neuron)(type='sensory'), Neuron.rdf_type)
+        self.assertEqual(2, len(res))
+
+    def test_sub_class_closure(self):
+        self.add_neuron_sub_class()
+        res = self.assertEnginesAgree(self.stored(Cell)(), Cell.rdf_type)
+        self.assertEqual(4, len(res))
+
+    def test_nested_object(self):
+        start = self.stored(Connection)(pre_cell=self.stored(Neuron)(type='sensory'))
+        res = self.assertEnginesAgree(start, Connection.rdf_type)
+        self.assertEqual(1, len(res))
+
+    def test_no_match(self):
+        res = self.assertEnginesAgree(self.stored(Neuron)(type='motor'), Neuron.rdf_type)
+        self.assertEqual(set(), res)
+
+    def test_property_get_undefined_owner(self):
+        self.TestConfig[QUERY_ENGINE_CONF_KEY] = BGP_ENGINE
+        self.assertEqual(set(['sensory', 'interneuron']),
+                         set(str(x) for x in self.stored(Neuron)().type.get()))
+
+    def test_load_with_conf_engine(self):
+        self.TestConfig[QUERY_ENGINE_CONF_KEY] = BGP_ENGINE
+        names = set(n.name() for n in self.stored(Neuron)(type='sensory').load())
+        self.assertEqual(set(['ADAL', 'PVDL']), names)
+
+    @unittest.skipUnless(HAS_SPARQL, 'rdflib SPARQL queries are not available')
+    def test_load_with_conf_engine_sparql(self):
+        self.TestConfig[QUERY_ENGINE_CONF_KEY] = SPARQL_ENGINE
+        names = set(n.name() for n in self.stored(Neuron)(type='sensory').load())
+        self.assertEqual(set(['ADAL', 'PVDL']), names)
+
+    def test_sparql_has_sub_classes(self):
+        self.add_neuron_sub_class()
+        graph = self.context.stored.rdf_graph()
+        query = bgp_to_sparql(compile_bgp(graph, self.stored(Cell)(), Cell.rdf_type))
+        self.assertIn('VALUES', query)
+        self.assertIn(Neuron.rdf_type.n3(), query)
+
+    def test_defined_not_compiled(self):
+        graph = self.context.stored.rdf_graph()
+        self.assertIsNone(compile_bgp(graph, self.stored(Neuron)(name='AVAL'), Neuron.rdf_type))
+
+    def test_unknown_engine(self):
+        graph = self.context.stored.rdf_graph()
+        with self.assertRaises(ValueError):
+            query_identifiers(graph, self.stored(Neuron)(), Neuron.rdf_type, 'not-an-engine')
+
+
+class CompileBGPTest(unittest.TestCase):
+
+    def setUp(self):
+        self.target = R.URIRef('http://example.org/Target')
+        self.p = R.URIRef('http://example.org/p')
+
+    def compile(self, *path):
+        with patch('PyOpenWorm.rdf_query_util._QueryPreparer') as preparer:
+            preparer.return_value.return_value = [list(path)]
+            return compile_bgp(R.Graph(), Mock(defined=False), self.target)
+
+    def test_type_substituted(self):
+        patterns, values = self.compile((None, R.RDF.type, self.target, None))
+        (x, p, t), = patterns
+        self.assertEqual((BGP_RESULT_VARIABLE, R.RDF.type), (x, p))
+        self.assertEqual(frozenset([self.target]), values[t])
+
+    def test_other_predicate_not_substituted(self):
+        patterns, values = self.compile((None, self.p, self.target, None))
+        self.assertEqual([(BGP_RESULT_VARIABLE, self.p, self.target)], patterns)
+        self.assertEqual(dict(), values)
+
+    def test_subject_not_substituted(self):
+        patterns, values = self.compile((self.target, R.RDF.type, None, None))
+        self.assertEqual([(self.target, R.RDF.type, BGP_RESULT_VARIABLE)], patterns)
+        self.assertEqual(dict(), values)
+
+
+class LiteralIndexTest(_DataTest):
+    ctx_classes = (Cell, Neuron, Connection)
+
+    def setUp(self):
+        super(LiteralIndexTest, self).setUp()
+        self.ctx.Neuron(name='AVAL').type('interneuron')
+        self.ctx.Neuron(name='ADAL').type('sensory')
+        self.ctx.Neuron(name='PVDL').type('sensory')
+        self.ctx.Cell(name='sensory-cell')
+        self.save()
+        self.stored = self.context.stored
+        self.graph = self.stored.rdf_graph()
+        self.index = self.TestConfig['rdf.graph.literal_index']
+
+    def indexed(self, start, target_type=Neuron.rdf_type):
+        return indexed_identifiers(self.graph, start, target_type, self.index)
+
+    def test_agrees_with_goq(self):
+        start = self.stored(Neuron)(type='sensory')
+        goq = query_identifiers(self.graph, start, Neuron.rdf_type, GOQ_ENGINE)
+        self.assertEqual(goq, self.indexed(start))
+        self.assertEqual(2, len(goq))
+
+    def test_no_literal_not_indexed(self):
+        self.assertIsNone(self.indexed(self.stored(Neuron)()))
+
+    def test_nested_object_not_indexed(self):
+        start = self.stored(Connection)(pre_cell=self.stored(Neuron)(type='sensory'))
+        self.assertIsNone(self.indexed(start, Connection.rdf_type))
+
+    def test_staged_graph_not_indexed(self):
+        start = self.ctx.Neuron(type='sensory')
+        self.assertIsNone(indexed_identifiers(self.context.rdf_graph(), start,
+                                              Neuron.rdf_type, self.index))
+
+    def test_follows_added_triples(self):
+        self.indexed(self.stored(Neuron)(type='sensory'))
+        self.ctx.Neuron(name='ASHL').type('sensory')
+        self.save()
+        self.assertEqual(3, len(self.indexed(self.stored(Neuron)(type='sensory'))))
+
+    def test_follows_removed_pattern(self):
+        self.indexed(self.stored(Neuron)(type='sensory'))
+        self.TestConfig['rdf.graph'].remove((None, Neuron.type.link, R.Literal('sensory')))
+        self.assertEqual(set(), self.indexed(self.stored(Neuron)(type='sensory')))
+
+    def test_other_context_excluded(self):
+        from PyOpenWorm.context import Context
+        other = Context(ident='http://example.org/other-context', conf=self.TestConfig)
+        other(Neuron)(name='ASHL').type('sensory')
+        other.save_context()
+        self.assertEqual(2, len(self.indexed(self.stored(Neuron)(type='sensory'))))
+
+    def test_defined_owner_checked(self):
+        cell = self.ctx.Cell(name='sensory-cell')
+        conn = self.ctx.Connection(pre_cell=self.ctx.Neuron(name='ADAL'),
+                                   post_cell=cell, syntype='send')
+        self.save()
+        start = self.stored(Neuron)(type='sensory')
+        self.stored(Connection)(ident=conn.identifier).pre_cell(start)
+        self.assertEqual(set([self.ctx.Neuron(name='ADAL').identifier]),
+                         self.indexed(start))
+
+    def test_load_uses_index(self):
+        names = set(n.name() for n in self.stored(Neuron)(type='sensory').load())
+        self.assertEqual(set(['ADAL', 'PVDL']), names)
@@ -0,0 +1,223 @@
+from __future__ import absolute_import
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import threading
+from os.path import exists, join as p
+
+import rdflib as R
+import transaction
+from rdflib.store import TripleAddedEvent, TripleRemovedEvent, NO_STORE
+
+from PyOpenWorm.configure import Configure, Configureable
+from PyOpenWorm.data import Data
+from PyOpenWorm.sqlite_store import SQLiteStore
+
+EX = R.Namespace('http://example.org/')
+
+
+class SQLiteStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testdir = tempfile.mkdtemp(prefix=__name__ + '.')
+        self.fname = p(self.testdir, 'db.sqlite')
+        self.g = self.open()
+        self.c1 = self.g.get_context(EX.c1)
+        self.c2 = self.g.get_context(EX.c2)
+        self.c1.add((EX.a, EX.p, R.Literal('1')))
+        self.c1.add((EX.a, EX.q, EX.b))
+        self.c2.add((EX.a, EX.q, EX.b))
+        self.c2.add((EX.b, EX.r, R.Literal(2)))
+        self.c2.add((EX.b, EX.p, R.Literal(u'caf\xe9', lang='fr')))
+
+    def tearDown(self):
+        self.g.close()
+        shutil.rmtree(self.testdir)
+
+    def open(self):
+        g = R.ConjunctiveGraph(SQLiteStore())
+        g.open(self.fname, create=True)
+        return g
+
+    def test_len(self):
+        self.assertEqual(4, len(self.g))
+        self.assertEqual(2, len(self.c1))
+        self.assertEqual(3, len(self.c2))
+
+    def test_patterns(self):
+        self.assertEqual(set([(EX.a, EX.p, R.Literal('1')), (EX.a, EX.q, EX.b)]),
+                         set(self.g.triples((EX.a, None, None))))
+        self.assertEqual(set([EX.a]), set(self.g.subjects(EX.q, EX.b)))
+        self.assertEqual(set([(EX.b, EX.r, R.Literal(2))]),
+                         set(self.c2.triples((None, None, R.Literal(2)))))
+        self.assertEqual([], list(self.c1.triples((None, None, R.Literal(2)))))
+
+    def test_unknown_term(self):
+        self.assertEqual([], list(self.g.triples((EX.nothing, None, None))))
+
+    def test_contexts_of_triple(self):
+        self.assertEqual(set([EX.c1, EX.c2]),
+                         set(c.identifier for c in self.g.contexts((EX.a, EX.q, EX.b))))
+
+    def test_quads(self):
+        self.assertEqual(5, len(list(self.g.quads())))
+
+    def test_literals(self):
+        self.assertEqual(R.Literal(u'caf\xe9', lang='fr'), self.g.value(EX.b, EX.p))
+        self.assertEqual(R.Literal(2), self.g.value(EX.b, EX.r))
+
+    def test_remove_from_context(self):
+        self.c1.remove((EX.a, None, None))
+        self.assertEqual(0, len(self.c1))
+        self.assertEqual(3, len(self.c2))
+
+    def test_remove_context(self):
+        self.g.remove_context(self.c2)
+        self.assertEqual(set([EX.c1]), set(c.identifier for c in self.g.contexts()))
+
+    def test_addN(self):
+        self.g.addN([(EX.x, EX.p, EX.y, self.c1), (EX.x, EX.p, EX.z, self.c1)])
+        self.assertEqual(4, len(self.c1))
+
+    def test_events(self):
+        events = []
+        self.g.store.dispatcher.subscribe(TripleAddedEvent, events.append)
+        self.g.store.dispatcher.subscribe(TripleRemovedEvent, events.append)
+        self.g.addN([(EX.x, EX.p, EX.y, self.c1), (EX.x, EX.p, EX.y, self.c1)])
+        self.c1.remove((EX.x, None, None))
+        self.assertEqual([TripleAddedEvent, TripleRemovedEvent], [type(e) for e in events])
+
+    def test_added_before_event(self):
+        found = []
+        self.g.store.dispatcher.subscribe(TripleAddedEvent,
+                                          lambda e: found.append(e.triple in self.g))
+        self.g.addN([(EX.x, EX.p, EX.y, self.c1), (EX.x, EX.p, EX.z, self.c1)])
+        self.assertEqual([True, True], found)
+
+    def test_addN_read_in_batches(self):
+        read = []
+
+        def quads():
+            for i in range(2500):
+                read.append(i)
+                yield (EX['s' + str(i)], EX.p, R.Literal(i), self.c1)
+
+        events = []
+        self.g.store.dispatcher.subscribe(TripleAddedEvent, lambda e: events.append(len(read)))
+        self.g.addN(quads())
+        self.assertEqual(2502, len(self.c1))
+        self.assertLess(events[0], 2500)
+
+    def test_persistence(self):
+        self.g.close()
+        self.g = self.open()
+        self.assertEqual(4, len(self.g))
+        self.assertEqual(R.Literal(2), self.g.value(EX.b, EX.r))
+
+    def test_rollback(self):
+        self.g.commit()
+        self.c1.add((EX.x, EX.p, EX.y))
+        self.g.rollback()
+        self.assertEqual(2, len(self.c1))
+
+    def committed_len(self):
+        conn = sqlite3.connect(self.fname)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM quads').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_transaction_commit(self):
+        self.g.commit()
+        with transaction.manager:
+            self.c1.add((EX.x, EX.p, EX.y))
+        self.assertEqual(6, self.committed_len())
+
+    def test_transaction_abort(self):
+        self.g.commit()
+        transaction.begin()
+        self.c1.add((EX.x, EX.p, EX.y))
+        transaction.abort()
+        self.assertEqual(2, len(self.c1))
+        self.assertEqual(5, self.committed_len())
+
+    def test_namespaces(self):
+        self.g.bind('ex', EX)
+        self.g.close()
+        self.g = self.open()
+        self.assertEqual(R.URIRef(EX), self.g.store.namespace('ex'))
+
+    def test_other_thread(self):
+        res = []
+        t = threading.Thread(target=lambda: res.append(set(self.c2.triples((None, None, None)))))
+        t.start()
+        t.join()
+        self.assertEqual(set(self.c2.triples((None, None, None))), res[0])
+
+    def test_write_from_other_thread_while_reading(self):
+        for i in range(2500):
+            self.c1.add((EX['s' + str(i)], EX.p, R.Literal(i)))
+        res = []
+        for i, t in enumerate(self.c1.triples((None, EX.p, None))):
+            res.append(t)
+            if i == 0:
+                w = threading.Thread(target=lambda: [self.c1.add((EX['t' + str(j)], EX.p, EX.o))
+                                                     for j in range(2500)])
+                w.start()
+                w.join()
+        self.assertEqual(2501, len(res))
+
+    def test_open_without_create(self):
+        fname = p(self.testdir, 'other.sqlite')
+        self.assertEqual(NO_STORE, SQLiteStore().open(fname))
+        self.assertFalse(exists(fname))
+
+
+class SQLiteSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testdir = tempfile.mkdtemp(prefix=__name__ + '.')
+
+    def tearDown(self):
+        shutil.rmtree(self.testdir)
+
+    def data(self, **conf):
+        c = Configure()
+        c['rdf.source'] = 'sqlite'
+        for k, v in conf.items():
+            c[k] = v
+        Configureable.default = c
+        d = Data()
+        d.openDatabase()
+        return d
+
+    def test_persistence(self):
+        fname = p(self.testdir, 'db.sqlite')
+        d = self.data(**{'rdf.store_conf': fname})
+        d['rdf.graph'].get_context(EX.c).add((EX.a, EX.p, EX.b))
+        d.closeDatabase()
+        d = self.data(**{'rdf.store_conf': fname})
+        try:
+            self.assertEqual(1, len(d['rdf.graph']))
+        finally:
+            d.closeDatabase()
+
+    def test_import_tables(self):
+        sqldb = p(self.testdir, 'celegans.db')
+        conn = sqlite3.connect(sqldb)
+        conn.execute('CREATE TABLE tblentity (ID INTEGER, Entity TEXT)')
+        conn.execute('CREATE TABLE tblrelationship (EnID1 INTEGER, Relation INTEGER,'
+                     ' EnID2 INTEGER, Citations TEXT)')
+        conn.executemany('INSERT INTO tblentity VALUES (?, ?)', [(1, 'AVAL'), (2, 'ADAL')])
+        conn.execute('INSERT INTO tblrelationship VALUES (1, 3, 2, "ref")')
+        conn.commit()
+        conn.close()
+        d = self.data(**{'rdf.store_conf': p(self.testdir, 'db.sqlite'), 'sqldb': sqldb})
+        try:
+            g = d['rdf.graph']
+            n = d['rdf.namespace']
+            self.assertEqual(R.Literal('AVAL'), g.value(n['1'], R.RDFS.label))
+            self.assertIn((n['1'], n['3'], n['2']), g)
+        finally:
+            d.closeDatabase()
@@ -160,12 +160,47 @@ class POCacheTest(_DataTest):
         self.assertIsNotNone(c1)
         # XXX: Note that it doesn't matter if the triple was
         # actually in the graph
-        self.config['rdf.graph'].remove((R.URIRef('/not/in'),
+        self.config['rdf.graph'].remove((R.URIRef('http://example.org/a'),
                                          R.URIRef('/the'),
                                          R.URIRef('/graph')))
         o.boots()
         self.assertIsNot(c1, o.po_cache)
 
+    def test_cache_no_refresh_after_other_subject_add(self):
+        o = self.ctx.DataObject(ident=R.URIRef("http://example.org/a"))
+        DataObject.DatatypeProperty("boots", o)
+        o.boots()
+        c1 = o.po_cache
+        self.assertIsNotNone(c1)
+        self.config['rdf.graph'].add((R.URIRef('http://example.org/b'),
+                                      R.URIRef('http://bluhbluh.com'),
+                                      R.URIRef('http://bluhah.com')))
+        o.boots()
+        self.assertIs(c1, o.po_cache)
+
+    def test_cache_refresh_after_context_add(self):
+        o = self.ctx.DataObject(ident=R.URIRef("http://example.org/a"))
+        DataObject.DatatypeProperty("boots", o)
+        o.boots()
+        c1 = o.po_cache
+        self.assertIsNotNone(c1)
+        ctx = self.config['rdf.graph'].get_context(R.URIRef('http://example.org/ctx'))
+        ctx.add((R.URIRef('http://example.org/a'),
+                 R.URIRef('http://bluhbluh.com'),
+                 R.URIRef('http://bluhah.com')))
+        o.boots()
+        self.assertIsNot(c1, o.po_cache)
+
+    def test_cache_refresh_after_wildcard_remove(self):
+        o = self.ctx.DataObject(ident=R.URIRef("http://example.org/a"))
+        DataObject.DatatypeProperty("boots", o)
+        o.boots()
+        c1 = o.po_cache
+        self.assertIsNotNone(c1)
+        self.config['rdf.graph'].remove((None, None, None, R.URIRef('http://example.org/ctx')))
+        o.boots()
+        self.assertIsNot(c1, o.po_cache)
+
     def test_cache_refresh_clear(self):
         o = self.ctx.DataObject(ident=R.URIRef("http://example.org/a"))
         DataObject.DatatypeProperty("boots", o)
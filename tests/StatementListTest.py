@@ -0,0 +1,193 @@
+from __future__ import absolute_import
+import unittest
+
+from yarom.propertyValue import PropertyValue
+
+from PyOpenWorm.statement import Statement, StatementList
+
+
+class Obj(object):
+    ''' Equal to other objects with the same key, like DataObjects with the same identifier '''
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return isinstance(other, Obj) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+class Defined(object):
+    ''' Like a DataObject: equal to others with its identifier once it's defined '''
+    comparisons = 0
+
+    def __init__(self, identifier=None):
+        self.identifier = identifier
+
+    @property
+    def defined(self):
+        return self.identifier is not None
+
+    def __eq__(self, other):
+        Defined.comparisons += 1
+        return (isinstance(other, Defined) and self.defined and other.defined and
+                self.identifier == other.identifier)
+
+    def __hash__(self):
+        return id(self)
+
+
+class StatementListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.s = Obj('s')
+        self.p = Obj('p')
+        self.ctx1 = object()
+        self.ctx2 = object()
+
+    def stmt(self, o, ctx=None):
+        return Statement(self.s, self.p, o, self.ctx1 if ctx is None else ctx)
+
+    def test_order(self):
+        cut = StatementList()
+        stmts = [self.stmt(Obj(i)) for i in range(5)]
+        for x in stmts:
+            cut.append(x)
+        self.assertEqual(stmts, list(cut))
+
+    def test_remove(self):
+        cut = StatementList()
+        stmts = [self.stmt(Obj(i)) for i in range(5)]
+        for x in stmts:
+            cut.append(x)
+        cut.remove(stmts[2])
+        self.assertEqual(stmts[:2] + stmts[3:], list(cut))
+        self.assertEqual(4, len(cut))
+
+    def test_remove_equal_statement(self):
+        cut = StatementList()
+        cut.append(self.stmt(Obj(1)))
+        cut.remove(self.stmt(Obj(1)))
+        self.assertEqual(0, len(cut))
+
+    def test_remove_missing(self):
+        cut = StatementList()
+        with self.assertRaises(ValueError):
+            cut.remove(self.stmt(Obj(1)))
+
+    def test_remove_duplicate_once(self):
+        cut = StatementList()
+        o = Obj(1)
+        cut.append(self.stmt(o))
+        cut.append(self.stmt(o))
+        cut.remove(self.stmt(o))
+        self.assertEqual(1, len(cut))
+
+    def test_in_context(self):
+        cut = StatementList()
+        a = self.stmt(Obj(1), self.ctx1)
+        b = self.stmt(Obj(2), self.ctx2)
+        c = self.stmt(Obj(3), self.ctx1)
+        for x in (a, b, c):
+            cut.append(x)
+        self.assertEqual([a, c], list(cut.in_context(self.ctx1)))
+        self.assertEqual([b], list(cut.in_context(self.ctx2)))
+        self.assertEqual([], list(cut.in_context(None)))
+
+    def test_has_context(self):
+        cut = StatementList()
+        a = self.stmt(Obj(1), self.ctx1)
+        cut.append(a)
+        self.assertTrue(cut.has_context(self.ctx1))
+        self.assertFalse(cut.has_context(self.ctx2))
+        cut.remove(a)
+        self.assertFalse(cut.has_context(self.ctx1))
+
+    def test_remove_while_iterating(self):
+        cut = StatementList()
+        for i in range(4):
+            cut.append(self.stmt(Obj(i)))
+        for x in cut:
+            cut.remove(x)
+        self.assertEqual(0, len(cut))
+
+    def test_append_while_iterating(self):
+        cut = StatementList()
+        stmts = [self.stmt(Obj(i)) for i in range(3)]
+        for x in stmts:
+            cut.append(x)
+        seen = []
+        for x in cut:
+            seen.append(x)
+            cut.append(self.stmt(Obj('new')))
+        self.assertEqual(stmts, seen)
+        self.assertEqual(6, len(cut))
+
+    def test_iterate_without_copy(self):
+        cut = StatementList()
+        for i in range(3):
+            cut.append(self.stmt(Obj(i)))
+        entries = cut._entries
+        list(cut)
+        cut.append(self.stmt(Obj(3)))
+        self.assertIs(entries, cut._entries)
+
+    def test_remove_equal_literal(self):
+        cut = StatementList()
+        for i in range(20):
+            cut.append(self.stmt(PropertyValue(i)))
+        cut.remove(self.stmt(PropertyValue(7)))
+        self.assertNotIn(self.stmt(PropertyValue(7)), cut)
+        self.assertEqual(19, len(cut))
+
+    def test_remove_equal_object_compares_few(self):
+        cut = StatementList()
+        for i in range(50):
+            cut.append(self.stmt(Defined(i)))
+        Defined.comparisons = 0
+        cut.remove(self.stmt(Defined(25)))
+        self.assertEqual(49, len(cut))
+        self.assertLessEqual(Defined.comparisons, 2)
+
+    def test_remove_object_defined_after_append(self):
+        cut = StatementList()
+        o = Defined()
+        cut.append(self.stmt(o))
+        o.identifier = 'x'
+        cut.remove(self.stmt(Defined('x')))
+        self.assertEqual(0, len(cut))
+
+    def test_contains(self):
+        cut = StatementList()
+        cut.append(self.stmt(Obj(1)))
+        self.assertIn(self.stmt(Obj(1)), cut)
+        self.assertNotIn(self.stmt(Obj(2)), cut)
+
+    def test_clear(self):
+        cut = StatementList()
+        cut.append(self.stmt(Obj(1)))
+        cut.clear()
+        self.assertEqual([], list(cut))
+        self.assertFalse(cut.has_context(self.ctx1))
+
+    def test_order_kept_when_indexed(self):
+        cut = StatementList()
+        stmts = [self.stmt(Obj(i), (self.ctx1, self.ctx2)[i % 2])
+                 for i in range(StatementList.INDEX_THRESHOLD + 3)]
+        for x in stmts:
+            cut.append(x)
+        self.assertEqual(stmts, list(cut))
+        self.assertEqual(stmts[::2], list(cut.in_context(self.ctx1)))
+
+
+class IndexedStatementListTest(StatementListTest):
+    ''' The same tests with the statements indexed from the start '''
+
+    def setUp(self):
+        super(IndexedStatementListTest, self).setUp()
+        self.threshold = StatementList.INDEX_THRESHOLD
+        StatementList.INDEX_THRESHOLD = 0
+
+    def tearDown(self):
+        StatementList.INDEX_THRESHOLD = self.threshold
@@ -0,0 +1,150 @@
+from __future__ import absolute_import
+import os
+import threading
+import unittest
+
+import six
+from six import StringIO
+
+from PyOpenWorm.datasource import DataSource, OneOrMore
+from PyOpenWorm.translation_runner import (read_plan, job_dependencies, translation_order,
+                                           check_types, run_jobs, PlanError, TranslationJob)
+
+
+def _job(translator='t', data_sources=(), output_identifier=None):
+    return TranslationJob(translator=translator, data_sources=data_sources,
+                          named_data_sources=dict(), output_key=None,
+                          output_identifier=output_identifier)
+
+
+def _worker(arg, dep_results):
+    return (arg, dep_results)
+
+
+def _failing_worker(arg, dep_results):
+    raise Exception('failed ' + str(arg))
+
+
+def _unpicklable_worker(arg, dep_results):
+    return threading.Lock()
+
+
+def _dying_worker(arg, dep_results):
+    os._exit(1)
+
+
+class ASource(DataSource):
+    pass
+
+
+class BSource(DataSource):
+    pass
+
+
+class ReadPlanTest(unittest.TestCase):
+
+    def test_read(self):
+        jobs = read_plan(StringIO('[{"translator": "t", "data_sources": ["a", "b"],'
+                                  ' "output_identifier": "o"}]'))
+        self.assertEqual([_job('t', ('a', 'b'), 'o')], jobs)
+
+    def test_no_translator(self):
+        with self.assertRaises(PlanError):
+            read_plan(StringIO('[{"data_sources": ["a"]}]'))
+
+    def test_unknown_field(self):
+        with self.assertRaisesRegexp(PlanError, 'sources'):
+            read_plan(StringIO('[{"translator": "t", "sources": ["a"]}]'))
+
+    def test_key_and_identifier(self):
+        with self.assertRaises(PlanError):
+            read_plan(StringIO('[{"translator": "t", "output_key": "k",'
+                               ' "output_identifier": "o"}]'))
+
+    def test_not_a_list(self):
+        with self.assertRaises(PlanError):
+            read_plan(StringIO('{"translator": "t"}'))
+
+
+class DependenciesTest(unittest.TestCase):
+
+    def test_dependencies(self):
+        jobs = [_job(data_sources=('o1',), output_identifier='o2'),
+                _job(data_sources=('src',), output_identifier='o1'),
+                _job(data_sources=('o1', 'o2'))]
+        self.assertEqual([set([1]), set(), set([0, 1])], job_dependencies(jobs))
+
+    def test_duplicate_output(self):
+        with self.assertRaises(PlanError):
+            job_dependencies([_job(output_identifier='o'), _job(output_identifier='o')])
+
+    def test_own_output(self):
+        with self.assertRaises(PlanError):
+            job_dependencies([_job(data_sources=('o',), output_identifier='o')])
+
+    def test_order(self):
+        self.assertEqual([1, 3, 0, 2], translation_order([set([1]), set(), set([0, 1]), set()]))
+
+    def test_cycle(self):
+        with self.assertRaisesRegexp(PlanError, 'cycle'):
+            translation_order([set([1]), set([0]), set()])
+
+
+class CheckTypesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = [_job('ta', ('src',), 'o1'), _job('tb', ('o1',))]
+        self.deps = job_dependencies(self.jobs)
+
+    def test_matching_types(self):
+        check_types(self.jobs, self.deps, {'ta': (DataSource, ASource),
+                                           'tb': (ASource, BSource)})
+
+    def test_mismatched_types(self):
+        with self.assertRaises(PlanError):
+            check_types(self.jobs, self.deps, {'ta': (DataSource, ASource),
+                                               'tb': (BSource, BSource)})
+
+    def test_positional_types(self):
+        with self.assertRaises(PlanError):
+            check_types(self.jobs, self.deps, {'ta': (DataSource, ASource),
+                                               'tb': ((BSource, ASource), BSource)})
+
+    def test_one_or_more(self):
+        check_types(self.jobs, self.deps, {'ta': (DataSource, ASource),
+                                           'tb': (OneOrMore(ASource), BSource)})
+
+
+class RunJobsTest(unittest.TestCase):
+
+    deps = [set([1]), set(), set([0]), set()]
+
+    def check_results(self, results):
+        self.assertEqual(set(range(4)), set(i for i, _ in results))
+        finished = [i for i, _ in results]
+        self.assertLess(finished.index(1), finished.index(0))
+        self.assertLess(finished.index(0), finished.index(2))
+        results = dict(results)
+        self.assertEqual(('a2', [('a1', []), ('a0', [('a1', [])])]), results[2])
+        self.assertEqual(('a3', []), results[3])
+
+    def test_serial(self):
+        self.check_results(list(run_jobs(_worker, ['a0', 'a1', 'a2', 'a3'], self.deps,
+                                         processes=1)))
+
+    def test_parallel(self):
+        self.check_results(list(run_jobs(_worker, ['a0', 'a1', 'a2', 'a3'], self.deps,
+                                         processes=2)))
+
+    def test_parallel_failure(self):
+        with self.assertRaisesRegexp(PlanError, 'failed a1'):
+            list(run_jobs(_failing_worker, ['a0', 'a1'], [set([1]), set()], processes=2))
+
+    @unittest.skipIf(six.PY2, 'Pool has no error_callback on Python 2')
+    def test_parallel_unpicklable_result(self):
+        with self.assertRaises(PlanError):
+            list(run_jobs(_unpicklable_worker, ['a0', 'a1'], [set(), set()], processes=2))
+
+    def test_parallel_worker_dies(self):
+        with self.assertRaisesRegexp(PlanError, 'died'):
+            list(run_jobs(_dying_worker, ['a0', 'a1'], [set(), set()], processes=2))
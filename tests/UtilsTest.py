@@ -0,0 +1,46 @@
+from __future__ import absolute_import
+import random
+import unittest
+
+from PyOpenWorm.utils import external_sort, chunks
+
+
+class ExternalSortTest(unittest.TestCase):
+
+    def test_in_memory(self):
+        self.assertEqual([1, 2, 3], list(external_sort([3, 1, 2], run_size=10)))
+
+    def test_empty(self):
+        self.assertEqual([], list(external_sort([], run_size=10)))
+
+    def test_many_runs(self):
+        items = list(range(1000))
+        random.shuffle(items)
+        self.assertEqual(sorted(items), list(external_sort(items, run_size=7)))
+
+    def test_exact_run_size(self):
+        self.assertEqual([1, 2, 3, 4], list(external_sort([4, 3, 2, 1], run_size=2)))
+
+    def test_tuples(self):
+        items = [('b', 1), ('a', 2), ('a', 1)]
+        self.assertEqual(sorted(items), list(external_sort(items, run_size=1)))
+
+
+class ChunksTest(unittest.TestCase):
+
+    def test_chunks(self):
+        self.assertEqual([[1, 2], [3, 4], [5]], list(chunks(range(1, 6), 2)))
+
+    def test_exact(self):
+        self.assertEqual([[1, 2], [3, 4]], list(chunks(range(1, 5), 2)))
+
+    def test_empty(self):
+        self.assertEqual([], list(chunks([], 2)))
+
+    def test_error_passed_on(self):
+        def gen():
+            yield 1
+            raise RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            list(chunks(gen(), 2))